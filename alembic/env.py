@@ -9,6 +9,7 @@ from alembic import context
 import os
 from dotenv import load_dotenv
 from app.db.models import Base  # Import your SQLAlchemy Base
+from app.db.search_schema import is_search_object
 
 import sys
 from os.path import abspath, dirname
@@ -40,6 +41,17 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """
+    Keeps autogenerate / `alembic check` from proposing to drop the full-text search schema
+    (FTS5 virtual and shadow tables, GIN indexes), which is created by raw DDL, not the models.
+    """
+    if type_ in ("table", "index") and name and is_search_object(name):
+        return False
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -64,7 +76,8 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
-        render_as_batch=True
+        render_as_batch=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -87,7 +100,7 @@ def run_migrations_online() -> None:
     with connectable.connect() as connection:
         context.configure(
             connection=connection, target_metadata=target_metadata,
-            render_as_batch=True
+            render_as_batch=True, include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,36 @@
+"""Add history keyset indexes
+
+Revision ID: 2ba1dfcf31ed
+Revises: 639e1618de4b
+Create Date: 2026-10-19 10:41:05.902113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2ba1dfcf31ed'
+down_revision: Union[str, Sequence[str], None] = '639e1618de4b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('messages', schema=None) as batch_op:
+        batch_op.create_index('ix_messages_project_created', ['project_id', 'created_at', 'message_id'], unique=False)
+
+    with op.batch_alter_table('audit_log_entries', schema=None) as batch_op:
+        batch_op.create_index('ix_audit_log_entries_project_timestamp', ['project_id', 'timestamp', 'entry_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('audit_log_entries', schema=None) as batch_op:
+        batch_op.drop_index('ix_audit_log_entries_project_timestamp')
+
+    with op.batch_alter_table('messages', schema=None) as batch_op:
+        batch_op.drop_index('ix_messages_project_created')
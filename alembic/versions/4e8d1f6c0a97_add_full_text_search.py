@@ -0,0 +1,67 @@
+"""Add full-text search indexes
+
+FTS5 external-content tables kept in sync by triggers on SQLite; GIN expression
+indexes over to_tsvector('english', ...) on Postgres. Existing rows are back-filled.
+
+Revision ID: 4e8d1f6c0a97
+Revises: b7c41e9a2d53
+Create Date: 2026-10-19 11:40:12.506318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e8d1f6c0a97'
+down_revision: Union[str, Sequence[str], None] = 'b7c41e9a2d53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Frozen copies of app/db/search_schema.py (the last three statements back-fill the index)
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(original_research_goal, refined_research_goal, content='projects', content_rowid='rowid', tokenize='porter unicode61')",
+    'CREATE TRIGGER IF NOT EXISTS projects_fts_ai AFTER INSERT ON projects BEGIN INSERT INTO projects_fts(rowid, original_research_goal, refined_research_goal) VALUES (new.rowid, new.original_research_goal, new.refined_research_goal); END',
+    "CREATE TRIGGER IF NOT EXISTS projects_fts_ad AFTER DELETE ON projects BEGIN INSERT INTO projects_fts(projects_fts, rowid, original_research_goal, refined_research_goal) VALUES ('delete', old.rowid, old.original_research_goal, old.refined_research_goal); END",
+    "CREATE TRIGGER IF NOT EXISTS projects_fts_au AFTER UPDATE OF original_research_goal, refined_research_goal ON projects BEGIN INSERT INTO projects_fts(projects_fts, rowid, original_research_goal, refined_research_goal) VALUES ('delete', old.rowid, old.original_research_goal, old.refined_research_goal); INSERT INTO projects_fts(rowid, original_research_goal, refined_research_goal) VALUES (new.rowid, new.original_research_goal, new.refined_research_goal); END",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(content, content='messages', content_rowid='rowid', tokenize='porter unicode61')",
+    'CREATE TRIGGER IF NOT EXISTS messages_fts_ai AFTER INSERT ON messages BEGIN INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content); END',
+    "CREATE TRIGGER IF NOT EXISTS messages_fts_ad AFTER DELETE ON messages BEGIN INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS messages_fts_au AFTER UPDATE OF content ON messages BEGIN INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content); INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content); END",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(description, result, content='tasks', content_rowid='rowid', tokenize='porter unicode61')",
+    'CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN INSERT INTO tasks_fts(rowid, description, result) VALUES (new.rowid, new.description, new.result); END',
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN INSERT INTO tasks_fts(tasks_fts, rowid, description, result) VALUES ('delete', old.rowid, old.description, old.result); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF description, result ON tasks BEGIN INSERT INTO tasks_fts(tasks_fts, rowid, description, result) VALUES ('delete', old.rowid, old.description, old.result); INSERT INTO tasks_fts(rowid, description, result) VALUES (new.rowid, new.description, new.result); END",
+    "INSERT INTO projects_fts(projects_fts) VALUES ('rebuild')",
+    "INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')",
+    "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",
+]
+
+POSTGRES_UPGRADE = [
+    "CREATE INDEX IF NOT EXISTS ix_projects_fts ON projects USING GIN (to_tsvector('english', coalesce(original_research_goal, '') || ' ' || coalesce(refined_research_goal, '')))",
+    "CREATE INDEX IF NOT EXISTS ix_messages_fts ON messages USING GIN (to_tsvector('english', coalesce(content, '')))",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_fts ON tasks USING GIN (to_tsvector('english', coalesce(description, '') || ' ' || coalesce(result, '')))",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    statements = SQLITE_UPGRADE if dialect == "sqlite" else POSTGRES_UPGRADE if dialect == "postgresql" else []
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    for table in ("projects", "messages", "tasks"):
+        if dialect == "sqlite":
+            for suffix in ("ai", "ad", "au"):
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {table}_fts")
+        elif dialect == "postgresql":
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_fts")
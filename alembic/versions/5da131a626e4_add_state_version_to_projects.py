@@ -0,0 +1,30 @@
+"""Add state_version to projects
+
+Revision ID: 5da131a626e4
+Revises: 9027eac4fdbc
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5da131a626e4'
+down_revision: Union[str, Sequence[str], None] = '9027eac4fdbc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('state_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.drop_column('state_version')
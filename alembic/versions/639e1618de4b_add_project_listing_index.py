@@ -0,0 +1,30 @@
+"""Add project listing index
+
+Revision ID: 639e1618de4b
+Revises: 5da131a626e4
+Create Date: 2026-10-19 10:02:17.554910
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '639e1618de4b'
+down_revision: Union[str, Sequence[str], None] = '5da131a626e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.create_index('ix_projects_owner_created', ['owner_id', 'created_at', 'project_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.drop_index('ix_projects_owner_created')
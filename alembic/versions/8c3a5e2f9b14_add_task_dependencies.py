@@ -0,0 +1,42 @@
+"""Add depends_on to tasks
+
+Revision ID: 8c3a5e2f9b14
+Revises: 4e8d1f6c0a97
+Create Date: 2026-10-19 13:05:27.114392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c3a5e2f9b14'
+down_revision: Union[str, Sequence[str], None] = '4e8d1f6c0a97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Dropping a column makes SQLite batch mode recreate `tasks`, which drops its FTS triggers and
+# may renumber rowids: restore them and re-index (frozen copy from 4e8d1f6c0a97)
+SQLITE_TASKS_FTS = [
+    'CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN INSERT INTO tasks_fts(rowid, description, result) VALUES (new.rowid, new.description, new.result); END',
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN INSERT INTO tasks_fts(tasks_fts, rowid, description, result) VALUES ('delete', old.rowid, old.description, old.result); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF description, result ON tasks BEGIN INSERT INTO tasks_fts(tasks_fts, rowid, description, result) VALUES ('delete', old.rowid, old.description, old.result); INSERT INTO tasks_fts(rowid, description, result) VALUES (new.rowid, new.description, new.result); END",
+    "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('depends_on', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_column('depends_on')
+    if op.get_bind().dialect.name == "sqlite":
+        for statement in SQLITE_TASKS_FTS:
+            op.execute(statement)
@@ -0,0 +1,72 @@
+"""Add scratchpad to projects
+
+Revision ID: a7e3d9c15b62
+Revises: f2b6c8d0e4a1
+Create Date: 2026-10-19 17:48:12.305917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e3d9c15b62'
+down_revision: Union[str, Sequence[str], None] = 'f2b6c8d0e4a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of app/db/json_merge_patch.py (RFC 7396 over jsonb; SQLite has json_patch())
+POSTGRES_MERGE_PATCH_FUNCTION = """
+CREATE OR REPLACE FUNCTION jsonb_merge_patch(target jsonb, patch jsonb) RETURNS jsonb
+LANGUAGE plpgsql IMMUTABLE AS $$
+BEGIN
+    IF patch IS NULL OR jsonb_typeof(patch) <> 'object' THEN
+        RETURN patch;
+    END IF;
+    IF target IS NULL OR jsonb_typeof(target) <> 'object' THEN
+        target := '{}'::jsonb;
+    END IF;
+    RETURN (
+        SELECT coalesce(jsonb_object_agg(merged.key, merged.value), '{}'::jsonb)
+        FROM (
+            SELECT t.key, t.value FROM jsonb_each(target) t WHERE NOT patch ? t.key
+            UNION ALL
+            SELECT p.key, jsonb_merge_patch(target -> p.key, p.value)
+            FROM jsonb_each(patch) p WHERE jsonb_typeof(p.value) <> 'null'
+        ) merged
+    );
+END
+$$
+"""
+
+# Dropping a column makes SQLite batch mode recreate `projects`, which drops its FTS triggers
+# and may renumber rowids: restore them and re-index (frozen copy from 4e8d1f6c0a97)
+SQLITE_PROJECTS_FTS = [
+    'CREATE TRIGGER IF NOT EXISTS projects_fts_ai AFTER INSERT ON projects BEGIN INSERT INTO projects_fts(rowid, original_research_goal, refined_research_goal) VALUES (new.rowid, new.original_research_goal, new.refined_research_goal); END',
+    "CREATE TRIGGER IF NOT EXISTS projects_fts_ad AFTER DELETE ON projects BEGIN INSERT INTO projects_fts(projects_fts, rowid, original_research_goal, refined_research_goal) VALUES ('delete', old.rowid, old.original_research_goal, old.refined_research_goal); END",
+    "CREATE TRIGGER IF NOT EXISTS projects_fts_au AFTER UPDATE OF original_research_goal, refined_research_goal ON projects BEGIN INSERT INTO projects_fts(projects_fts, rowid, original_research_goal, refined_research_goal) VALUES ('delete', old.rowid, old.original_research_goal, old.refined_research_goal); INSERT INTO projects_fts(rowid, original_research_goal, refined_research_goal) VALUES (new.rowid, new.original_research_goal, new.refined_research_goal); END",
+    "INSERT INTO projects_fts(projects_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('scratchpad', sa.JSON().with_variant(postgresql.JSONB(), 'postgresql'), nullable=True))
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(POSTGRES_MERGE_PATCH_FUNCTION)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("DROP FUNCTION IF EXISTS jsonb_merge_patch(jsonb, jsonb)")
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.drop_column('scratchpad')
+    if dialect == "sqlite":
+        for statement in SQLITE_PROJECTS_FTS:
+            op.execute(statement)
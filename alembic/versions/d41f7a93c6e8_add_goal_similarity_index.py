@@ -0,0 +1,54 @@
+"""Add near-duplicate goal index
+
+Revision ID: d41f7a93c6e8
+Revises: 8c3a5e2f9b14
+Create Date: 2026-10-19 14:22:09.581734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41f7a93c6e8'
+down_revision: Union[str, Sequence[str], None] = '8c3a5e2f9b14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('goal_signatures',
+    sa.Column('project_id', sa.String(length=36), nullable=False),
+    sa.Column('owner_id', sa.String(length=36), nullable=False),
+    sa.Column('minhash', sa.LargeBinary(), nullable=False),
+    sa.Column('document_fingerprints', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.project_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('project_id')
+    )
+    with op.batch_alter_table('goal_signatures', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_goal_signatures_owner_id'), ['owner_id'], unique=False)
+
+    op.create_table('goal_lsh_buckets',
+    sa.Column('project_id', sa.String(length=36), nullable=False),
+    sa.Column('bucket', sa.String(length=24), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.project_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('project_id', 'bucket')
+    )
+    with op.batch_alter_table('goal_lsh_buckets', schema=None) as batch_op:
+        batch_op.create_index('ix_goal_lsh_buckets_bucket', ['bucket'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('goal_lsh_buckets', schema=None) as batch_op:
+        batch_op.drop_index('ix_goal_lsh_buckets_bucket')
+
+    op.drop_table('goal_lsh_buckets')
+    with op.batch_alter_table('goal_signatures', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_goal_signatures_owner_id'))
+
+    op.drop_table('goal_signatures')
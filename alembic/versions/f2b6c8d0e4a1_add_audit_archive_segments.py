@@ -0,0 +1,47 @@
+"""Add audit archive segment index
+
+Revision ID: f2b6c8d0e4a1
+Revises: d41f7a93c6e8
+Create Date: 2026-10-19 16:05:41.214380
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b6c8d0e4a1'
+down_revision: Union[str, Sequence[str], None] = 'd41f7a93c6e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('audit_archive_segments',
+    sa.Column('segment_id', sa.String(length=36), nullable=False),
+    sa.Column('project_id', sa.String(length=36), nullable=False),
+    sa.Column('storage_path', sa.String(length=1024), nullable=False),
+    sa.Column('codec', sa.String(length=10), nullable=False),
+    sa.Column('entry_count', sa.Integer(), nullable=False),
+    sa.Column('byte_size', sa.BigInteger(), nullable=False),
+    sa.Column('first_timestamp', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('first_entry_id', sa.String(length=36), nullable=False),
+    sa.Column('last_timestamp', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_entry_id', sa.String(length=36), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.project_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('segment_id')
+    )
+    with op.batch_alter_table('audit_archive_segments', schema=None) as batch_op:
+        batch_op.create_index('ix_audit_archive_segments_project_first', ['project_id', 'first_timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('audit_archive_segments', schema=None) as batch_op:
+        batch_op.drop_index('ix_audit_archive_segments_project_first')
+
+    op.drop_table('audit_archive_segments')
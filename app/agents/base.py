@@ -1,18 +1,26 @@
 # app/agents/base.py (REFINED - Pydantic-Based)
 
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
+from contextvars import ContextVar
 from datetime import datetime, timezone
 
 # CRITICAL: Import the clean, structured data models (Pydantic)
-from app.schemas.project import ConversationMessage, TaskItem, AuditEntry
-from pydantic import BaseModel
+from app.schemas.project import ConversationMessage, TaskItem, AuditEntry, TrustedModel
+from app.llm import LLMClient, get_llm_client
+from .context import ContextAssembler, get_context_assembler
+
+# Receives every entry added through add_audit_entry, as it is added. The worker binds the
+# write-behind audit sink here (see app/db/audit_sink.py); unbound, entries are only persisted
+# with the next saved state.
+audit_listener_var: ContextVar[Optional[Callable[[AuditEntry], None]]] = ContextVar("audit_listener", default=None)
 
 # We will define the VirtualLabState using Pydantic, but add the helper methods you wrote.
 
-class VirtualLabState(BaseModel):
+class VirtualLabState(TrustedModel):
     """
     The complete, ephemeral state of the virtual lab - the agent's workbench.
-    It inherits from Pydantic's BaseModel for validation and safety.
+    It inherits from Pydantic's BaseModel for validation and safety; state rebuilt from
+    our own DB skips validation via VirtualLabState.trusted().
     """
     messages: List[ConversationMessage]
     task_list: List[TaskItem]
@@ -23,8 +31,8 @@ class VirtualLabState(BaseModel):
     
     # We add the helper methods directly to the Pydantic model instance
     def add_audit_entry(self, agent: str, action: str, details: Dict[str, Any]):
-        """Helper to append to the lab notebook."""
-        new_entry = AuditEntry(
+        """Helper to append to the lab notebook (agent-built, so not re-validated)."""
+        new_entry = AuditEntry.trusted(
             timestamp=datetime.now(timezone.utc),
             agent=agent,
             action=action,
@@ -32,15 +40,30 @@ class VirtualLabState(BaseModel):
             details=details
         )
         self.audit_log.append(new_entry)
+        listener = audit_listener_var.get()
+        if listener is not None:
+            listener(new_entry)
         
     def to_dict(self) -> Dict[str, Any]:
         """Serialize for API response."""
         # Pydantic's model_dump is the correct way to serialize
         return self.model_dump(mode='json')
 
+    def to_json(self) -> bytes:
+        """Serialize straight to JSON bytes (pydantic-core; no intermediate dict)."""
+        return self.model_dump_json().encode()
+
 
 class BaseAgent:
     """Base class with interface definition for all agents."""
+
+    def __init__(self, llm: Optional[LLMClient] = None, context_assembler: Optional[ContextAssembler] = None):
+        """
+        `llm` defaults to the process-wide cached client (see app/llm), `context_assembler`
+        to the process-wide one (see app/agents/context.py).
+        """
+        self.llm = llm or get_llm_client()
+        self.context_assembler = context_assembler or get_context_assembler()
     
     async def execute(
         self,
@@ -0,0 +1,375 @@
+# app/agents/context.py
+
+# Context assembly: fits what an agent knows about a project (goal, scratchpad, conversation,
+# audit trail and excerpts of the attached documents) into a token budget for one prompt.
+#
+# - Documents are streamed in fixed-size reads and cut into chunks as they go; only the best
+#   `max_candidates` chunks are kept (a bounded heap), so memory does not grow with attachment
+#   size, and at most CONTEXT_MAX_SCAN_BYTES are read per document, so neither does time.
+# - Chunks are scored against the goal (BM25 term weighting) and packed best-first into
+#   whatever budget the other sections left, then emitted in document order.
+# - History is truncated newest-first: recent messages and audit entries win.
+# - Tokens are counted incrementally per piece with an approximate (word/punctuation)
+#   tokenizer; budgets are approximate by the same margin.
+#
+# Assembled contexts are cached per (project_id, state_version): agents that share a state
+# (concurrent tasks, several calls in one execute()) assemble it once.
+
+import asyncio
+import codecs
+import heapq
+import logging
+import os
+import re
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.schemas.project import AuditEntry, ConversationMessage
+from app.utils.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+CONTEXT_MAX_SCAN_BYTES = int(os.getenv("CONTEXT_MAX_SCAN_BYTES", str(64 * 1024 ** 2)))
+
+READ_SIZE = 64 * 1024
+# Files read as text; anything else is only listed (a real extractor would plug in here)
+TEXT_SUFFIXES = frozenset({".txt", ".md", ".csv", ".tsv", ".json", ".ndjson", ".xml", ".html", ".fasta", ".fa", ".tex", ".rst"})
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count (words and punctuation marks)."""
+    return sum(1 for _ in _TOKEN_RE.finditer(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """The longest prefix of `text` with at most `max_tokens` tokens (stops scanning early)."""
+    if max_tokens <= 0:
+        return ""
+    cut = 0
+    for i, match in enumerate(_TOKEN_RE.finditer(text)):
+        if i == max_tokens - 1:
+            cut = match.start()
+        elif i == max_tokens:
+            # The ellipsis is a token too: keep max_tokens - 1 of the original
+            return text[:cut].rstrip() + " …"
+    return text
+
+
+_TERM_RE = re.compile(r"\w{3,}")
+
+
+def _terms(text: str) -> List[str]:
+    """Lower-cased words of three or more characters (the scoring vocabulary)."""
+    return _TERM_RE.findall(text.lower())
+
+
+@dataclass
+class ContextBudget:
+    """Token budget of one prompt. History shares are upper bounds; documents get the rest."""
+    total_tokens: int = CONTEXT_TOKEN_BUDGET
+    scratchpad_share: float = 0.1
+    messages_share: float = 0.25
+    audit_share: float = 0.1
+    chunk_chars: int = 2000
+
+    def cache_key(self) -> Tuple:
+        return (self.total_tokens, self.scratchpad_share, self.messages_share, self.audit_share, self.chunk_chars)
+
+
+@dataclass(frozen=True)
+class DocumentExcerpt:
+    document: int  # index into the document_paths
+    path: str
+    offset: int  # character offset of the excerpt in the decoded document
+    text: str
+    score: float
+
+    @property
+    def label(self) -> str:
+        # Position and type only: storage names are random IDs and would make equal
+        # documents produce different prompts
+        return f"[document {self.document + 1}{os.path.splitext(self.path)[1]} @{self.offset}]"
+
+
+@dataclass
+class AssembledContext:
+    text: str
+    tokens: int
+    section_tokens: Dict[str, int] = field(default_factory=dict)
+    excerpts: List[DocumentExcerpt] = field(default_factory=list)
+    truncated: bool = False
+
+
+def iter_text_chunks(path: str, chunk_chars: int, max_bytes: int = CONTEXT_MAX_SCAN_BYTES) -> Iterator[Tuple[int, str]]:
+    """
+    Yields (offset, chunk) from a text file, reading READ_SIZE bytes at a time. Chunks break
+    at a paragraph or word boundary where possible. Stops after `max_bytes`.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    offset = 0
+    read = 0
+    with open(path, "rb") as f:
+        while read < max_bytes:
+            block = f.read(min(READ_SIZE, max_bytes - read))
+            if not block:
+                break
+            read += len(block)
+            buffer += decoder.decode(block)
+            while len(buffer) >= chunk_chars:
+                cut = _split_point(buffer, chunk_chars)
+                yield offset, buffer[:cut]
+                offset += cut
+                buffer = buffer[cut:]
+    buffer += decoder.decode(b"", final=True)
+    if buffer.strip():
+        yield offset, buffer
+
+
+def _split_point(buffer: str, chunk_chars: int) -> int:
+    floor = chunk_chars // 2
+    for separator in ("\n\n", "\n", " "):
+        cut = buffer.rfind(separator, floor, chunk_chars)
+        if cut != -1:
+            return cut + len(separator)
+    return chunk_chars
+
+
+def _is_text_document(path: str) -> bool:
+    if path.startswith("s3://") or not os.path.isfile(path):
+        return False
+    if os.path.splitext(path)[1].lower() in TEXT_SUFFIXES:
+        return True
+    with open(path, "rb") as f:
+        head = f.read(4096)
+    return b"\x00" not in head and bool(head)
+
+
+class ChunkScorer:
+    """BM25 term weighting of chunks against the query (document frequencies are unknown
+    while streaming, so every query term weighs the same and length is normalized to the
+    nominal chunk size)."""
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, query: str, chunk_chars: int):
+        self.query_terms = set(_terms(query))
+        self.average_length = max(1, chunk_chars // 6)  # ~6 characters per word
+
+    def score(self, chunk: str) -> float:
+        if not self.query_terms:
+            return 0.0
+        lowered = chunk.lower()
+        # Substring pre-check (C speed): most chunks of a large document match nothing and
+        # are never tokenized
+        if not any(term in lowered for term in self.query_terms):
+            return 0.0
+        words = _TERM_RE.findall(lowered)
+        counts = Counter(words)
+        norm = self.K1 * (1 - self.B + self.B * len(words) / self.average_length)
+        return sum(
+            tf * (self.K1 + 1) / (tf + norm)
+            for tf in (counts[term] for term in self.query_terms) if tf
+        )
+
+
+class ContextAssembler:
+    """Builds AssembledContexts, with a process-local LRU per (project_id, state_version)."""
+
+    def __init__(self, max_cached: int = 64, max_scan_bytes: int = CONTEXT_MAX_SCAN_BYTES):
+        self.max_cached = max_cached
+        self.max_scan_bytes = max_scan_bytes
+        self._cache: "OrderedDict[Tuple, AssembledContext]" = OrderedDict()
+        self._in_flight: Dict[Tuple, "asyncio.Future[AssembledContext]"] = {}
+
+    async def assemble(
+        self,
+        goal: str,
+        messages: Sequence[ConversationMessage],
+        audit_log: Sequence[AuditEntry],
+        scratchpad: Dict,
+        document_paths: Sequence[str],
+        budget: Optional[ContextBudget] = None,
+        project_id: Optional[str] = None,
+        state_version: Optional[int] = None,
+    ) -> AssembledContext:
+        """
+        Assembles (or returns the cached) context. Caching applies when both `project_id` and
+        `state_version` are given, and the caller vouches that the other arguments are the
+        project's state AT that version: build the context before mutating the state.
+        The work runs in a thread (it reads files); concurrent callers with the same key
+        share one build.
+        """
+        budget = budget or ContextBudget()
+        key = None
+        if project_id is not None and state_version is not None:
+            key = (project_id, state_version, goal, tuple(document_paths), budget.cache_key())
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+            pending = self._in_flight.get(key)
+            if pending is not None:
+                return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future() if key is not None else None
+        if key is not None:
+            self._in_flight[key] = future
+        try:
+            context = await asyncio.to_thread(
+                self.build, goal, list(messages), list(audit_log), dict(scratchpad), list(document_paths), budget
+            )
+            if key is not None:
+                self._cache[key] = context
+                while len(self._cache) > self.max_cached:
+                    self._cache.popitem(last=False)
+                future.set_result(context)
+            return context
+        except BaseException as e:
+            if future is not None and not future.done():
+                future.set_exception(e)
+                future.exception()  # consumed here; waiters re-raise it
+            raise
+        finally:
+            if key is not None and self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def build(
+        self,
+        goal: str,
+        messages: List[ConversationMessage],
+        audit_log: List[AuditEntry],
+        scratchpad: Dict,
+        document_paths: List[str],
+        budget: ContextBudget,
+    ) -> AssembledContext:
+        """Synchronous assembly (no caching)."""
+        sections: List[Tuple[str, str]] = []
+        used: Dict[str, int] = {}
+        truncated = False
+
+        goal_text = truncate_to_tokens(goal, budget.total_tokens // 4)
+        sections.append(("Research goal", goal_text))
+        used["goal"] = count_tokens(goal_text)
+
+        if scratchpad:
+            limit = int(budget.total_tokens * budget.scratchpad_share)
+            text = dumps(scratchpad).decode()
+            fitted = truncate_to_tokens(text, limit)
+            truncated |= fitted != text
+            sections.append(("Scratchpad", fitted))
+            used["scratchpad"] = count_tokens(fitted)
+
+        lines, tokens, cut = self._newest_first(
+            [f"{m.role}: {m.content}" for m in messages], int(budget.total_tokens * budget.messages_share)
+        )
+        if lines:
+            sections.append(("Conversation", "\n".join(lines)))
+        used["messages"] = tokens
+        truncated |= cut
+
+        lines, tokens, cut = self._newest_first(
+            # No timestamps: equal histories must give equal prompts (and LLM cache hits)
+            [f"{e.agent}: {e.action} ({e.current_phase})" for e in audit_log],
+            int(budget.total_tokens * budget.audit_share)
+        )
+        if lines:
+            sections.append(("Audit trail", "\n".join(lines)))
+        used["audit"] = tokens
+        truncated |= cut
+
+        # Documents get everything the other sections did not use (headers cost a few tokens)
+        document_budget = budget.total_tokens - sum(used.values()) - 4 * (len(sections) + 1)
+        excerpts, cut = self._select_excerpts(goal, document_paths, document_budget, budget.chunk_chars)
+        truncated |= cut
+        if excerpts:
+            sections.append(("Document excerpts", "\n\n".join(
+                f"{e.label}\n{e.text.strip()}" for e in excerpts
+            )))
+        used["documents"] = sum(count_tokens(e.text) for e in excerpts)
+
+        text = "\n\n".join(f"## {title}\n{body}" for title, body in sections)
+        return AssembledContext(
+            text=text,
+            tokens=count_tokens(text),
+            section_tokens=used,
+            excerpts=excerpts,
+            truncated=truncated,
+        )
+
+    @staticmethod
+    def _newest_first(lines: List[str], limit: int) -> Tuple[List[str], int, bool]:
+        """Keeps the most recent lines that fit `limit` tokens, in chronological order."""
+        kept: List[str] = []
+        tokens = 0
+        for line in reversed(lines):
+            line_tokens = count_tokens(line)
+            if tokens + line_tokens > limit:
+                if not kept and limit > 0:
+                    # The newest entry alone is too long: keep its beginning
+                    kept.append(truncate_to_tokens(line, limit))
+                    tokens = limit
+                    return kept, tokens, True
+                break
+            kept.append(line)
+            tokens += line_tokens
+        return kept[::-1], tokens, len(kept) < len(lines)
+
+    def _select_excerpts(
+        self, goal: str, paths: Sequence[str], budget: int, chunk_chars: int
+    ) -> Tuple[List[DocumentExcerpt], bool]:
+        """Best-scoring chunks across all documents that fit `budget`, in document order."""
+        if budget <= 0 or not paths:
+            return [], bool(paths)
+        scorer = ChunkScorer(goal, chunk_chars)
+        # Enough candidates to fill the budget with chunks of a quarter of the nominal size
+        max_candidates = max(1, min(512, budget // max(1, chunk_chars // 24)))
+        heap: List[Tuple[float, int, int, str, int, str]] = []
+        sequence = 0
+        for doc_index, path in enumerate(paths):
+            try:
+                if not _is_text_document(path):
+                    continue
+                for offset, chunk in iter_text_chunks(path, chunk_chars, self.max_scan_bytes):
+                    # Tiny positional bonus: with no matching terms, earlier text wins
+                    score = scorer.score(chunk) + 1e-6 / (1 + sequence)
+                    entry = (score, -sequence, doc_index, path, offset, chunk)
+                    sequence += 1
+                    if len(heap) < max_candidates:
+                        heapq.heappush(heap, entry)
+                    elif score > heap[0][0]:
+                        heapq.heapreplace(heap, entry)
+            except OSError as e:
+                logger.warning("Skipping unreadable document", extra={"path": path, "error": str(e)})
+
+        selected: List[Tuple[int, DocumentExcerpt]] = []
+        remaining = budget
+        truncated = len(heap) < sequence
+        for score, neg_sequence, doc_index, path, offset, chunk in sorted(heap, reverse=True):
+            excerpt = DocumentExcerpt(document=doc_index, path=path, offset=offset, text=chunk, score=round(score, 4))
+            # Each excerpt is labelled with its source, which costs tokens too
+            remaining -= count_tokens(excerpt.label)
+            if remaining <= 0:
+                truncated = True
+                break
+            tokens = count_tokens(chunk)
+            if tokens > remaining:
+                excerpt = replace(excerpt, text=truncate_to_tokens(chunk, remaining))
+                tokens = remaining
+                truncated = True
+            selected.append((-neg_sequence, excerpt))
+            remaining -= tokens
+        selected.sort(key=lambda item: item[0])
+        return [excerpt for _, excerpt in selected], truncated
+
+
+@lru_cache(maxsize=1)
+def get_context_assembler() -> ContextAssembler:
+    """Process-wide assembler (shares its cache across the agents of a job)."""
+    return ContextAssembler(max_cached=int(os.getenv("CONTEXT_CACHE_ENTRIES", "64")))
@@ -0,0 +1,104 @@
+# app/agents/orchestrator.py
+
+# The router loop: follows VirtualLabState.next_agent (the "traffic cop") from agent to agent
+# against the in-memory state, inside ONE worker job. It stops at a human gate, at the end of
+# the pipeline, or when the step budget runs out, and persists at checkpoints along the way,
+# so a multi-agent pipeline costs one queue round trip and one state load instead of N.
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Literal, Optional
+
+from .base import VirtualLabState
+from .registry import AgentRegistry, HUMAN_GATES, TERMINAL_AGENTS
+
+logger = logging.getLogger(__name__)
+
+StopReason = Literal["human_gate", "finished", "step_budget"]
+
+
+@dataclass
+class LoopResult:
+    state: VirtualLabState
+    stop_reason: StopReason
+    agents_run: List[str]
+
+
+async def run_agent_loop(
+    state: VirtualLabState,
+    start_agent: str,
+    registry: AgentRegistry,
+    context: Dict[str, Any],
+    max_steps: int,
+    checkpoint: Optional[Callable[[VirtualLabState], Optional[int]]] = None,
+    checkpoint_every: int = 1,
+) -> LoopResult:
+    """
+    Runs agents until a human gate, a terminal `next_agent` or `max_steps`.
+
+    Args:
+        state: The workbench; mutated in place by every agent.
+        start_agent: The first agent to run (the job's agent_name).
+        registry: Where agent names are resolved.
+        context: Keyword arguments passed to every agent's execute() (goal, user metadata, files).
+            If it has a "state_version" key, the loop keeps it equal to the persisted version
+            of the in-memory state: None while steps are unsaved, the checkpoint's return
+            value after each checkpoint (so agents can cache per version).
+        max_steps: Step budget; guards against agents routing to each other forever.
+        checkpoint: Persists the state and returns its new version (called after every `checkpoint_every` steps and, if
+            anything ran since the last one, once more when the loop stops). If an agent
+            raises, nothing after the last checkpoint is saved.
+        checkpoint_every: Steps between checkpoints.
+
+    Raises:
+        UnknownAgentError: A `next_agent` is not registered.
+    """
+    agent_name = start_agent
+    agents_run: List[str] = []
+    unsaved_steps = 0
+
+    while True:
+        if agent_name in HUMAN_GATES:
+            stop_reason = "human_gate"
+            break
+        if agent_name in TERMINAL_AGENTS:
+            stop_reason = "finished"
+            break
+        if len(agents_run) >= max_steps:
+            # Budget spent with work left: next_agent stays in place so a later job can resume
+            stop_reason = "step_budget"
+            state.add_audit_entry(
+                agent="orchestrator",
+                action="step_budget_exhausted",
+                details={"max_steps": max_steps, "next_agent": agent_name, "agents_run": agents_run}
+            )
+            unsaved_steps += 1
+            break
+
+        agent = registry.create(agent_name)
+        logger.info(f"Executing {agent_name}", extra={"step": len(agents_run) + 1})
+        state = await agent.execute(state=state, **context)
+        agents_run.append(agent_name)
+        unsaved_steps += 1
+        agent_name = state.next_agent
+        if "state_version" in context:
+            context["state_version"] = None
+
+        if checkpoint is not None and unsaved_steps >= checkpoint_every:
+            _save(checkpoint, state, context)
+            unsaved_steps = 0
+
+    if checkpoint is not None and unsaved_steps:
+        _save(checkpoint, state, context)
+
+    logger.info(
+        "Agent loop stopped",
+        extra={"stop_reason": stop_reason, "agents_run": agents_run, "next_agent": state.next_agent}
+    )
+    return LoopResult(state=state, stop_reason=stop_reason, agents_run=agents_run)
+
+
+def _save(checkpoint: Callable[[VirtualLabState], Optional[int]], state: VirtualLabState, context: Dict[str, Any]) -> None:
+    version = checkpoint(state)
+    if "state_version" in context:
+        context["state_version"] = version
@@ -1,5 +1,5 @@
 # app/agents/pi_agent.py (REFINED - Correct Stub)
-# going to be using langgraph?
+# Model calls go through self.llm (app/llm): cached by prompt hash, fake backend in dev/tests.
 
 from typing import Dict, List, Any, Optional
 from .base import BaseAgent, VirtualLabState
@@ -9,6 +9,12 @@ import uuid
 import logging
 logger = logging.getLogger(__name__)
 
+REFINEMENT_SYSTEM_PROMPT = (
+    "You are the principal investigator of a virtual research lab. Rewrite the user's research "
+    "goal as one precise, testable research question, in the register of their profession."
+)
+
+
 class PIAgent(BaseAgent):
     """
     Planning & Intake Agent
@@ -21,6 +27,9 @@ class PIAgent(BaseAgent):
         original_research_goal: str,
         user_metadata: Dict[str, Any],
         context_files: Optional[List[Dict[str, Any]]] = None,
+        project_id: Optional[str] = None,
+        state_version: Optional[int] = None,
+        warm_start: Optional[Dict[str, Any]] = None,
         **kwargs
     ) -> VirtualLabState:
         """
@@ -30,8 +39,26 @@ class PIAgent(BaseAgent):
             state: The initial state workbench.
             research_goal: The user's goal.
             context_files: List of file metadata.
+            project_id, state_version: Identify the state as loaded (context cache key).
+            warm_start: The plan of an earlier near-duplicate project (see PlanReuseService);
+                mode "reuse" adopts it without a model call, "warm_start" uses it as a draft.
         """
         user_role = user_metadata.get('profession', 'Scientist')
+        reuse_plan = bool(warm_start) and warm_start.get("mode") == "reuse"
+
+        # Fit goal, history and document excerpts into the prompt budget. Built from the
+        # state as loaded, before this run changes it, so it is cacheable per state_version.
+        prompt_context = None
+        if not reuse_plan:
+            prompt_context = await self.context_assembler.assemble(
+                goal=original_research_goal,
+                messages=state.messages,
+                audit_log=state.audit_log,
+                scratchpad=state.scratchpad,
+                document_paths=[f for f in (context_files or []) if isinstance(f, str)],
+                project_id=project_id,
+                state_version=state_version,
+            )
 
         logger.debug(
             "PI Agent execution started with user context.", 
@@ -53,12 +80,27 @@ class PIAgent(BaseAgent):
             }
         )
         
-        # 1. Simulate AI Refinement (Boilerplate)
-        # The AI now uses the profession to set the tone!
-        refined_goal = (
-            f"Validated Goal for {user_role}: Determine protein function given reaction pathways and contextual documents "
-            f"provided by {user_metadata.get('institution', 'the user')}. (Tone adjusted for {user_role}.)"
-        )
+        # 1. AI Refinement. The prompt depends only on the goal, the user's profile and the
+        # documents, so re-runs and retries of the same project are served from the LLM cache.
+        # The AI uses the profession to set the tone!
+        # A near-duplicate of an earlier project reuses that project's answer instead.
+        if reuse_plan:
+            refined_goal = warm_start["refined_research_goal"]
+        else:
+            response = await self.llm.complete(
+                self._refinement_prompt(original_research_goal, user_metadata, prompt_context.text, warm_start),
+                system=REFINEMENT_SYSTEM_PROMPT,
+            )
+            refined_goal = response.text.strip()
+        if warm_start:
+            state.add_audit_entry(
+                agent="pi_agent",
+                action="plan_reused" if reuse_plan else "plan_warm_started",
+                details={
+                    "source_project_id": warm_start["source_project_id"],
+                    "similarity": warm_start["similarity"],
+                }
+            )
 
         # CRITICAL: Store the refined goal in the SCRATCHPAD
         state.scratchpad['refined_research_goal'] = refined_goal
@@ -79,19 +121,31 @@ class PIAgent(BaseAgent):
         # Add Assistant Message (The AI's response)
         
         # Add Assistant Message (The AI's public response)
+        if reuse_plan:
+            # Only name the source as the user's own when matching is limited to their projects
+            source = "one of your earlier projects" if warm_start.get("scope", "owner") == "owner" else "an earlier project"
+            content = (
+                f"This goal closely matches {source} (similarity {warm_start['similarity']:.0%}), "
+                f"so I reused its refined question: '{refined_goal}' and its analysis plan."
+            )
+        else:
+            content = f"Based on your domain {user_role}. I have refined your objective into the following question: '{refined_goal}'. I have drafted an initial analysis plan based on your request."
         state.messages.append(
             ConversationMessage(
                 role="assistant",
                 # Show the refined goal to the user to prove understanding
-                content=f"Based on your domain {user_role}. I have refined your objective into the following question: '{refined_goal}'. I have drafted an initial analysis plan based on your request."
+                content=content
             )
         )
         
-        # Create the Initial Task List
-        state.task_list = [
-            TaskItem(id="t1", description="Search PubMed for latest KP.3 variants literature.", status="pending"),
-            TaskItem(id="t2", description="Analyze spike protein mutations.", status="pending"),
-        ]
+        # Create the Initial Task List (an earlier near-duplicate's plan, if offered)
+        if warm_start and warm_start.get("tasks"):
+            state.task_list = self._plan_from_warm_start(warm_start["tasks"])
+        else:
+            state.task_list = [
+                TaskItem(id="t1", description="Search PubMed for latest KP.3 variants literature.", status="pending"),
+                TaskItem(id="t2", description="Analyze spike protein mutations.", status="pending", depends_on=["t1"]),
+            ]
 
         # 3. CRITICAL: Store the refined goal in the SCRATCHPAD
         state.scratchpad['refined_research_goal'] = refined_goal
@@ -110,4 +164,42 @@ class PIAgent(BaseAgent):
             }
         )
         
-        return state
\ No newline at end of file
+        return state
+
+    @staticmethod
+    def _plan_from_warm_start(tasks: List[Dict[str, Any]]) -> List[TaskItem]:
+        """Fresh, pending copies of an earlier plan (agent-local IDs; dependencies follow)."""
+        local_ids = {task["id"]: f"t{i}" for i, task in enumerate(tasks, start=1)}
+        return [
+            TaskItem(
+                id=local_ids[task["id"]],
+                description=task["description"],
+                status="pending",
+                depends_on=[local_ids[dep] for dep in task.get("depends_on") or [] if dep in local_ids],
+            )
+            for task in tasks
+        ]
+
+    @staticmethod
+    def _refinement_prompt(
+        original_research_goal: str,
+        user_metadata: Dict[str, Any],
+        context: str,
+        warm_start: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Deterministic prompt (stable ordering, no timestamps or IDs) so equal inputs hash equally."""
+        draft = ""
+        if warm_start:
+            draft = (
+                "Draft from a near-identical earlier goal:\n"
+                f"Refined question: {warm_start['refined_research_goal']}\n"
+                + "".join(f"- {task['description']}\n" for task in warm_start.get("tasks") or [])
+                + "\n"
+            )
+        return (
+            f"Profession: {user_metadata.get('profession', 'Scientist')}\n"
+            f"Institution: {user_metadata.get('institution', 'unknown')}\n\n"
+            f"{context}\n\n"
+            f"{draft}"
+            f"Research goal: {original_research_goal}"
+        )
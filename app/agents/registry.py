@@ -0,0 +1,58 @@
+# app/agents/registry.py
+
+# The agent registry: maps a `next_agent` name to the class that implements it.
+# Adding an agent to the pipeline = writing a BaseAgent subclass and registering it here;
+# the worker's router loop (app/agents/orchestrator.py) picks it up with no new queue plumbing.
+
+from typing import Callable, Dict, FrozenSet, Iterable
+
+from .base import BaseAgent
+from .pi_agent import PIAgent
+from .task_executor import TaskExecutorAgent
+
+# `next_agent` values that hand control back to a human: the loop stops and waits
+HUMAN_GATES: FrozenSet[str] = frozenset({"user_approval"})
+
+# `next_agent` values that mean the pipeline has nothing left to do
+TERMINAL_AGENTS: FrozenSet[str] = frozenset({"", "done", "complete"})
+
+
+class UnknownAgentError(ValueError):
+    """`next_agent` names an agent that is not registered."""
+
+
+class AgentRegistry:
+    """Name -> agent factory. Factories are called once per job (agents may hold per-run state)."""
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], BaseAgent]] = {}
+
+    def register(self, name: str, factory: Callable[[], BaseAgent]) -> None:
+        if name in HUMAN_GATES or name in TERMINAL_AGENTS:
+            raise ValueError(f"'{name}' is reserved and cannot be an agent name")
+        self._factories[name] = factory
+
+    def create(self, name: str) -> BaseAgent:
+        """
+        Raises:
+            UnknownAgentError: No agent is registered under `name`.
+        """
+        try:
+            return self._factories[name]()
+        except KeyError:
+            raise UnknownAgentError(f"Unknown agent: {name}") from None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._factories
+
+    @property
+    def names(self) -> Iterable[str]:
+        return self._factories.keys()
+
+
+def build_default_registry() -> AgentRegistry:
+    """The agents available to the worker."""
+    registry = AgentRegistry()
+    registry.register("pi_agent", PIAgent)
+    registry.register("task_executor", TaskExecutorAgent)
+    return registry
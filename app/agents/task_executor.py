@@ -0,0 +1,244 @@
+# app/agents/task_executor.py
+
+# Executes the plan (VirtualLabState.task_list) as a dependency graph instead of a to-do list:
+# every task whose `depends_on` are all completed starts immediately, up to a per-project and
+# a process-wide concurrency limit. A plan therefore takes roughly as long as its critical
+# path, not the sum of its tasks. TaskItems are updated in place as each task finishes, and a
+# failure cancels everything downstream of it (independent branches keep running).
+
+import asyncio
+import logging
+import os
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from .base import BaseAgent, VirtualLabState
+from app.schemas.project import TaskItem
+
+logger = logging.getLogger(__name__)
+
+# Tasks of one project running at once, and of all projects in this process (RQ forks a
+# process per job, so in the worker the global limit applies per job; it matters where several
+# executors share a process and an event loop)
+TASK_MAX_CONCURRENCY_PER_PROJECT = int(os.getenv("TASK_MAX_CONCURRENCY_PER_PROJECT", "4"))
+TASK_MAX_CONCURRENCY = int(os.getenv("TASK_MAX_CONCURRENCY", "16"))
+
+# Statuses that still need to run. in_progress is included: it can only be left behind by a
+# job that died mid-run, and tasks are re-run from scratch.
+RUNNABLE_STATUSES = frozenset({"pending", "in_progress"})
+
+# Runs one task and returns its result (raising marks the task failed)
+TaskRunner = Callable[[TaskItem, VirtualLabState], Awaitable[Any]]
+
+# One global semaphore per event loop (asyncio primitives cannot be shared across loops)
+_global_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _global_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _global_slots.get(loop)
+    if semaphore is None:
+        semaphore = _global_slots[loop] = asyncio.Semaphore(TASK_MAX_CONCURRENCY)
+    return semaphore
+
+
+class TaskGraphError(ValueError):
+    """`depends_on` names a task that is not in the plan, or the dependencies form a cycle."""
+
+
+@dataclass
+class TaskRunReport:
+    completed: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    cancelled: List[str] = field(default_factory=list)
+
+
+def validate_task_graph(tasks: List[TaskItem]) -> None:
+    """
+    Raises:
+        TaskGraphError: Unknown dependency or dependency cycle.
+    """
+    by_id = {task.id: task for task in tasks}
+    for task in tasks:
+        unknown = [dep for dep in task.depends_on if dep not in by_id]
+        if unknown:
+            raise TaskGraphError(f"Task {task.id} depends on unknown task(s): {', '.join(unknown)}")
+
+    # Kahn's algorithm: whatever cannot be ordered is on (or behind) a cycle
+    remaining = {task.id: len(set(task.depends_on)) for task in tasks}
+    dependents: Dict[str, List[str]] = {task.id: [] for task in tasks}
+    for task in tasks:
+        for dep in set(task.depends_on):
+            dependents[dep].append(task.id)
+    ready = [task_id for task_id, count in remaining.items() if count == 0]
+    ordered = 0
+    while ready:
+        task_id = ready.pop()
+        ordered += 1
+        for dependent in dependents[task_id]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+    if ordered != len(tasks):
+        cyclic = sorted(task_id for task_id, count in remaining.items() if count > 0)
+        raise TaskGraphError(f"Dependency cycle among tasks: {', '.join(cyclic)}")
+
+
+class TaskExecutor:
+    """Dependency-aware, bounded-concurrency execution of a task_list."""
+
+    def __init__(
+        self,
+        run_task: TaskRunner,
+        max_concurrency: int = TASK_MAX_CONCURRENCY_PER_PROJECT,
+        global_limit: Optional[asyncio.Semaphore] = None,
+    ):
+        """
+        Args:
+            run_task: Executes one task.
+            max_concurrency: Tasks of this plan running at once.
+            global_limit: Shared across executors; defaults to the process-wide
+                TASK_MAX_CONCURRENCY semaphore.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.run_task = run_task
+        self.max_concurrency = max_concurrency
+        self.global_limit = global_limit
+
+    async def execute(self, state: VirtualLabState) -> TaskRunReport:
+        """
+        Runs every runnable task in `state.task_list`, mutating the TaskItems in place.
+        Completed tasks are not re-run; a dependency that already failed or was cancelled
+        cancels its dependents without running them.
+
+        Raises:
+            TaskGraphError: Invalid dependencies (raised before anything runs).
+        """
+        tasks = state.task_list
+        validate_task_graph(tasks)
+        by_id = {task.id: task for task in tasks}
+        dependents: Dict[str, List[str]] = {task.id: [] for task in tasks}
+        for task in tasks:
+            for dep in set(task.depends_on):
+                dependents[dep].append(task.id)
+
+        report = TaskRunReport()
+        waiting: Set[str] = {task.id for task in tasks if task.status in RUNNABLE_STATUSES}
+        for task in tasks:
+            settled = [dep for dep in task.depends_on if by_id[dep].status in ("failed", "cancelled")]
+            if task.id in waiting and settled:
+                self._cancel_downstream(settled[0], by_id, dependents, waiting, report, root=task.id)
+
+        project_limit = asyncio.Semaphore(self.max_concurrency)
+        global_limit = self.global_limit or _global_semaphore()
+        running: Dict[asyncio.Task, str] = {}
+
+        def start_ready() -> None:
+            for task_id in [t for t in waiting if all(by_id[dep].status == "completed" for dep in by_id[t].depends_on)]:
+                waiting.discard(task_id)
+                running[asyncio.create_task(self._run_one(by_id[task_id], state, project_limit, global_limit))] = task_id
+
+        try:
+            start_ready()
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    task_id = running.pop(finished)
+                    if by_id[task_id].status == "completed":
+                        report.completed.append(task_id)
+                    else:
+                        report.failed.append(task_id)
+                        self._cancel_downstream(task_id, by_id, dependents, waiting, report)
+                start_ready()
+        finally:
+            # Cancelled from outside (job timeout, shutdown): stop the tasks still running
+            for pending in running:
+                pending.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+        return report
+
+    async def _run_one(
+        self,
+        task: TaskItem,
+        state: VirtualLabState,
+        project_limit: asyncio.Semaphore,
+        global_limit: asyncio.Semaphore,
+    ) -> None:
+        async with project_limit, global_limit:
+            task.status = "in_progress"
+            try:
+                task.result = await self.run_task(task, state)
+                task.status = "completed"
+            except asyncio.CancelledError:
+                task.status = "pending"
+                raise
+            except Exception as e:
+                logger.warning(f"Task {task.id} failed", extra={"task_id": task.id, "error": str(e)})
+                task.result = f"{type(e).__name__}: {e}"
+                task.status = "failed"
+
+    @staticmethod
+    def _cancel_downstream(
+        failed_id: str,
+        by_id: Dict[str, TaskItem],
+        dependents: Dict[str, List[str]],
+        waiting: Set[str],
+        report: TaskRunReport,
+        root: Optional[str] = None,
+    ) -> None:
+        """Cancels every waiting task that (transitively) depends on `failed_id` (or from `root`)."""
+        stack = [root] if root is not None else list(dependents[failed_id])
+        while stack:
+            task_id = stack.pop()
+            if task_id not in waiting:
+                continue
+            waiting.discard(task_id)
+            task = by_id[task_id]
+            task.status = "cancelled"
+            task.result = f"Cancelled: dependency {failed_id} did not complete"
+            report.cancelled.append(task_id)
+            stack.extend(dependents[task_id])
+
+
+async def simulated_task_runner(task: TaskItem, state: VirtualLabState) -> str:
+    """Stand-in until real tools are wired in (like the PI agent's simulated refinement)."""
+    await asyncio.sleep(0)
+    return f"Simulated result for: {task.description}"
+
+
+class TaskExecutorAgent(BaseAgent):
+    """
+    Execution Agent
+    Runs the approved plan and hands the project on once every task has settled.
+    """
+
+    def __init__(self, run_task: TaskRunner = simulated_task_runner, llm=None, context_assembler=None):
+        super().__init__(llm, context_assembler)
+        self.executor = TaskExecutor(run_task)
+
+    async def execute(self, state: VirtualLabState, **kwargs) -> VirtualLabState:
+        state.current_phase = "execution"
+        state.add_audit_entry(
+            agent="task_executor",
+            action="execution_started",
+            details={"num_tasks": len(state.task_list), "max_concurrency": self.executor.max_concurrency}
+        )
+
+        report = await self.executor.execute(state)
+
+        state.current_phase = "execution_complete"
+        state.next_agent = "done"
+        state.add_audit_entry(
+            agent="task_executor",
+            action="execution_complete",
+            details={
+                "completed": report.completed,
+                "failed": report.failed,
+                "cancelled": report.cancelled,
+                "next_agent": state.next_agent,
+            }
+        )
+        return state
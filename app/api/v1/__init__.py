@@ -3,10 +3,14 @@
 from fastapi import APIRouter
 # Assuming the actual endpoint logic is in app/api/v1/endpoints/projects.py
 from .endpoints import projects 
+from .endpoints import uploads
+from .endpoints import search
 
 # Set the version prefix ONLY once here.
 api_router = APIRouter(prefix="/api/v1") 
 
 # The projects router will define its path *relative* to this prefix,
 # e.g., if it has /projects, the final path is /api/v1/projects.
-api_router.include_router(projects.router, tags=["projects"])
\ No newline at end of file
+api_router.include_router(projects.router, tags=["projects"])
+api_router.include_router(uploads.router, tags=["uploads"])
+api_router.include_router(search.router, tags=["search"])
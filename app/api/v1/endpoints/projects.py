@@ -1,46 +1,76 @@
 # app/api/v1/endpoints/projects.py (REFINED - SCALABLE)
 
-from typing import List, Optional
-from fastapi import APIRouter, Depends, Form, UploadFile, HTTPException, status, Header
+import asyncio
+from datetime import datetime
+import logging
+import os
+import tempfile
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, Form, UploadFile, HTTPException, status, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from app.services.project_service import ProjectService 
+from app.services.project_events import ProjectEventBroker, is_valid_event_id
 
 # Import the correct schemas for the ASYNC contract
-from app.schemas.project import ProjectCreationResponse
+from app.schemas.project import ProjectCreationResponse, VirtualLabState, ProjectListResponse, MessagePage, AuditLogPage
+from app.schemas.project import BatchProjectCreationResponse, BatchProjectResult
 
 # Import the clean, high-level service dependency
-from app.dependencies import get_project_service 
+from app.dependencies import (
+    get_project_service, get_project_event_broker, get_project_state_cache,
+    get_idempotency_store, get_admission_controller, lookup_project_owner,
+    get_project_bundle_service
+)
+from app.services.admission import AdmissionController
+from app.services.upload_service import UploadNotFound
+from app.db.upload_repository import UploadClaimConflict
+from app.services.project_bundle import ProjectBundleService, BundleError
+from app.services.idempotency import (
+    IdempotencyStore, IdempotencyKeyReused, IdempotencyInFlight, StoredResponse, request_fingerprint,
+    upload_digest
+)
 
 # we are returning a 202 Accepted response for body responses, not anything to do with AUTH.
 # auth is still a multipart/form-data endpoint. NEVER CHANGE THAT TO JSON.
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse, Response
+from app.services.state_cache import ProjectStateCache, etag_matches
+from app.utils.compression import MINIMUM_SIZE, negotiate_encoding, variant_etag
+from app.utils.serialization import FastJSONResponse, dumps
+from app.core.auth import get_current_user_id
 
+logger = logging.getLogger(__name__)
 
-# --- Authentication Dependency (Kept as is - it's great!) ---
 
-async def get_current_user_id(
-    authorization: Optional[str] = Header(None)
+async def require_project_owner(
+    project_id: str,
+    owner_id: str = Depends(get_current_user_id)
 ) -> str:
     """
-    TDD-safe auth stub to extract and validate the user ID from the Bearer token.
+    Resolves the {project_id} path parameter, ensuring the caller owns the project.
+    Unknown and foreign projects both return 404 so IDs cannot be probed.
     """
-    scheme, _, token = (authorization or "").partition(" ")
-    
-    if scheme.lower() != "bearer" or not token:
+    project_owner_id = await run_in_threadpool(lookup_project_owner, project_id)
+    if project_owner_id is None or project_owner_id != owner_id:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    return project_id
+
+
+async def admit_new_project(controller: AdmissionController, owner_id: str) -> None:
+    """
+    Admission control for endpoints that enqueue agent work: 429 when the caller exceeds
+    their rate limit, 503 when the agent queue is saturated. Both carry Retry-After.
+    Called only once the request really is new work (after any idempotent replay).
+    """
+    decision = await controller.admit(owner_id)
+    if not decision.allowed:
+        raise HTTPException(
+            status_code=decision.status_code,
+            detail=decision.reason,
+            headers={"Retry-After": str(decision.retry_after_seconds)}
         )
-        
-    if token == "TEST_AUTH_TOKEN":
-        # Return a deterministic test user ID
-        return "test-user-f81d4"
-
-    raise HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Invalid authentication credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
 
 
 router = APIRouter()
@@ -57,14 +87,23 @@ async def create_project(
     # Multipart Form Data (FastAPI handles parsing research_goal and files)
     original_research_goal: str = Form(..., description="The user's primary text prompt."),
     context_docs: Optional[List[UploadFile]] = Form(None, description="One or more context files."),
+    upload_ids: Optional[List[str]] = Form(None, description="IDs of finalized resumable uploads (POST /uploads)."),
+    
+    # Retries with the same key replay the first response instead of creating another project
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     
     # Dependencies (Clean, high-level dependencies only)
     owner_id: str = Depends(get_current_user_id),
-    project_service: ProjectService = Depends(get_project_service)
+    project_service: ProjectService = Depends(get_project_service),
+    idempotency_store: IdempotencyStore = Depends(get_idempotency_store),
+    controller: AdmissionController = Depends(get_admission_controller)
 ):
     """
     Initiates a new research project. This is a non-blocking operation 
     that queues the AI analysis task and immediately returns an acknowledgement.
+    
+    Clients should send an Idempotency-Key header: a retry with the same key (even one that
+    arrives while the first attempt is still running) gets the original response.
     """
     
     if not original_research_goal or not original_research_goal.strip():
@@ -72,13 +111,50 @@ async def create_project(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="research_goal cannot be empty"
         )
-    
+
+    # 0. Idempotency: replay (or wait for) a previous attempt instead of redoing the work
+    fingerprint = None
+    if idempotency_key:
+        fingerprint = request_fingerprint(
+            original_research_goal,
+            [(doc.filename, doc.size, await upload_digest(doc)) for doc in context_docs or []],
+            sorted(upload_ids or [])
+        )
+        try:
+            replay = await idempotency_store.begin(owner_id, idempotency_key, fingerprint)
+        except IdempotencyKeyReused:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail="Idempotency-Key was already used for a different request."
+            )
+        except IdempotencyInFlight:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still being processed.",
+                headers={"Retry-After": "1"}
+            )
+        if replay is not None:
+            return Response(
+                content=replay.body,
+                status_code=replay.status_code,
+                headers={**replay.headers, "Idempotent-Replayed": "true"},
+                media_type="application/json"
+            )
+
+    # From here on a claimed key is released unless complete() is reached, whatever ends the
+    # request (errors, cancellation on shutdown), so a retry can do the work
+    completed = False
     try:
+        # Refuse new work early (429/503) instead of letting the agent queue grow without bound.
+        # Replays above never get here, so retrying a completed request costs no tokens.
+        await admit_new_project(controller, owner_id)
+
         # 1. Delegate work entirely to the Service layer
         project = await project_service.start_new_project(
             owner_id=owner_id,
             original_research_goal=original_research_goal,
-            context_docs=context_docs
+            context_docs=context_docs,
+            upload_ids=upload_ids
         )
         
         # 2. Validate the ORM object into the Pydantic instance (V2 syntax)
@@ -95,25 +171,406 @@ async def create_project(
         )
         
         # 4. Create the raw JSONResponse object to inject the Location header
-        response = JSONResponse(
-            content=response_data.model_dump(mode='json'), # Use model_dump to get the serializable dict
+        response = FastJSONResponse(
+            content=response_data, # Rendered straight to bytes by pydantic-core
             status_code=status.HTTP_202_ACCEPTED
         )
         
         # 5. Inject the standard Location header
         response.headers["Location"] = f"/api/v1/projects/{project.project_id}"
+
+        # 6. Record the outcome for retries carrying the same Idempotency-Key
+        if idempotency_key:
+            await idempotency_store.complete(
+                owner_id,
+                idempotency_key,
+                fingerprint,
+                StoredResponse(
+                    status_code=response.status_code,
+                    body=response.body,
+                    headers={"Location": response.headers["Location"]}
+                )
+            )
+            completed = True
         
-        # 6. FINAL RETURN (The only one in the try block)
+        # 7. FINAL RETURN (The only one in the try block)
         return response
         
-        
+    except HTTPException:
+        raise
+
+    except UploadNotFound as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"Unknown, unfinished or already attached uploads: {e}"
+        )
+
+    except UploadClaimConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
     except Exception as e:
         # Any failure in the Service (DB error, file storage failure) results in a 500
         # The service layer is responsible for the cleanup/rollback
-        print(f"Error initiating project for user {owner_id}: {e}")
+        logger.exception(f"Error initiating project for user {owner_id}: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to initiate project. Please try again."
         )
+
+    finally:
+        if idempotency_key and not completed:
+            # Shielded: a cancelled request must still finish releasing the key
+            await asyncio.shield(idempotency_store.release(owner_id, idempotency_key))
+
+
+# Upper bound on research goals per batch request (keeps one transaction reasonably sized)
+MAX_BATCH_PROJECTS = int(os.getenv("MAX_BATCH_PROJECTS", "500"))
+
+
+@router.post(
+    "/projects/batch",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=BatchProjectCreationResponse,
+)
+async def create_projects_batch(
+    research_goals: List[str] = Form(..., description="One form field per research goal."),
+    context_docs: Optional[List[UploadFile]] = Form(None, description="Context files shared by every project."),
+    owner_id: str = Depends(get_current_user_id),
+    project_service: ProjectService = Depends(get_project_service),
+    controller: AdmissionController = Depends(get_admission_controller)
+):
+    """
+    Creates many projects in one request (bulk imports). All accepted projects are written
+    in a single transaction and their agent jobs enqueued in one Redis round trip.
+    Empty goals are rejected individually; the results list mirrors the request order.
+    """
+    if len(research_goals) > MAX_BATCH_PROJECTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"A batch may contain at most {MAX_BATCH_PROJECTS} research goals."
+        )
+
+    results = [BatchProjectResult(index=i, status="rejected", error="research_goal cannot be empty") for i in range(len(research_goals))]
+    valid = [i for i, goal in enumerate(research_goals) if goal and goal.strip()]
+    if not valid:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="research_goals cannot all be empty")
+
+    # The whole batch is admitted (or refused) at once against the bulk budget: each project
+    # is one agent job. 413 means the batch can never fit and must be split.
+    decision = await controller.admit_bulk(owner_id, cost=len(valid))
+    if not decision.allowed:
+        raise HTTPException(
+            status_code=decision.status_code,
+            detail=decision.reason,
+            headers={"Retry-After": str(decision.retry_after_seconds)} if decision.retry_after_seconds else None
+        )
+
+    try:
+        projects = await project_service.start_new_projects(
+            owner_id=owner_id,
+            research_goals=[research_goals[i] for i in valid],
+            context_docs=context_docs
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error initiating project batch for user {owner_id}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to initiate projects. Please try again."
+        )
+
+    for i, project in zip(valid, projects):
+        results[i] = BatchProjectResult(index=i, status="accepted", project_id=project.project_id)
+
+    return FastJSONResponse(
+        content=BatchProjectCreationResponse(
+            results=results, accepted=len(valid), rejected=len(results) - len(valid)
+        ),
+        status_code=status.HTTP_202_ACCEPTED
+    )
+
+
+@router.get("/projects", response_model=ProjectListResponse)
+async def list_projects(
+    limit: int = Query(50, ge=1, le=200, description="Page size."),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page."),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated columns to return, e.g. 'title,current_phase'. project_id is always included."
+    ),
+    owner_id: str = Depends(get_current_user_id),
+    project_service: ProjectService = Depends(get_project_service)
+):
+    """
+    Lists the caller's projects, newest first, using keyset (cursor) pagination.
+    Only the requested columns are read from the database.
+    """
+    requested = [f.strip() for f in (fields or "title,current_phase,created_at").split(",") if f.strip()]
+
+    try:
+        page = await project_service.list_projects(
+            owner_id=owner_id,
+            fields=requested,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # exclude_unset: fields that were not requested are omitted rather than sent as null
+    return Response(content=dumps(page, exclude_unset=True), media_type="application/json")
+
+
+@router.get(
+    "/projects/{project_id}",
+    response_model=VirtualLabState,
+    responses={304: {"description": "State unchanged since the ETag sent in If-None-Match."}},
+)
+async def get_project(
+    project_id: str,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    owner_id: str = Depends(get_current_user_id),
+    project_service: ProjectService = Depends(get_project_service),
+    state_cache: ProjectStateCache = Depends(get_project_state_cache)
+):
+    """
+    Returns the project's full VirtualLabState. The body is served pre-serialized (and
+    compressed at most once per version) from the state cache; clients should send
+    If-None-Match to get a 304 while nothing has changed.
+    """
+    cached = await project_service.get_project_state(project_id)
+
+    # Unknown and foreign projects are indistinguishable to the caller
+    if cached is None or cached.owner_id != owner_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    encoding = negotiate_encoding(accept_encoding) if len(cached.body) >= MINIMUM_SIZE else None
+    headers = {
+        "ETag": variant_etag(cached.etag, encoding),
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    body = cached.body
+    if encoding is not None:
+        # The compression middleware skips responses that already have a Content-Encoding
+        body = await state_cache.get_variant(cached, encoding)
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _wants_ndjson(format: Optional[str], accept: Optional[str]) -> bool:
+    """NDJSON export is selected with ?format=ndjson or Accept: application/x-ndjson."""
+    return format == "ndjson" or "application/x-ndjson" in (accept or "")
+
+
+@router.get(
+    "/projects/{project_id}/files/{file_id}",
+    response_class=FileResponse,
+    responses={
+        206: {"description": "The requested byte range(s)."},
+        304: {"description": "File unchanged since the ETag sent in If-None-Match."},
+        307: {"description": "Redirect to a presigned object-store URL."},
+    },
+)
+async def download_project_file(
+    file_id: str,
+    project_id: str = Depends(require_project_owner),
+    if_none_match: Optional[str] = Header(None),
+    project_service: ProjectService = Depends(get_project_service)
+):
+    """
+    Downloads a stored context document.
     
-    
\ No newline at end of file
+    Local files are streamed by FileResponse in fixed-size chunks (or handed to the server via
+    the ASGI pathsend extension for zero-copy sendfile where supported), so memory per download
+    is constant. Range / If-Range give partial and resumed downloads; the ETag is the stored
+    SHA-256, a strong validator. Object-store files redirect to a short-lived presigned URL.
+    """
+    resolved = await project_service.get_project_file(project_id, file_id)
+    if resolved is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    file, presigned_url = resolved
+
+    if presigned_url is not None:
+        return RedirectResponse(
+            presigned_url,
+            status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+            headers={"Cache-Control": "no-store"}
+        )
+
+    try:
+        stat_result = await run_in_threadpool(os.stat, file.storage_path)
+    except FileNotFoundError:
+        logger.error(f"Stored file missing for {project_id}/{file_id}: {file.storage_path}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+
+    headers = {"Cache-Control": "private, no-cache"}
+    if file.content_sha256:
+        # Files are immutable, so the content hash is a strong validator (If-Range works)
+        headers["ETag"] = f'"{file.content_sha256}"'
+        if etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return FileResponse(
+        file.storage_path,
+        headers=headers,
+        media_type=file.file_type,
+        filename=file.filename,
+        stat_result=stat_result,
+    )
+
+
+# Bundles larger than this are refused on import; the body spills to disk past the spool size
+MAX_BUNDLE_SIZE = int(os.getenv("MAX_BUNDLE_SIZE", str(10 * 1024 ** 3)))
+BUNDLE_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+@router.get("/projects/{project_id}/export")
+async def export_project(
+    project_id: str = Depends(require_project_owner),
+    bundle_service: ProjectBundleService = Depends(get_project_bundle_service)
+):
+    """
+    Streams the whole project (rows and stored files) as a tar bundle that
+    POST /projects/import accepts. Constant memory regardless of project size.
+    """
+    return StreamingResponse(
+        bundle_service.export_bundle(project_id),
+        media_type="application/x-tar",
+        headers={"Content-Disposition": f'attachment; filename="project-{project_id}.tar"'}
+    )
+
+
+@router.post("/projects/import", status_code=status.HTTP_201_CREATED)
+async def import_project(
+    request: Request,
+    owner_id: str = Depends(get_current_user_id),
+    bundle_service: ProjectBundleService = Depends(get_project_bundle_service)
+):
+    """
+    Imports a bundle (raw application/x-tar body) as a new project owned by the caller.
+    The body is spooled (to disk past a few MB) and then read as a forward-only tar stream.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=BUNDLE_SPOOL_SIZE) as spool:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > MAX_BUNDLE_SIZE:
+                raise HTTPException(
+                    status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                    detail=f"Bundles are limited to {MAX_BUNDLE_SIZE} bytes."
+                )
+            await run_in_threadpool(spool.write, chunk)
+        spool.seek(0)
+
+        try:
+            project_id, source_project_id = await run_in_threadpool(bundle_service.import_bundle, owner_id, spool)
+        except BundleError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid bundle: {e}")
+
+    return FastJSONResponse(
+        content={"project_id": project_id, "source_project_id": source_project_id},
+        status_code=status.HTTP_201_CREATED,
+        headers={"Location": f"/api/v1/projects/{project_id}"}
+    )
+
+
+@router.get("/projects/{project_id}/messages", response_model=MessagePage)
+async def list_project_messages(
+    project_id: str = Depends(require_project_owner),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page."),
+    since: Optional[datetime] = Query(None, description="Only messages created at or after this time."),
+    until: Optional[datetime] = Query(None, description="Only messages created before this time."),
+    role: Optional[str] = Query(None),
+    format: Optional[Literal["json", "ndjson"]] = Query(None, description="'ndjson' streams the full (filtered) history."),
+    accept: Optional[str] = Header(None),
+    project_service: ProjectService = Depends(get_project_service)
+):
+    """
+    The project's conversation history, oldest first, one page at a time.
+    With NDJSON the whole filtered history is streamed instead (limit/cursor are ignored).
+    """
+    if _wants_ndjson(format, accept):
+        return StreamingResponse(
+            project_service.export_messages_ndjson(project_id, since=since, until=until, role=role),
+            media_type="application/x-ndjson"
+        )
+
+    try:
+        page = await project_service.list_messages(
+            project_id, limit, cursor, since=since, until=until, role=role
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return page
+
+
+@router.get("/projects/{project_id}/audit", response_model=AuditLogPage)
+async def list_project_audit_entries(
+    project_id: str = Depends(require_project_owner),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page."),
+    since: Optional[datetime] = Query(None, description="Only entries at or after this time."),
+    until: Optional[datetime] = Query(None, description="Only entries before this time."),
+    agent: Optional[str] = Query(None),
+    action: Optional[str] = Query(None),
+    format: Optional[Literal["json", "ndjson"]] = Query(None, description="'ndjson' streams the full (filtered) audit trail."),
+    accept: Optional[str] = Header(None),
+    project_service: ProjectService = Depends(get_project_service)
+):
+    """
+    The project's audit log, oldest first, one page at a time.
+    With NDJSON the whole filtered audit trail is streamed instead (limit/cursor are ignored).
+    """
+    filters = {"since": since, "until": until, "agent": agent, "action": action}
+    if _wants_ndjson(format, accept):
+        return StreamingResponse(
+            project_service.export_audit_entries_ndjson(project_id, **filters),
+            media_type="application/x-ndjson"
+        )
+
+    try:
+        page = await project_service.list_audit_entries(project_id, limit, cursor, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return page
+
+
+@router.get("/projects/{project_id}/events")
+async def stream_project_events(
+    project_id: str = Depends(require_project_owner),
+    last_event_id: Optional[str] = Header(None, description="Resume after this event id (sent automatically by EventSource)."),
+    broker: ProjectEventBroker = Depends(get_project_event_broker)
+):
+    """
+    Server-Sent Events stream of the project's state changes (phase transitions, new messages,
+    task updates and audit entries) as the worker emits them. Replaces polling GET /projects/{id}.
+    A "reset" event means events since Last-Event-ID are no longer available: refetch the state.
+    """
+    if last_event_id is not None and not is_valid_event_id(last_event_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Last-Event-ID must be a stream event id ('<ms>-<seq>')"
+        )
+    return StreamingResponse(
+        broker.sse_stream(project_id, last_event_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Disable proxy buffering (nginx) so events are delivered immediately
+            "X-Accel-Buffering": "no",
+        }
+    )
@@ -0,0 +1,37 @@
+# app/api/v1/endpoints/search.py
+
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.core.auth import get_current_user_id
+from app.dependencies import get_search_service
+from app.db.search_schema import SEARCH_SOURCES
+from app.schemas.search import SearchResponse
+from app.services.search_service import SearchService
+
+router = APIRouter()
+
+
+@router.get("/search", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=256, description="Free-text query."),
+    types: Optional[str] = Query(
+        None,
+        description="Comma-separated sources to search: project, message, task (default: all)."
+    ),
+    limit: int = Query(20, ge=1, le=100),
+    owner_id: str = Depends(get_current_user_id),
+    search_service: SearchService = Depends(get_search_service)
+):
+    """
+    Full-text search over research goals, messages and task results of the caller's
+    projects, best matches first, with highlighted snippets.
+    """
+    sources: List[str] = [t.strip() for t in types.split(",") if t.strip()] if types else list(SEARCH_SOURCES)
+    unknown = set(sources) - set(SEARCH_SOURCES)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown search types: {', '.join(sorted(unknown))}"
+        )
+    return await search_service.search(owner_id, q, limit, sources)
@@ -0,0 +1,126 @@
+# app/api/v1/endpoints/uploads.py
+
+# Resumable chunked uploads. Large context documents are sent here in pieces and then
+# referenced by ID (upload_ids) when the project is created, so POST /projects stays a
+# fast, metadata-only request.
+
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Header, Request, Response, status
+
+from app.core.auth import get_current_user_id
+from app.dependencies import get_upload_service
+from app.schemas.upload import UploadCreateRequest, UploadFinalizeRequest, UploadStatus
+from app.services.upload_service import (
+    UploadService, UploadNotFound, UploadOffsetMismatch, UploadTooLarge,
+    UploadIncomplete, UploadChecksumMismatch
+)
+from app.utils.serialization import FastJSONResponse
+
+router = APIRouter()
+
+
+def _upload_http_error(error: Exception) -> HTTPException:
+    """Maps upload protocol errors onto HTTP statuses (offset errors carry the right offset)."""
+    if isinstance(error, UploadNotFound):
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+    if isinstance(error, UploadOffsetMismatch):
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(error),
+            headers={"Upload-Offset": str(error.expected)}
+        )
+    if isinstance(error, UploadTooLarge):
+        return HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail=str(error))
+    if isinstance(error, UploadChecksumMismatch):
+        return HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail="SHA-256 mismatch")
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(error))
+
+
+@router.post("/uploads", status_code=status.HTTP_201_CREATED, response_model=UploadStatus)
+async def create_upload(
+    body: UploadCreateRequest,
+    owner_id: str = Depends(get_current_user_id),
+    uploads: UploadService = Depends(get_upload_service)
+):
+    """Opens a resumable upload. Send the bytes with PATCH, then POST .../finalize."""
+    try:
+        session = await uploads.create(owner_id, body.filename, body.content_type, body.size)
+    except UploadTooLarge as e:
+        raise _upload_http_error(e)
+    return FastJSONResponse(
+        content=UploadStatus.model_validate(session),
+        status_code=status.HTTP_201_CREATED,
+        headers={"Location": f"/api/v1/uploads/{session.upload_id}", "Upload-Offset": "0"}
+    )
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadStatus)
+async def get_upload(
+    upload_id: str,
+    owner_id: str = Depends(get_current_user_id),
+    uploads: UploadService = Depends(get_upload_service)
+):
+    """Current state of an upload; `offset` (also in Upload-Offset) is where to resume."""
+    try:
+        session = await uploads.get(owner_id, upload_id)
+    except UploadNotFound as e:
+        raise _upload_http_error(e)
+    return FastJSONResponse(
+        content=UploadStatus.model_validate(session),
+        headers={"Upload-Offset": str(session.received_bytes), "Cache-Control": "no-store"}
+    )
+
+
+@router.head("/uploads/{upload_id}")
+async def head_upload(
+    upload_id: str,
+    owner_id: str = Depends(get_current_user_id),
+    uploads: UploadService = Depends(get_upload_service)
+):
+    """Resume probe: only the Upload-Offset / Upload-Length headers."""
+    try:
+        session = await uploads.get(owner_id, upload_id)
+    except UploadNotFound as e:
+        raise _upload_http_error(e)
+    return Response(
+        status_code=status.HTTP_204_NO_CONTENT,
+        headers={
+            "Upload-Offset": str(session.received_bytes),
+            "Upload-Length": str(session.total_size),
+            "Cache-Control": "no-store",
+        }
+    )
+
+
+@router.patch("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def append_upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    owner_id: str = Depends(get_current_user_id),
+    uploads: UploadService = Depends(get_upload_service)
+):
+    """
+    Appends the raw request body at Upload-Offset. The body is streamed to storage, never
+    held in memory. 409 (with the expected Upload-Offset) if the offset is stale.
+    """
+    try:
+        offset = await uploads.append(owner_id, upload_id, upload_offset, request.stream())
+    except (UploadNotFound, UploadOffsetMismatch, UploadTooLarge, UploadIncomplete) as e:
+        raise _upload_http_error(e)
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers={"Upload-Offset": str(offset)})
+
+
+@router.post("/uploads/{upload_id}/finalize", response_model=UploadStatus)
+async def finalize_upload(
+    upload_id: str,
+    body: Optional[UploadFinalizeRequest] = None,
+    owner_id: str = Depends(get_current_user_id),
+    uploads: UploadService = Depends(get_upload_service)
+):
+    """Verifies the SHA-256 of the complete upload; afterwards it can be passed as an upload_id."""
+    try:
+        session = await uploads.finalize(owner_id, upload_id, body.sha256 if body else None)
+    except (UploadNotFound, UploadIncomplete, UploadChecksumMismatch) as e:
+        raise _upload_http_error(e)
+    return FastJSONResponse(content=UploadStatus.model_validate(session))
@@ -1,60 +1,260 @@
-##
-#  THIS HAS MOCK DATA WE NEED TO REMOVE immediately
-##
-from fastapi import Depends, HTTPException, status, Header
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import Dict, List, Optional
-
-# This is the security scheme. It tells FastAPI to look
-# for the "Authorization: Bearer <token>" header.
-security = HTTPBearer()
-
-
-def get_user_test_metadata(user_id: str) -> Optional[Dict[str, Any]]:
-    """Returns test metadata for the TDD user ID."""
-    if user_id == "test-user-f81d4":
-        return {
-            "user_id": "test-user-f81d4",
-            "profession": "Senior Virologist", # Your mock data
-            "institution": "FANG Research Labs", # Your mock data
-        }
-    return None
+# app/core/auth.py
+
+# Bearer-token authentication: the ONE place that turns an Authorization header into a user ID.
+#
+# - HS256 tokens are verified with JWT_SECRET; RS256 tokens with the key from a JWKS that is
+#   loaded from JWT_JWKS_PATH or JWT_JWKS_URL, kept in memory and refreshed every
+#   JWKS_REFRESH_SECONDS (or early, when a token names an unknown `kid`).
+# - Verified tokens are remembered in a small LRU keyed by the token's SHA-256, until their
+#   `exp`, so hot clients skip the signature check entirely.
+# - AUTH_ALLOW_TEST_TOKEN=true additionally accepts the TDD token "TEST_AUTH_TOKEN"
+#   (local development and tests only).
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status, Header
+from fastapi.concurrency import run_in_threadpool
+from jose import jwk, jwt, JWTError
+from jose.backends.base import Key
+
+logger = logging.getLogger(__name__)
+
+TEST_AUTH_TOKEN = "TEST_AUTH_TOKEN"
+TEST_USER_ID = "test-user-f81d4"
+
+
+class InvalidToken(Exception):
+    """The bearer token could not be verified."""
+
+
+class VerifiedTokenCache:
+    """LRU of token hash -> (user_id, exp). Entries are never served past their `exp`."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[str]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user_id, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return user_id
+
+    def put(self, token: str, user_id: str, expires_at: float) -> None:
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (user_id, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class JWKSKeyStore:
+    """In-memory JWKS (kid -> constructed key), refreshed periodically."""
+
+    def __init__(
+        self,
+        jwks_path: Optional[str] = None,
+        jwks_url: Optional[str] = None,
+        refresh_seconds: float = 3600,
+        min_refresh_interval_seconds: float = 30,
+    ):
+        self.jwks_path = jwks_path
+        self.jwks_url = jwks_url
+        self.refresh_seconds = refresh_seconds
+        self.min_refresh_interval_seconds = min_refresh_interval_seconds
+        self._keys: Dict[str, Key] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.jwks_path or self.jwks_url)
+
+    @property
+    def stale(self) -> bool:
+        return time.monotonic() - self._loaded_at > self.refresh_seconds
+
+    def _fetch(self) -> dict:
+        if self.jwks_path:
+            with open(self.jwks_path) as f:
+                return json.load(f)
+        with urllib.request.urlopen(self.jwks_url, timeout=5) as response:
+            return json.load(response)
+
+    def refresh(self, force: bool = False) -> None:
+        """Reloads the key set (blocking I/O: call from the threadpool)."""
+        with self._lock:
+            age = time.monotonic() - self._loaded_at
+            if not force and age <= self.refresh_seconds:
+                return
+            if force and age < self.min_refresh_interval_seconds:
+                return  # don't let tokens with bogus kids hammer the JWKS endpoint
+            try:
+                keys = {}
+                for key_data in self._fetch().get("keys", []):
+                    if key_data.get("use", "sig") != "sig" or "kid" not in key_data:
+                        continue
+                    keys[key_data["kid"]] = jwk.construct(key_data, key_data.get("alg", "RS256"))
+                self._keys = keys
+                logger.info(f"JWKS loaded with {len(keys)} signing keys")
+            except Exception as e:
+                # Keep serving the previous keys; try again after the minimum interval
+                logger.error(f"Failed to refresh JWKS: {e}")
+            self._loaded_at = time.monotonic()
+
+    def get(self, kid: Optional[str]) -> Optional[Key]:
+        return self._keys.get(kid) if kid else None
+
+
+class TokenVerifier:
+    """Verifies bearer JWTs and returns the user ID (`sub`)."""
+
+    def __init__(
+        self,
+        algorithms: List[str],
+        secret: Optional[str] = None,
+        key_store: Optional[JWKSKeyStore] = None,
+        audience: Optional[str] = None,
+        issuer: Optional[str] = None,
+        allow_test_token: bool = False,
+        cache: Optional[VerifiedTokenCache] = None,
+    ):
+        self.algorithms = algorithms
+        self.hmac_key = jwk.construct(secret, "HS256") if secret else None
+        self.key_store = key_store
+        self.audience = audience
+        self.issuer = issuer
+        self.allow_test_token = allow_test_token
+        self.cache = cache or VerifiedTokenCache()
+
+    def _signing_key(self, header: dict) -> Key:
+        alg = header.get("alg")
+        if alg not in self.algorithms:
+            raise InvalidToken(f"Algorithm {alg} not allowed")
+        if alg == "HS256":
+            if self.hmac_key is None:
+                raise InvalidToken("HS256 is not configured")
+            return self.hmac_key
+        if self.key_store is None:
+            raise InvalidToken("No JWKS configured")
+        key = self.key_store.get(header.get("kid"))
+        if key is None:
+            raise InvalidToken("Unknown signing key")
+        return key
+
+    def verify(self, token: str) -> str:
+        """
+        Returns the token's subject. CPU only (no I/O): safe to call on the event loop.
+
+        Raises:
+            InvalidToken: Bad signature, expired, wrong audience/issuer, no `sub`, ...
+        """
+        user_id = self.cache.get(token)
+        if user_id is not None:
+            return user_id
+
+        if self.allow_test_token and token == TEST_AUTH_TOKEN:
+            return TEST_USER_ID
+
+        try:
+            header = jwt.get_unverified_header(token)
+            claims = jwt.decode(
+                token,
+                self._signing_key(header),
+                algorithms=[header["alg"]],
+                audience=self.audience,
+                issuer=self.issuer,
+                options={"verify_aud": self.audience is not None, "require_exp": True},
+            )
+        except JWTError as e:
+            raise InvalidToken(str(e)) from e
+
+        user_id = claims.get("sub")
+        if not user_id:
+            raise InvalidToken("Token has no subject")
+
+        self.cache.put(token, user_id, float(claims["exp"]))
+        return user_id
+
+    async def verify_async(self, token: str) -> str:
+        """verify(), refreshing the JWKS in the threadpool first when it is stale or lacks the token's kid."""
+        if self.key_store is not None and self.key_store.configured and self.cache.get(token) is None:
+            if self.key_store.stale:
+                await run_in_threadpool(self.key_store.refresh)
+            try:
+                kid = jwt.get_unverified_header(token).get("kid")
+            except JWTError:
+                kid = None
+            if kid and self.key_store.get(kid) is None:
+                await run_in_threadpool(self.key_store.refresh, True)
+        return self.verify(token)
+
+
+@lru_cache(maxsize=1)
+def get_token_verifier() -> TokenVerifier:
+    """Process-wide verifier configured from the environment."""
+    jwks_path = os.getenv("JWT_JWKS_PATH")
+    jwks_url = os.getenv("JWT_JWKS_URL")
+    return TokenVerifier(
+        algorithms=[a.strip() for a in os.getenv("JWT_ALGORITHMS", "HS256,RS256").split(",") if a.strip()],
+        secret=os.getenv("JWT_SECRET"),
+        key_store=JWKSKeyStore(
+            jwks_path=jwks_path,
+            jwks_url=jwks_url,
+            refresh_seconds=float(os.getenv("JWKS_REFRESH_SECONDS", "3600")),
+        ) if (jwks_path or jwks_url) else None,
+        audience=os.getenv("JWT_AUDIENCE"),
+        issuer=os.getenv("JWT_ISSUER"),
+        allow_test_token=os.getenv("AUTH_ALLOW_TEST_TOKEN", "false").lower() == "true",
+        cache=VerifiedTokenCache(max_entries=int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))),
+    )
+
+
+def _unauthorized() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid authentication credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
 
 async def get_current_user_id(
-    authorization: Optional[str] = Header(None) 
+    authorization: Optional[str] = Header(None)
 ) -> str:
     """
-    This is a TDD-safe auth stub.
-    It demands a token and checks if it's our one "magic" test token.
-    If not, it correctly raises a 401.
+    FastAPI dependency: extracts and verifies the Bearer token, returning the user ID.
+    Raises 401 for a missing, malformed or invalid token.
     """
-    
-    # Case 1: Authorization Header is MISSING
-    if authorization is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, 
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-        
-    # Extract the token (must start with 'Bearer ')
-    scheme, _, token = authorization.partition(" ")
-    
-    # Case 2: Authorization Header is MALFORMED (e.g., missing 'Bearer' prefix)
+    # Case 1/2: Authorization Header is MISSING or MALFORMED (e.g., missing 'Bearer' prefix)
+    scheme, _, token = (authorization or "").partition(" ")
     if scheme.lower() != "bearer" or not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-    # Case 3: Authorization Header is VALIDLY FORMATTED BUT INVALID TOKEN
-    if token == "TEST_AUTH_TOKEN":
-        return "test-user-f81d4"
-
-    # If the token is anything else, it's unauthorized.
-    raise HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Invalid authentication credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
\ No newline at end of file
+        raise _unauthorized()
+
+    # Case 3: Authorization Header is VALIDLY FORMATTED; the token itself must verify
+    try:
+        return await get_token_verifier().verify_async(token.strip())
+    except InvalidToken as e:
+        logger.info(f"Rejected bearer token: {e}")
+        raise _unauthorized()
@@ -0,0 +1,26 @@
+# app/core/redis_client.py
+
+# Shared Redis connections. redis-py connection pools are thread-safe and connect lazily,
+# so one client per process (sync for the worker/threadpool, async for the event loop) is enough.
+import os
+from functools import lru_cache
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+
+def get_redis_url() -> str:
+    """Returns the Redis URL from the environment (defaults to localhost)."""
+    return os.getenv("REDIS_URL", "redis://localhost:6379")
+
+
+@lru_cache(maxsize=1)
+def get_redis() -> Redis:
+    """Process-wide synchronous Redis client (used by the worker and threadpool code)."""
+    return Redis.from_url(get_redis_url())
+
+
+@lru_cache(maxsize=1)
+def get_async_redis() -> AsyncRedis:
+    """Process-wide asyncio Redis client (used by API coroutines)."""
+    return AsyncRedis.from_url(get_redis_url())
@@ -0,0 +1,190 @@
+# app/db/audit_archive.py
+
+# File format and storage of the audit log's cold tier.
+#
+# An archive segment holds up to AUDIT_ARCHIVE_SEGMENT_ENTRIES audit entries of ONE project,
+# in (timestamp, entry_id) order, as NDJSON compressed with zstd (gzip when the optional
+# zstandard package is missing). Segments are written once and never modified; the
+# audit_archive_segments table indexes them (see AuditArchiveRepository).
+#
+# AUDIT_ARCHIVE_LOCATION is where segments live, under one prefix per project:
+#   s3://bucket/prefix      object storage, shared by every API pod and worker (production)
+#   storage/audit_archive   a local directory (development, single host)
+# Segments are removed with their project: the retention run deletes the prefixes of
+# projects that no longer exist (see AuditRetentionService.purge_deleted_projects).
+
+import gzip
+import io
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional, Tuple
+
+import orjson
+
+from app.utils.compression import zstandard
+
+try:
+    import boto3
+except ImportError:  # pragma: no cover - only needed for object-store locations
+    boto3 = None
+
+AUDIT_ARCHIVE_LOCATION = os.getenv("AUDIT_ARCHIVE_LOCATION", "storage/audit_archive")
+
+_SUFFIXES = {"zstd": ".ndjson.zst", "gzip": ".ndjson.gz"}
+# Segments up to this size are compressed in memory before the upload; larger ones spill to disk
+_UPLOAD_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+def default_codec() -> str:
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def as_utc(value: datetime) -> datetime:
+    """Comparable timestamps: SQLite hands back naive datetimes (stored as UTC)."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def audit_sort_key(row: Dict[str, Any]) -> Tuple[datetime, str]:
+    """The audit log's chronological keyset order."""
+    return as_utc(row["timestamp"]), row["entry_id"]
+
+
+def _split_s3_path(path: str) -> Tuple[str, str]:
+    bucket, _, key = path.removeprefix("s3://").partition("/")
+    return bucket, key
+
+
+class AuditArchiveStore:
+    """Writes, reads and deletes archive segments under `location` (see AUDIT_ARCHIVE_LOCATION)."""
+
+    def __init__(self, location: str = AUDIT_ARCHIVE_LOCATION, codec: Optional[str] = None, s3_client: Any = None):
+        self.location = location.rstrip("/")
+        self.codec = codec or default_codec()
+        if self.codec not in _SUFFIXES:
+            raise ValueError(f"Unsupported archive codec: {self.codec}")
+        self._s3_client = s3_client
+
+    @property
+    def is_object_store(self) -> bool:
+        return self.location.startswith("s3://")
+
+    @property
+    def s3(self):
+        if self._s3_client is None:
+            if boto3 is None:
+                raise RuntimeError("boto3 is required for s3:// audit archive locations")
+            self._s3_client = boto3.client("s3")
+        return self._s3_client
+
+    def write_segment(self, project_id: str, segment_id: str, rows: Iterable[Dict[str, Any]]) -> Tuple[str, int]:
+        """
+        Writes one segment (atomically: an object upload, or temp file + rename locally) and
+        returns (storage path, size in bytes). Rows are audit entry dicts: entry_id,
+        timestamp, agent, action, current_phase, details.
+        """
+        path = f"{self.location}/{project_id}/{segment_id}{_SUFFIXES[self.codec]}"
+        if self.is_object_store:
+            with tempfile.SpooledTemporaryFile(max_size=_UPLOAD_SPOOL_SIZE) as spool:
+                self._compress(rows, spool)
+                size = spool.tell()
+                spool.seek(0)
+                bucket, key = _split_s3_path(path)
+                self.s3.upload_fileobj(spool, bucket, key)
+            return path, size
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as raw:
+            self._compress(rows, raw)
+        os.replace(temp_path, path)
+        return path, os.path.getsize(path)
+
+    def _compress(self, rows: Iterable[Dict[str, Any]], raw: BinaryIO) -> None:
+        if self.codec == "zstd":
+            out = zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=False)
+        else:
+            out = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=9)
+        with out:
+            for row in rows:
+                out.write(orjson.dumps(row) + b"\n")
+
+    @contextmanager
+    def _open(self, storage_path: str) -> Iterator[BinaryIO]:
+        if not storage_path.startswith("s3://"):
+            with open(storage_path, "rb") as f:
+                yield f
+            return
+        bucket, key = _split_s3_path(storage_path)
+        body = self.s3.get_object(Bucket=bucket, Key=key)["Body"]
+        try:
+            yield body
+        finally:
+            body.close()
+
+    def read_segment(self, storage_path: str, codec: str) -> Iterator[Dict[str, Any]]:
+        """Streams a segment's rows back (timestamps as datetimes), decompressing as it goes."""
+        with self._open(storage_path) as raw:
+            if codec == "zstd":
+                if zstandard is None:
+                    raise RuntimeError("zstandard is required to read zstd audit archives")
+                stream = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw))
+            else:
+                stream = gzip.GzipFile(fileobj=raw, mode="rb")
+            with stream:
+                for line in stream:
+                    row = orjson.loads(line)
+                    row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+                    yield row
+
+    def delete_segment(self, storage_path: str) -> None:
+        if storage_path.startswith("s3://"):
+            bucket, key = _split_s3_path(storage_path)
+            self.s3.delete_object(Bucket=bucket, Key=key)
+        else:
+            Path(storage_path).unlink(missing_ok=True)
+
+    # --- Per-project prefixes ---
+
+    def _list_objects(self, prefix: str, **params: Any) -> Iterator[Dict[str, Any]]:
+        """Pages of list_objects_v2 under `prefix` (relative to the location)."""
+        bucket, root = _split_s3_path(self.location)
+        params.update(Bucket=bucket, Prefix=f"{root}/{prefix}" if root else prefix)
+        while True:
+            page = self.s3.list_objects_v2(**params)
+            yield page
+            if not page.get("IsTruncated"):
+                return
+            params["ContinuationToken"] = page["NextContinuationToken"]
+
+    def project_ids(self) -> Iterator[str]:
+        """Projects that have segments in the store."""
+        if not self.is_object_store:
+            root = Path(self.location)
+            if root.is_dir():
+                yield from (child.name for child in root.iterdir() if child.is_dir())
+            return
+        for page in self._list_objects("", Delimiter="/"):
+            for common in page.get("CommonPrefixes", []):
+                yield common["Prefix"].rstrip("/").rsplit("/", 1)[-1]
+
+    def delete_project(self, project_id: str) -> None:
+        """Removes every segment of a project."""
+        if not self.is_object_store:
+            shutil.rmtree(Path(self.location) / project_id, ignore_errors=True)
+            return
+        bucket, _ = _split_s3_path(self.location)
+        for page in self._list_objects(f"{project_id}/"):
+            keys = [{"Key": obj["Key"]} for obj in page.get("Contents", [])]
+            if keys:
+                self.s3.delete_objects(Bucket=bucket, Delete={"Objects": keys, "Quiet": True})
+
+
+@lru_cache(maxsize=1)
+def get_audit_archive_store() -> AuditArchiveStore:
+    """Process-wide store at AUDIT_ARCHIVE_LOCATION."""
+    return AuditArchiveStore()
@@ -0,0 +1,187 @@
+# app/db/audit_archive_repository.py
+
+import heapq
+from itertools import islice
+from datetime import datetime
+from sqlalchemy import delete, func, insert, or_, select, tuple_
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from app.db.audit_archive import AuditArchiveStore, as_utc, audit_sort_key
+from app.db.models import AuditArchiveSegment, AuditLogEntry, Project, generate_uuid
+
+# A project whose plan has finished executing (see TaskExecutorAgent)
+FINISHED_AGENT = "done"
+
+AUDIT_COLUMNS = (
+    AuditLogEntry.entry_id, AuditLogEntry.timestamp, AuditLogEntry.agent,
+    AuditLogEntry.action, AuditLogEntry.current_phase, AuditLogEntry.details,
+)
+
+
+def merge_audit_rows(*streams: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Merges audit row streams that are each in keyset order. An entry read from both tiers
+    (archived while the read was in progress) comes out once.
+    """
+    last_entry_id = None
+    for row in heapq.merge(*streams, key=audit_sort_key):
+        if row["entry_id"] != last_entry_id:
+            last_entry_id = row["entry_id"]
+            yield row
+
+
+class AuditArchiveRepository:
+    """Database access for the audit log's cold tier (archive segments and their index)."""
+
+    def __init__(self, db_session: Session, store: AuditArchiveStore):
+        """Injects the scoped DB session and the segment file store."""
+        self.db = db_session
+        self.store = store
+
+    # --- Reads ---
+
+    def archived_count(self, project_id: str):
+        """Scalar subquery: entries of the project in the archive."""
+        return (
+            select(func.coalesce(func.sum(AuditArchiveSegment.entry_count), 0))
+            .where(AuditArchiveSegment.project_id == project_id)
+            .scalar_subquery()
+        )
+
+    def list_segments(
+        self,
+        project_id: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> List[AuditArchiveSegment]:
+        """The project's segments that can hold entries in the range, oldest first."""
+        query = select(AuditArchiveSegment).where(AuditArchiveSegment.project_id == project_id)
+        if since is not None:
+            query = query.where(AuditArchiveSegment.last_timestamp >= since)
+        if until is not None:
+            query = query.where(AuditArchiveSegment.first_timestamp < until)
+        if after is not None:
+            query = query.where(
+                tuple_(AuditArchiveSegment.last_timestamp, AuditArchiveSegment.last_entry_id) > tuple_(*after)
+            )
+        query = query.order_by(AuditArchiveSegment.first_timestamp, AuditArchiveSegment.first_entry_id)
+        return list(self.db.execute(query).scalars())
+
+    def iter_entries(
+        self,
+        project_id: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        agent: Optional[str] = None,
+        action: Optional[str] = None,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Archived entries matching the same filters as the hot-table history queries, in
+        keyset order. Segments outside the range are never opened; the others are streamed.
+        """
+        segments = self.list_segments(project_id, since, until, after)
+        if not segments:
+            return iter(())
+
+        since_utc = as_utc(since) if since is not None else None
+        until_utc = as_utc(until) if until is not None else None
+        after_key = (as_utc(after[0]), after[1]) if after is not None else None
+
+        def matching(segment: AuditArchiveSegment) -> Iterator[Dict[str, Any]]:
+            for row in self.store.read_segment(segment.storage_path, segment.codec):
+                timestamp = as_utc(row["timestamp"])
+                if since_utc is not None and timestamp < since_utc:
+                    continue
+                if until_utc is not None and timestamp >= until_utc:
+                    break
+                if agent is not None and row["agent"] != agent:
+                    continue
+                if action is not None and row["action"] != action:
+                    continue
+                if after_key is not None and (timestamp, row["entry_id"]) <= after_key:
+                    continue
+                yield row
+
+        return merge_audit_rows(*(matching(segment) for segment in segments))
+
+    # --- Retention ---
+
+    def delete_orphaned_archives(self, batch_size: int = 500) -> int:
+        """
+        Deletes the segments (objects and index rows) of projects that no longer exist, and
+        returns how many projects were cleaned up. Index rows normally go with the project
+        (ON DELETE CASCADE); the objects never do.
+        """
+        deleted = 0
+        project_ids = iter(self.store.project_ids())
+        while batch := list(islice(project_ids, batch_size)):
+            existing = set(self.db.execute(select(Project.project_id).where(Project.project_id.in_(batch))).scalars())
+            gone = [project_id for project_id in batch if project_id not in existing]
+            if not gone:
+                continue
+            self.db.execute(delete(AuditArchiveSegment).where(AuditArchiveSegment.project_id.in_(gone)))
+            self.db.commit()
+            for project_id in gone:
+                self.store.delete_project(project_id)
+            deleted += len(gone)
+        return deleted
+
+    def find_archivable_projects(self, cutoff: datetime, limit: int = 100) -> List[Tuple[str, bool]]:
+        """
+        (project_id, finished) of projects with hot entries to archive: entries older than
+        `cutoff`, or any entry of a finished project.
+        """
+        finished = Project.next_agent == FINISHED_AGENT
+        query = (
+            select(AuditLogEntry.project_id, finished)
+            .join(Project, Project.project_id == AuditLogEntry.project_id)
+            .where(or_(AuditLogEntry.timestamp < cutoff, finished))
+            .distinct()
+            .limit(limit)
+        )
+        return [(row[0], bool(row[1])) for row in self.db.execute(query)]
+
+    def archivable_entries(self, project_id: str, cutoff: Optional[datetime], limit: int) -> List[Dict[str, Any]]:
+        """The oldest `limit` hot entries of the project (older than `cutoff`, if given)."""
+        query = select(*AUDIT_COLUMNS).where(AuditLogEntry.project_id == project_id)
+        if cutoff is not None:
+            query = query.where(AuditLogEntry.timestamp < cutoff)
+        query = query.order_by(AuditLogEntry.timestamp, AuditLogEntry.entry_id).limit(limit)
+        return [dict(row) for row in self.db.execute(query).mappings()]
+
+    def archive_entries(self, project_id: str, rows: List[Dict[str, Any]], delete_batch_size: int = 1000) -> AuditArchiveSegment:
+        """
+        Moves `rows` (keyset-ordered, from archivable_entries) to a new segment: writes the
+        file, then indexes it and deletes the rows from the hot table in ONE transaction, in
+        DELETE batches of `delete_batch_size`. Entries are therefore always in exactly one
+        tier; if the transaction fails the file is removed again.
+        """
+        segment_id = generate_uuid()
+        storage_path, byte_size = self.store.write_segment(project_id, segment_id, rows)
+        try:
+            segment = {
+                "segment_id": segment_id,
+                "project_id": project_id,
+                "storage_path": storage_path,
+                "codec": self.store.codec,
+                "entry_count": len(rows),
+                "byte_size": byte_size,
+                "first_timestamp": rows[0]["timestamp"],
+                "first_entry_id": rows[0]["entry_id"],
+                "last_timestamp": rows[-1]["timestamp"],
+                "last_entry_id": rows[-1]["entry_id"],
+            }
+            self.db.execute(insert(AuditArchiveSegment), [segment])
+            entry_ids = [row["entry_id"] for row in rows]
+            for start in range(0, len(entry_ids), delete_batch_size):
+                self.db.execute(
+                    delete(AuditLogEntry).where(AuditLogEntry.entry_id.in_(entry_ids[start:start + delete_batch_size]))
+                )
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            self.store.delete_segment(storage_path)
+            raise e
+        return self.db.get(AuditArchiveSegment, segment_id)
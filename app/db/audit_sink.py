@@ -0,0 +1,258 @@
+# app/db/audit_sink.py
+
+# Write-behind buffer for audit log entries.
+#
+# Agents add audit entries far more often than they change anything else, so entries are
+# not inserted one by one: they are buffered per process and written with ONE batched
+# INSERT when the buffer reaches AUDIT_FLUSH_MAX_ENTRIES, when the oldest entry has waited
+# AUDIT_FLUSH_INTERVAL_SECONDS, and always before a state-changing commit
+# (ProjectRepository.save_agent_results), so a saved state_version never refers to audit
+# entries that are not in the database yet.
+#
+# Clean exits never lose entries: the worker flushes at the end of every job (RQ job
+# processes end with os._exit, which skips atexit) and an atexit hook flushes the rest.
+#
+# Audit entries are part of the served state, so every flush bumps the state_version of the
+# projects it wrote to, in the same transaction, and then hands the new versions to
+# `on_flush` (the app moves the state cache's version pointer there): a cached body is never
+# served under a version whose DB rebuild has different audit entries.
+# A row the database rejects outright (IntegrityError: e.g. its project was deleted) would
+# fail every retry, so after one the rows are retried project by project and the groups that
+# still fail are dropped and logged instead of blocking later flushes.
+
+import atexit
+import logging
+import os
+import threading
+import time
+import weakref
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.models import AuditLogEntry, Project, generate_uuid
+from app.schemas.project import AuditEntry
+
+logger = logging.getLogger(__name__)
+
+AUDIT_FLUSH_MAX_ENTRIES = int(os.getenv("AUDIT_FLUSH_MAX_ENTRIES", "500"))
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "1.0"))
+
+def audit_rows(project_id: str, entries: Iterable[AuditEntry]) -> List[Dict[str, Any]]:
+    """audit_log_entries rows for `entries` (IDs assigned here, not by the ORM)."""
+    return [
+        {
+            "entry_id": generate_uuid(),
+            "project_id": project_id,
+            "timestamp": entry.timestamp,
+            "agent": entry.agent,
+            "action": entry.action,
+            "current_phase": entry.current_phase,
+            "details": entry.details,
+        }
+        for entry in entries
+    ]
+
+
+def insert_audit_rows(session: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    One executemany INSERT of all rows; the caller commits. SQLAlchemy sends it as multi-row
+    INSERT ... VALUES pages on PostgreSQL and as one prepared statement on SQLite. (A literal
+    insert().values([...]) is slower: the statement is recompiled for every batch size.)
+    """
+    if rows:
+        session.execute(insert(AuditLogEntry), rows)
+
+
+def bump_state_versions(session: Session, project_ids: Iterable[str]) -> Dict[str, int]:
+    """Increments the projects' state_version (no commit). Returns {project_id: new version}."""
+    project_ids = list(project_ids)
+    if not project_ids:
+        return {}
+    result = session.execute(
+        update(Project)
+        .where(Project.project_id.in_(project_ids))
+        .values(state_version=Project.state_version + 1)
+        .returning(Project.project_id, Project.state_version)
+        .execution_options(synchronize_session=False)
+    )
+    return {project_id: version for project_id, version in result}
+
+
+class AuditSink:
+    """Per-process write-behind buffer of audit log rows."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_entries: int = AUDIT_FLUSH_MAX_ENTRIES,
+        interval_seconds: float = AUDIT_FLUSH_INTERVAL_SECONDS,
+        on_flush: Optional[Callable[[Dict[str, int]], None]] = None,
+    ):
+        self.session_factory = session_factory
+        self.max_entries = max_entries
+        self.interval_seconds = interval_seconds
+        self.on_flush = on_flush
+        self._rows: List[Dict[str, Any]] = []
+        # Entries handed to add() (by identity, while they are alive), see was_added
+        self._added: "weakref.WeakValueDictionary[int, AuditEntry]" = weakref.WeakValueDictionary()
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+        # Serializes flushes: a flush that has taken rows commits before the next one starts,
+        # so a flush before a commit also waits for rows the timer is still writing
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def was_added(self, entry: AuditEntry) -> bool:
+        """Whether this very entry object went through add() (and so is not the caller's to store)."""
+        return self._added.get(id(entry)) is entry
+
+    def add(self, project_id: str, entries: Iterable[AuditEntry]) -> None:
+        """Buffers entries (in order); flushes right away once the buffer is full."""
+        entries = list(entries)
+        rows = audit_rows(project_id, entries)
+        if not rows:
+            return
+        with self._lock:
+            for entry in entries:
+                self._added[id(entry)] = entry
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._rows.extend(rows)
+            full = len(self._rows) >= self.max_entries
+        if full:
+            self.flush()
+        else:
+            self._ensure_timer()
+
+    def flush(self, session: Optional[Session] = None) -> int:
+        """
+        Writes every buffered row in one transaction, bumping the state_version of each
+        project written to, and returns how many rows were written.
+        With `session`, the rows are written and committed on it (call this before starting
+        the transaction that must see them); otherwise a session of its own is used.
+        On failure the rows not yet written go back to the front of the buffer and the error
+        is raised; rows the database rejects with an IntegrityError are dropped (logged).
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows, self._oldest = self._rows, [], None
+            if not rows:
+                return 0
+
+            owned = session is None
+            db = self.session_factory() if owned else session
+            # Per project, the rows not yet committed or dropped
+            pending: Dict[str, List[Dict[str, Any]]] = {}
+            for row in rows:
+                pending.setdefault(row["project_id"], []).append(row)
+            versions: Dict[str, int] = {}
+            written = 0
+            try:
+                try:
+                    versions.update(self._write(db, rows))
+                    written, pending = len(rows), {}
+                except IntegrityError:
+                    db.rollback()
+                    for project_id in list(pending):
+                        group = pending[project_id]
+                        try:
+                            versions.update(self._write(db, group))
+                            written += len(group)
+                        except IntegrityError as e:
+                            db.rollback()
+                            logger.error(
+                                "Dropping audit entries the database rejects",
+                                extra={"project_id": project_id, "num_entries": len(group), "error": str(e)}
+                            )
+                        del pending[project_id]
+            except Exception:
+                db.rollback()
+                with self._lock:
+                    self._rows[:0] = [row for row in rows if row["project_id"] in pending]
+                    self._oldest = time.monotonic()
+                raise
+            finally:
+                if owned:
+                    db.close()
+                self._notify(versions)
+            return written
+
+    @staticmethod
+    def _write(db: Session, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        insert_audit_rows(db, rows)
+        versions = bump_state_versions(db, dict.fromkeys(row["project_id"] for row in rows))
+        db.commit()
+        return versions
+
+    def _notify(self, versions: Dict[str, int]) -> None:
+        # Best effort, like the worker's cache write-through: the DB remains the source of truth
+        if not versions or self.on_flush is None:
+            return
+        try:
+            self.on_flush(versions)
+        except Exception as e:
+            logger.warning(
+                "Failed to report flushed audit entries",
+                extra={"num_projects": len(versions), "error": str(e)}
+            )
+
+    def close(self) -> None:
+        """Stops the timer and writes what is left (clean shutdown)."""
+        self._closed.set()
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(
+                "Failed to flush audit entries on shutdown",
+                extra={"num_entries": len(self._rows), "error": str(e)}
+            )
+
+    def _ensure_timer(self) -> None:
+        # Threads do not survive fork (RQ job processes): start one where entries are added
+        if self._timer is not None and self._timer.is_alive():
+            return
+        with self._lock:
+            if self._timer is None or not self._timer.is_alive():
+                self._timer = threading.Thread(target=self._run_timer, name="audit-sink", daemon=True)
+                self._timer.start()
+
+    def _run_timer(self) -> None:
+        while not self._closed.wait(self.interval_seconds / 2):
+            oldest = self._oldest
+            if oldest is None or time.monotonic() - oldest < self.interval_seconds:
+                continue
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(
+                    "Failed to flush audit entries, will retry",
+                    extra={"num_entries": len(self._rows), "error": str(e)}
+                )
+
+
+def invalidate_cached_states(versions: Dict[str, int]) -> None:
+    """Moves the state cache's version pointers past the versions a flush committed."""
+    from app.core.redis_client import get_redis
+    from app.services.state_cache import invalidate_project_state
+
+    redis_conn = get_redis()
+    for project_id, version in versions.items():
+        invalidate_project_state(redis_conn, project_id, version)
+
+
+@lru_cache(maxsize=1)
+def get_audit_sink() -> AuditSink:
+    """Process-wide sink on the application's database, flushed on interpreter exit."""
+    from app.database import SessionLocal
+
+    sink = AuditSink(SessionLocal, on_flush=invalidate_cached_states)
+    atexit.register(sink.close)
+    return sink
@@ -0,0 +1,62 @@
+# app/db/goal_index_repository.py
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import List, Optional, Sequence, Tuple
+from app.db.models import GoalLSHBucket, GoalSignature, Project, Task
+
+
+class GoalIndexRepository:
+    """Database access for the near-duplicate research goal index (MinHash/LSH)."""
+
+    def __init__(self, db_session: Session):
+        """Injects the scoped DB session."""
+        self.db = db_session
+
+    def add_signature(self, signature: GoalSignature, buckets: Sequence[str]) -> None:
+        """Stores a project's signature and its LSH buckets in one transaction."""
+        try:
+            self.db.add(signature)
+            self.db.add_all(GoalLSHBucket(project_id=signature.project_id, bucket=b) for b in buckets)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            raise e
+
+    def find_candidates(
+        self,
+        buckets: Sequence[str],
+        exclude_project_id: str,
+        owner_id: Optional[str] = None,
+        limit: int = 50,
+    ) -> List[Tuple[GoalSignature, Project]]:
+        """
+        Signatures sharing at least one LSH bucket, restricted to projects that already have
+        a plan (a refined goal) and, if `owner_id` is given, to that owner's projects.
+        """
+        matching = (
+            select(GoalLSHBucket.project_id)
+            .where(GoalLSHBucket.bucket.in_(list(buckets)))
+            .distinct()
+        )
+        query = (
+            self.db.query(GoalSignature, Project)
+            .join(Project, Project.project_id == GoalSignature.project_id)
+            .filter(
+                GoalSignature.project_id.in_(matching),
+                GoalSignature.project_id != exclude_project_id,
+                Project.refined_research_goal.isnot(None),
+            )
+        )
+        if owner_id is not None:
+            query = query.filter(GoalSignature.owner_id == owner_id)
+        return query.order_by(GoalSignature.created_at.desc()).limit(limit).all()
+
+    def get_plan_tasks(self, project_id: str) -> List[Task]:
+        """The project's task plan, in creation order."""
+        return (
+            self.db.query(Task)
+            .filter(Task.project_id == project_id)
+            .order_by(Task.created_at)
+            .all()
+        )
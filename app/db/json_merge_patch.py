@@ -0,0 +1,55 @@
+# app/db/json_merge_patch.py
+
+# Server-side RFC 7396 merge patches on JSON columns (app/utils/merge_patch.py is the
+# reference implementation), so an update sends the patch, not the whole document:
+#
+# SQLite:     JSON1's json_patch() implements RFC 7396 exactly.
+# PostgreSQL: jsonb_merge_patch(target, patch), a PL/pgSQL function over jsonb operators.
+#             The built-in `jsonb || jsonb` is a shallow merge that never deletes keys.
+# Others:     no expression; callers read, patch in Python and write under a row lock.
+#
+# The Alembic migration carries its own frozen copy of the function; this module is what
+# create_all() uses via the after_create hook in models.py.
+
+from typing import Any, Dict, List, Optional
+
+import orjson
+from sqlalchemy import String, cast, func, literal
+from sqlalchemy.dialects.postgresql import JSONB
+
+POSTGRES_MERGE_PATCH_FUNCTION = """
+CREATE OR REPLACE FUNCTION jsonb_merge_patch(target jsonb, patch jsonb) RETURNS jsonb
+LANGUAGE plpgsql IMMUTABLE AS $$
+BEGIN
+    IF patch IS NULL OR jsonb_typeof(patch) <> 'object' THEN
+        RETURN patch;
+    END IF;
+    IF target IS NULL OR jsonb_typeof(target) <> 'object' THEN
+        target := '{}'::jsonb;
+    END IF;
+    RETURN (
+        SELECT coalesce(jsonb_object_agg(merged.key, merged.value), '{}'::jsonb)
+        FROM (
+            SELECT t.key, t.value FROM jsonb_each(target) t WHERE NOT patch ? t.key
+            UNION ALL
+            SELECT p.key, jsonb_merge_patch(target -> p.key, p.value)
+            FROM jsonb_each(patch) p WHERE jsonb_typeof(p.value) <> 'null'
+        ) merged
+    );
+END
+$$
+"""
+
+
+def postgres_merge_patch_ddl() -> List[str]:
+    return [POSTGRES_MERGE_PATCH_FUNCTION]
+
+
+def merge_patch_expression(dialect_name: str, column: Any, patch: Dict[str, Any]) -> Optional[Any]:
+    """SQL expression for `column` with `patch` applied (None: no server-side support)."""
+    encoded = literal(orjson.dumps(patch).decode(), String)
+    if dialect_name == "sqlite":
+        return func.json_patch(func.coalesce(column, literal("{}", String)), encoded)
+    if dialect_name == "postgresql":
+        return func.jsonb_merge_patch(column, cast(encoded, JSONB))
+    return None
@@ -1,10 +1,13 @@
 # app/db/models.py (REFINED)
 
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, BigInteger
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, BigInteger, Index, LargeBinary, event
+from sqlalchemy.orm import deferred, relationship
 # from sqlalchemy.dialects.postgresql import JSON # Use for PostgreSQL/JSONB if possible
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.types import JSON
 from app.database import Base 
+from app.db.search_schema import sqlite_fts_ddl, postgres_fts_ddl
+from app.db.json_merge_patch import postgres_merge_patch_ddl
 from datetime import datetime, timezone
 import uuid
 
@@ -40,6 +43,11 @@ class Project(Base):
     refined_research_goal = Column(String, nullable=True)
     current_phase = Column(String(50), default="intake") # Constrained string length
     next_agent = Column(String(50), nullable=True) # Constrained string length
+    # Bumped on every persisted state change; keys the state cache and the GET ETag
+    state_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Agent notes (VirtualLabState.scratchpad). Updated with server-side merge patches (JSONB
+    # on Postgres); deferred, so only get_project_with_state reads the whole document
+    scratchpad = deferred(Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True))
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
     owner = relationship("User", back_populates="projects")
@@ -50,6 +58,11 @@ class Project(Base):
     audit_entries = relationship("AuditLogEntry", back_populates="project", cascade="all, delete-orphan")
     messages = relationship("Message", back_populates="project", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Keyset pagination of an owner's projects: (created_at, project_id) DESC within owner_id
+        Index("ix_projects_owner_created", "owner_id", "created_at", "project_id"),
+    )
+
 
 # Project File Metadata
 class ProjectFile(Base):
@@ -62,10 +75,29 @@ class ProjectFile(Base):
     storage_path = Column(String(500), nullable=False) # Increased length for S3/GCS paths
     file_type = Column(String(50), nullable=False)
     uploaded_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    # Hex SHA-256 of the stored bytes (integrity checks, strong ETags)
+    content_sha256 = Column(String(64), nullable=True)
 
     project = relationship("Project", back_populates="files")
 
 
+# Resumable upload sessions (POST /uploads -> PATCH chunks -> finalize)
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+    upload_id = Column(String(36), primary_key=True, default=generate_uuid)
+    owner_id = Column(String(36), ForeignKey("users.user_id"), index=True, nullable=False)
+
+    filename = Column(String(255), nullable=False)
+    file_type = Column(String(50), nullable=False)
+    total_size = Column(BigInteger, nullable=False) # Declared up front by the client
+    received_bytes = Column(BigInteger, nullable=False, default=0) # The resume offset
+    storage_path = Column(String(500), nullable=False)
+    status = Column(String(20), nullable=False, default="in_progress") # in_progress | completed | attached
+    content_sha256 = Column(String(64), nullable=True) # Set on finalize
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
 # Stores permanent conversation messages
 class Message(Base):
     __tablename__ = "messages"
@@ -77,6 +109,11 @@ class Message(Base):
     
     project = relationship("Project", back_populates="messages")
 
+    __table_args__ = (
+        # History reads: chronological keyset within a project
+        Index("ix_messages_project_created", "project_id", "created_at", "message_id"),
+    )
+
 # Stores permanent task list items
 class Task(Base):
     __tablename__ = "tasks"
@@ -85,6 +122,7 @@ class Task(Base):
     description = Column(String, nullable=False)
     status = Column(String(50), default="pending") 
     result = Column(String, nullable=True) # Use TEXT if results can be long
+    depends_on = Column(JSON, nullable=True) # task_ids that must complete first (see TaskExecutor)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     
     project = relationship("Project", back_populates="tasks")
@@ -102,4 +140,71 @@ class AuditLogEntry(Base):
     # REFINED: Use JSON/JSONB for dynamic details
     details = Column(JSON, nullable=True) 
     
-    project = relationship("Project", back_populates="audit_entries")
\ No newline at end of file
+    project = relationship("Project", back_populates="audit_entries")
+
+    __table_args__ = (
+        # History reads and time-range filters: chronological keyset within a project
+        Index("ix_audit_log_entries_project_timestamp", "project_id", "timestamp", "entry_id"),
+    )
+
+
+# Cold tier of the audit log: one row per compressed NDJSON segment of archived entries
+# (see app/services/audit_retention.py). The bounds let reads skip segments outside a range.
+class AuditArchiveSegment(Base):
+    __tablename__ = "audit_archive_segments"
+    segment_id = Column(String(36), primary_key=True, default=generate_uuid)
+    project_id = Column(String(36), ForeignKey("projects.project_id", ondelete="CASCADE"), nullable=False)
+    storage_path = Column(String(1024), nullable=False)
+    codec = Column(String(10), nullable=False) # "zstd" | "gzip"
+    entry_count = Column(Integer, nullable=False)
+    byte_size = Column(BigInteger, nullable=False)
+    # Keyset bounds: (timestamp, entry_id) of the first and last entry in the segment
+    first_timestamp = Column(DateTime(timezone=True), nullable=False)
+    first_entry_id = Column(String(36), nullable=False)
+    last_timestamp = Column(DateTime(timezone=True), nullable=False)
+    last_entry_id = Column(String(36), nullable=False)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        Index("ix_audit_archive_segments_project_first", "project_id", "first_timestamp"),
+    )
+
+
+# -----------------------------------------------
+# Near-duplicate research goal index (MinHash/LSH, see app/services/plan_reuse.py)
+class GoalSignature(Base):
+    __tablename__ = "goal_signatures"
+    project_id = Column(String(36), ForeignKey("projects.project_id", ondelete="CASCADE"), primary_key=True)
+    owner_id = Column(String(36), nullable=False, index=True)
+    minhash = Column(LargeBinary, nullable=False) # packed signature (app/utils/minhash.py)
+    document_fingerprints = Column(JSON, nullable=True) # sorted content_sha256 of the attachments
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+# One row per LSH band of a signature; a shared bucket makes two goals candidates
+class GoalLSHBucket(Base):
+    __tablename__ = "goal_lsh_buckets"
+    project_id = Column(String(36), ForeignKey("projects.project_id", ondelete="CASCADE"), primary_key=True)
+    bucket = Column(String(24), primary_key=True) # "<band>:<band hash>"
+
+    __table_args__ = (
+        Index("ix_goal_lsh_buckets_bucket", "bucket"),
+    )
+
+
+# -----------------------------------------------
+# Full-text search (FTS5 tables + triggers / GIN indexes), created alongside the tables
+@event.listens_for(Base.metadata, "after_create")
+def _create_search_schema(target, connection, **kw):
+    dialect = connection.dialect.name
+    statements = sqlite_fts_ddl() if dialect == "sqlite" else postgres_fts_ddl() if dialect == "postgresql" else []
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+# Server-side JSON merge patch (scratchpad updates); SQLite has json_patch() built in
+@event.listens_for(Base.metadata, "after_create")
+def _create_json_functions(target, connection, **kw):
+    if connection.dialect.name == "postgresql":
+        for statement in postgres_merge_patch_ddl():
+            connection.exec_driver_sql(statement)
@@ -1,11 +1,44 @@
 # app/db/project_repository.py
 
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.db.models import Project, ProjectFile, Message, Task, AuditLogEntry  # Added ORM models
+import copy
+import json
+from datetime import datetime
+from itertools import islice
+from sqlalchemy import DateTime, func, insert, select, tuple_, update
+from sqlalchemy.orm import Session, undefer
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from app.db.models import Project, ProjectFile, Message, Task, AuditLogEntry, UploadSession, generate_uuid  # Added ORM models
 from app.agents.base import VirtualLabState  # Added Pydantic domain model
+from app.db.audit_sink import AuditSink, audit_rows, insert_audit_rows
+from app.db.audit_archive import AuditArchiveStore, get_audit_archive_store
+from app.db.audit_archive_repository import AUDIT_COLUMNS, AuditArchiveRepository, merge_audit_rows
+from app.db.json_merge_patch import merge_patch_expression
+from app.db.upload_repository import UploadClaimConflict
+from app.utils.merge_patch import apply_merge_patch
 from app.schemas.project import ConversationMessage, TaskItem, AuditEntry  # Added Pydantic schemas
 
+# Record types of a project bundle (export/import), in dependency order: parents first
+BUNDLE_MODELS = {
+    "project": Project,
+    "file": ProjectFile,
+    "message": Message,
+    "task": Task,
+    "audit": AuditLogEntry,
+}
+
+# Columns a project listing may select (fields= projection). Relationships are never listable.
+PROJECT_LIST_FIELDS = (
+    "project_id",
+    "title",
+    "original_research_goal",
+    "refined_research_goal",
+    "current_phase",
+    "next_agent",
+    "state_version",
+    "created_at",
+)
+
+
 class ProjectRepository:
     """
     Encapsulates all database access logic for the Project and related tables.
@@ -13,13 +46,28 @@ class ProjectRepository:
     database specifics (like SQLAlchemy, ORMs, or SQL).
     """
     
-    def __init__(self, db_session: Session):
+    def __init__(
+        self,
+        db_session: Session,
+        audit_sink: Optional[AuditSink] = None,
+        audit_archive: Optional[AuditArchiveStore] = None
+    ):
         """
-        The DB session is injected into the repository instance.
+        The DB session is injected into the repository instance. With `audit_sink`, entries
+        buffered there are flushed before every state-changing commit. Audit reads merge in
+        the archived entries of `audit_archive` (default: the AUDIT_ARCHIVE_LOCATION store).
         """
         self.db = db_session
+        self.audit_sink = audit_sink
+        self.audit_archive = AuditArchiveRepository(db_session, audit_archive or get_audit_archive_store())
         
-    def create_project_and_files(self, project: Project, files: List[ProjectFile]) -> Project:
+    def create_project_and_files(
+        self,
+        project: Project,
+        files: List[ProjectFile],
+        initial_state: Optional[VirtualLabState] = None,
+        attached_upload_ids: Sequence[str] = ()
+    ) -> Project:
         """
         Persists the new Project and all associated ProjectFile records 
         in a single, atomic transaction.
@@ -27,6 +75,11 @@ class ProjectRepository:
         Args:
             project: The new Project model instance.
             files: A list of new ProjectFile model instances.
+            initial_state: Optional initial state whose messages and audit entries
+                (the user's goal, "Project Initiated") are persisted with the project.
+            attached_upload_ids: Finalized upload sessions whose files are in `files`; they are
+                claimed (completed -> attached) in the same transaction, so an upload can never
+                be attached to two projects.
             
         Returns:
             The committed Project instance.
@@ -38,6 +91,26 @@ class ProjectRepository:
             # 2. Add all file records
             for file in files:
                 self.db.add(file)
+
+            # 2b. Add the initial conversation/audit history
+            if initial_state is not None:
+                self.db.add_all(self._message_records(project.project_id, initial_state.messages))
+                self.db.add_all(self._audit_records(project.project_id, initial_state.audit_log))
+
+            # 2c. Claim the referenced uploads (compare-and-set on status)
+            upload_ids = list(dict.fromkeys(attached_upload_ids))
+            if upload_ids:
+                claimed = self.db.execute(
+                    update(UploadSession)
+                    .where(
+                        UploadSession.upload_id.in_(upload_ids),
+                        UploadSession.owner_id == project.owner_id,
+                        UploadSession.status == "completed",
+                    )
+                    .values(status="attached")
+                ).rowcount
+                if claimed != len(upload_ids):
+                    raise UploadClaimConflict("An upload was attached concurrently or is no longer available")
             
             # 3. Commit the transaction (atomicity guaranteed here)
             self.db.commit()
@@ -53,6 +126,250 @@ class ProjectRepository:
             # Re-raise the exception for the Service Layer to handle (e.g., clean up files)
             raise e
     
+    def create_projects_bulk(
+        self,
+        projects: List[Project],
+        files: List[ProjectFile],
+        initial_states: List[VirtualLabState]
+    ) -> None:
+        """
+        Persists many new projects (batch creation) in ONE transaction.
+        
+        Unlike create_project_and_files, rows are written with executemany-style Core
+        INSERTs (one statement per table, not one ORM flush per object), and nothing is
+        refreshed afterwards: callers already hold every generated key.
+        
+        Args:
+            projects: New Project instances (project_id and created_at set by the caller).
+            files: ProjectFile instances for all projects.
+            initial_states: The initial state of each project, in the same order as `projects`.
+        """
+        def rows(records, model) -> List[Dict[str, Any]]:
+            columns = [c.key for c in model.__table__.columns]
+            return [
+                {name: getattr(record, name) for name in columns if getattr(record, name) is not None}
+                for record in records
+            ]
+
+        messages: List[Message] = []
+        audit_entries: List[AuditLogEntry] = []
+        for project, state in zip(projects, initial_states):
+            messages.extend(self._message_records(project.project_id, state.messages))
+            audit_entries.extend(self._audit_records(project.project_id, state.audit_log))
+
+        try:
+            self.db.execute(insert(Project), rows(projects, Project))
+            for model, records in ((ProjectFile, files), (Message, messages), (AuditLogEntry, audit_entries)):
+                if records:
+                    self.db.execute(insert(model), rows(records, model))
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            raise e
+
+    def get_project_owner_id(self, project_id: str) -> Optional[str]:
+        """
+        Returns the owner of a project (or None if it does not exist).
+        Selects a single column so authorization checks never load the full Project row.
+        """
+        row = self.db.query(Project.owner_id).filter(Project.project_id == project_id).first()
+        return row.owner_id if row else None
+
+    def list_projects(
+        self,
+        owner_id: str,
+        fields: Sequence[str],
+        limit: int,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns one page of an owner's projects, newest first, as plain dicts.
+        
+        Keyset pagination: `after` is the (created_at, project_id) of the previous page's last
+        row, so the query seeks through ix_projects_owner_created instead of using OFFSET.
+        Only the requested columns (plus the sort key) are selected - no ORM entities, so no
+        relationship can be lazy-loaded.
+        
+        Raises:
+            ValueError: If a requested field is not listable.
+        """
+        unknown = set(fields) - set(PROJECT_LIST_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown project fields: {', '.join(sorted(unknown))}")
+
+        selected = dict.fromkeys(["created_at", "project_id", *fields])
+        query = select(*(getattr(Project, name) for name in selected)).where(Project.owner_id == owner_id)
+        if after is not None:
+            query = query.where(tuple_(Project.created_at, Project.project_id) < tuple_(*after))
+        query = query.order_by(Project.created_at.desc(), Project.project_id.desc()).limit(limit)
+
+        return [dict(row) for row in self.db.execute(query).mappings()]
+
+    # --- History reads (chronological keyset pagination) ---
+
+    MESSAGE_COLUMNS = (Message.message_id, Message.role, Message.content, Message.created_at)
+    AUDIT_COLUMNS = AUDIT_COLUMNS
+
+    def _message_query(
+        self,
+        project_id: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        role: Optional[str] = None,
+        after: Optional[Tuple[datetime, str]] = None
+    ):
+        query = select(*self.MESSAGE_COLUMNS).where(Message.project_id == project_id)
+        if since is not None:
+            query = query.where(Message.created_at >= since)
+        if until is not None:
+            query = query.where(Message.created_at < until)
+        if role is not None:
+            query = query.where(Message.role == role)
+        if after is not None:
+            query = query.where(tuple_(Message.created_at, Message.message_id) > tuple_(*after))
+        return query.order_by(Message.created_at, Message.message_id)
+
+    def _audit_query(
+        self,
+        project_id: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        agent: Optional[str] = None,
+        action: Optional[str] = None,
+        after: Optional[Tuple[datetime, str]] = None
+    ):
+        query = select(*self.AUDIT_COLUMNS).where(AuditLogEntry.project_id == project_id)
+        if since is not None:
+            query = query.where(AuditLogEntry.timestamp >= since)
+        if until is not None:
+            query = query.where(AuditLogEntry.timestamp < until)
+        if agent is not None:
+            query = query.where(AuditLogEntry.agent == agent)
+        if action is not None:
+            query = query.where(AuditLogEntry.action == action)
+        if after is not None:
+            query = query.where(tuple_(AuditLogEntry.timestamp, AuditLogEntry.entry_id) > tuple_(*after))
+        return query.order_by(AuditLogEntry.timestamp, AuditLogEntry.entry_id)
+
+    def list_messages(self, project_id: str, limit: int, **filters) -> List[Dict[str, Any]]:
+        """
+        Returns one page of a project's messages, oldest first.
+        Filters: since, until (created_at range), role, after (keyset of the previous page).
+        """
+        query = self._message_query(project_id, **filters).limit(limit)
+        return [dict(row) for row in self.db.execute(query).mappings()]
+
+    def list_audit_entries(self, project_id: str, limit: int, **filters) -> List[Dict[str, Any]]:
+        """
+        Returns one page of a project's audit log, oldest first, archived entries included.
+        Filters: since, until (timestamp range), agent, action, after (keyset of the previous page).
+        """
+        # Hot rows first, then the segment index: an entry archived in between shows up in
+        # both reads (and is merged into one), never in neither
+        query = self._audit_query(project_id, **filters).limit(limit)
+        hot = [dict(row) for row in self.db.execute(query).mappings()]
+        archived = self.audit_archive.iter_entries(project_id, **filters)
+        return list(islice(merge_audit_rows(hot, archived), limit))
+
+    def iter_messages(self, project_id: str, batch_size: int = 500, **filters) -> Iterator[Dict[str, Any]]:
+        """Streams every matching message in batches (bounded memory for full exports)."""
+        query = self._message_query(project_id, **filters).execution_options(yield_per=batch_size)
+        for row in self.db.execute(query).mappings():
+            yield dict(row)
+
+    def iter_audit_entries(self, project_id: str, batch_size: int = 500, **filters) -> Iterator[Dict[str, Any]]:
+        """
+        Streams every matching audit entry, archived ones included, in batches (bounded
+        memory for full exports).
+        """
+        # Hot rows first, then the segment index, as in list_audit_entries
+        query = self._audit_query(project_id, **filters).execution_options(yield_per=batch_size)
+        hot = self.db.execute(query).mappings()
+        archived = self.audit_archive.iter_entries(project_id, **filters)
+        return merge_audit_rows((dict(row) for row in hot), archived)
+
+    # --- Bundles (streaming export / bulk import) ---
+
+    def iter_project_records(self, project_id: str, batch_size: int = 500) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streams every row that belongs to a project as (record type, column dict), parents
+        first (see BUNDLE_MODELS). Rows are fetched in batches, so memory stays flat.
+        """
+        for record_type, model in BUNDLE_MODELS.items():
+            if model is AuditLogEntry:
+                # Both tiers, merged: an entry archived during the export comes out once
+                for row in self.iter_audit_entries(project_id, batch_size):
+                    yield record_type, {**row, "project_id": project_id}
+                continue
+            key = Project.project_id if model is Project else model.project_id
+            query = select(model.__table__).where(key == project_id).execution_options(yield_per=batch_size)
+            for row in self.db.execute(query).mappings():
+                yield record_type, dict(row)
+
+    def import_project_records(
+        self,
+        records: Iterable[Tuple[str, Dict[str, Any]]],
+        batch_size: int = 1000
+    ) -> int:
+        """
+        Bulk-inserts a stream of (record type, column dict) in ONE transaction: rows are
+        buffered per table and written with executemany INSERTs of `batch_size` rows.
+        The "project" record must come first (children reference it).
+        JSON-decoded values are coerced back (ISO strings -> datetime); unknown columns
+        are ignored so bundles from newer versions still import.
+        
+        Returns:
+            The number of rows inserted.
+        
+        Raises:
+            ValueError: On an unknown record type or a child before its project.
+        """
+        pending: Dict[str, List[Dict[str, Any]]] = {record_type: [] for record_type in BUNDLE_MODELS}
+        inserted = 0
+        project_seen = False
+
+        def flush(record_type: str) -> None:
+            nonlocal inserted
+            rows = pending[record_type]
+            if rows:
+                self.db.execute(insert(BUNDLE_MODELS[record_type]), rows)
+                inserted += len(rows)
+                pending[record_type] = []
+
+        try:
+            for record_type, data in records:
+                model = BUNDLE_MODELS.get(record_type)
+                if model is None:
+                    raise ValueError(f"Unknown bundle record type: {record_type}")
+                if record_type != "project" and not project_seen:
+                    raise ValueError("Bundle records must start with the project")
+                pending[record_type].append(self._row_from_json(model, data))
+                if record_type == "project":
+                    project_seen = True
+                    flush(record_type)
+                elif len(pending[record_type]) >= batch_size:
+                    flush(record_type)
+
+            for record_type in BUNDLE_MODELS:
+                flush(record_type)
+            self.db.commit()
+            return inserted
+        except Exception as e:
+            self.db.rollback()
+            raise e
+
+    @staticmethod
+    def _row_from_json(model, data: Dict[str, Any]) -> Dict[str, Any]:
+        row = {}
+        for column in model.__table__.columns:
+            if column.key not in data:
+                continue
+            value = data[column.key]
+            if isinstance(column.type, DateTime) and isinstance(value, str):
+                value = datetime.fromisoformat(value)
+            row[column.key] = value
+        return row
+
     def get_project_state(self, project_id: str) -> VirtualLabState:
         """
         Reconstructs the complete VirtualLabState from database.
@@ -69,8 +386,24 @@ class ProjectRepository:
         Raises:
             ValueError: If project not found
         """
-        # 1. Fetch Project (master record)
-        project = self.db.query(Project).filter(Project.project_id == project_id).first()
+        _, state = self.get_project_with_state(project_id)
+        return state
+
+    def get_project_with_state(self, project_id: str) -> Tuple[Project, VirtualLabState]:
+        """
+        Same as get_project_state, but also returns the master Project record
+        (owner, goals and state_version are needed to serve GET /projects/{id}).
+        
+        Raises:
+            ValueError: If project not found
+        """
+        # 1. Fetch Project (master record, with the scratchpad)
+        project = (
+            self.db.query(Project)
+            .options(undefer(Project.scratchpad))
+            .filter(Project.project_id == project_id)
+            .first()
+        )
         if not project:
             raise ValueError(f"Project {project_id} not found in database")
         
@@ -79,7 +412,7 @@ class ProjectRepository:
             Message.project_id == project_id
         ).order_by(Message.created_at).all()
         messages = [
-            ConversationMessage(role=msg.role, content=msg.content)
+            ConversationMessage.trusted(role=msg.role, content=msg.content)
             for msg in message_records
         ]
         
@@ -88,47 +421,190 @@ class ProjectRepository:
             Task.project_id == project_id
         ).order_by(Task.created_at).all()
         task_list = [
-            TaskItem(
+            TaskItem.trusted(
                 id=task.task_id,
                 description=task.description,
                 status=task.status,
-                result=task.result
+                result=task.result,
+                depends_on=task.depends_on or []
             )
             for task in task_records
         ]
         
-        # 4. Fetch and convert Audit Log (ORM → Pydantic)
-        audit_records = self.db.query(AuditLogEntry).filter(
-            AuditLogEntry.project_id == project_id
-        ).order_by(AuditLogEntry.timestamp).all()
+        # 4. Fetch and convert Audit Log (hot table + archive → Pydantic)
         audit_log = [
-            AuditEntry(
-                timestamp=entry.timestamp.isoformat(),
-                agent=entry.agent,
-                action=entry.action,
-                current_phase=entry.current_phase,
-                details=entry.details or {}
+            AuditEntry.trusted(
+                timestamp=entry["timestamp"],
+                agent=entry["agent"],
+                action=entry["action"],
+                current_phase=entry["current_phase"],
+                details=entry["details"] or {}
             )
-            for entry in audit_records
+            for entry in self.iter_audit_entries(project_id)
         ]
         
-        # 5. Reconstruct VirtualLabState (scratchpad could be stored in Project later)
-        return VirtualLabState(
+        # 5. Reconstruct VirtualLabState.
+        # Everything above was written by us and validated on the way in: skip re-validation.
+        state = VirtualLabState.trusted(
             messages=messages,
             task_list=task_list,
-            scratchpad={},  # TODO: Could load from Project.scratchpad if we store it
+            # A copy: agents edit it in place, the loaded value must stay what is stored
+            scratchpad=copy.deepcopy(project.scratchpad) if isinstance(project.scratchpad, dict) else {},
             next_agent=project.next_agent or "pi_agent",
             audit_log=audit_log,
             current_phase=project.current_phase
         )
+        return project, state
+
+    def save_agent_results(
+        self,
+        project_id: str,
+        state: VirtualLabState,
+        scratchpad_patch: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        Persists the outcome of an agent run in a single transaction (Pydantic → ORM).
+        
+        Messages and audit entries are append-only: only the ones beyond what is already
+        stored are inserted. Audit entries still in the audit sink are flushed first, so they
+        count as stored. Tasks are upserted; tasks created by the agent get a
+        database ID, which is written back into `state.task_list`.
+        
+        The scratchpad is written whole, unless `scratchpad_patch` (an RFC 7396 merge patch
+        of what changed since it was loaded) is given: then only the patch is sent and
+        applied by the database. A merge patch cannot store null (it deletes the key), so
+        None values are dropped from `state.scratchpad` on both paths, in place.
+        
+        Returns:
+            The project's new state_version.
             
-    # FUTURE METHODS (Just for context, not needed for Feature 1 POST)
-    
-    # def get_project_by_id(self, project_id: str) -> Optional[Project]:
-    #     """Fetches a project by its ID."""
-    #     return self.db.query(Project).filter(Project.project_id == project_id).first()
-    
-    # def update_project_state(self, project_id: str, current_phase: str, next_agent: str):
-    #     """Updates the phase and next agent fields."""
-    #     # ... implementation ...
-    #     pass
\ No newline at end of file
+        Raises:
+            ValueError: If project not found
+        """
+        if self.audit_sink is not None:
+            self.audit_sink.flush(self.db)
+
+        try:
+            project = self.db.query(Project).filter(Project.project_id == project_id).first()
+            if not project:
+                raise ValueError(f"Project {project_id} not found in database")
+
+            # 1. Append new messages
+            num_messages = self.db.query(func.count(Message.message_id)).filter(
+                Message.project_id == project_id
+            ).scalar()
+            self.db.add_all(self._message_records(project_id, state.messages[num_messages:]))
+
+            # 2. Upsert tasks
+            task_records = {
+                task.task_id: task
+                for task in self.db.query(Task).filter(Task.project_id == project_id).all()
+            }
+            # Agent-local IDs ("t1") are not globally unique; assign real ones up front so
+            # depends_on references can be rewritten to match
+            new_ids = {item.id: generate_uuid() for item in state.task_list if item.id not in task_records}
+            for item in state.task_list:
+                item.id = new_ids.get(item.id, item.id)
+                item.depends_on = [new_ids.get(dep, dep) for dep in item.depends_on]
+                result = item.result if item.result is None or isinstance(item.result, str) else json.dumps(item.result)
+                record = task_records.get(item.id)
+                if record is None:
+                    self.db.add(Task(
+                        task_id=item.id,
+                        project_id=project_id,
+                        description=item.description,
+                        status=item.status,
+                        result=result,
+                        depends_on=item.depends_on or None
+                    ))
+                else:
+                    record.description = item.description
+                    record.status = item.status
+                    record.result = result
+                    record.depends_on = item.depends_on or None
+
+            # 3. Append new audit entries (one batched INSERT); archived ones count as stored.
+            #    Entries that went through the sink are stored already, wherever they sit in
+            #    the log: the rest are stored in order, so their stored ones are a prefix
+            num_audit_entries = self.db.query(
+                func.count(AuditLogEntry.entry_id) + self.audit_archive.archived_count(project_id)
+            ).filter(
+                AuditLogEntry.project_id == project_id
+            ).scalar()
+            own_entries = state.audit_log
+            if self.audit_sink is not None:
+                own_entries = [entry for entry in state.audit_log if not self.audit_sink.was_added(entry)]
+            num_own_stored = max(0, num_audit_entries - (len(state.audit_log) - len(own_entries)))
+            insert_audit_rows(self.db, audit_rows(project_id, own_entries[num_own_stored:]))
+
+            # 4. Update the master record and bump the version (invalidates cached state).
+            #    The in-memory scratchpad is normalized too: the worker caches this state
+            normalized = apply_merge_patch({}, state.scratchpad)
+            state.scratchpad.clear()
+            state.scratchpad.update(normalized)
+            if scratchpad_patch is None:
+                project.scratchpad = copy.deepcopy(state.scratchpad)
+            else:
+                self._apply_scratchpad_patch(project_id, scratchpad_patch)
+            project.current_phase = state.current_phase
+            project.next_agent = state.next_agent
+            project.refined_research_goal = state.scratchpad.get("refined_research_goal", project.refined_research_goal)
+            project.state_version = (project.state_version or 0) + 1
+
+            self.db.commit()
+            return project.state_version
+
+        except Exception as e:
+            self.db.rollback()
+            raise e
+
+    def _apply_scratchpad_patch(self, project_id: str, patch: Dict[str, Any]) -> None:
+        """UPDATE with the patch applied by the database (no commit). An empty patch is a no-op."""
+        if not patch:
+            return
+        expression = merge_patch_expression(self.db.get_bind().dialect.name, Project.scratchpad, patch)
+        if expression is None:
+            # No server-side merge patch on this database: read-modify-write under a row lock
+            current = self.db.execute(
+                select(Project.scratchpad).where(Project.project_id == project_id).with_for_update()
+            ).scalar()
+            expression = apply_merge_patch(current if isinstance(current, dict) else {}, patch)
+        self.db.execute(
+            update(Project)
+            .where(Project.project_id == project_id)
+            .values(scratchpad=expression)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def _message_records(project_id: str, messages: List[ConversationMessage]) -> List[Message]:
+        return [
+            Message(project_id=project_id, role=msg.role, content=msg.content)
+            for msg in messages
+        ]
+
+    @staticmethod
+    def _audit_records(project_id: str, entries: List[AuditEntry]) -> List[AuditLogEntry]:
+        return [
+            AuditLogEntry(
+                project_id=project_id,
+                timestamp=entry.timestamp,
+                agent=entry.agent,
+                action=entry.action,
+                current_phase=entry.current_phase,
+                details=entry.details
+            )
+            for entry in entries
+        ]
+            
+    def get_project_file(self, project_id: str, file_id: str) -> Optional[ProjectFile]:
+        """Fetches one file record, scoped to its project."""
+        return (
+            self.db.query(ProjectFile)
+            .filter(ProjectFile.file_id == file_id, ProjectFile.project_id == project_id)
+            .first()
+        )
+
+    def get_project_by_id(self, project_id: str) -> Optional[Project]:
+        """Fetches a project by its ID."""
+        return self.db.query(Project).filter(Project.project_id == project_id).first()
\ No newline at end of file
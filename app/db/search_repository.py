@@ -0,0 +1,143 @@
+# app/db/search_repository.py
+
+import html
+import re
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Sequence
+from app.db.search_schema import SEARCH_SOURCES, postgres_tsvector_expression
+
+# Primary key of each searchable table (returned as the hit's source_id)
+_ID_COLUMNS = {"projects": "project_id", "messages": "message_id", "tasks": "task_id"}
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+# The database wraps matches in these private-use characters; the snippet is HTML-escaped
+# first and only then are they swapped for the <mark> tags, so stored text can never
+# inject markup
+_MATCH_START = "\ue000"
+_MATCH_END = "\ue001"
+
+
+def highlight_snippet(raw: str) -> str:
+    """HTML-escaped snippet with the database's match markers turned into <mark> tags."""
+    escaped = html.escape(raw or "", quote=True)
+    return escaped.replace(_MATCH_START, HIGHLIGHT_START).replace(_MATCH_END, HIGHLIGHT_END)
+
+
+def normalize_scores(rows: List[Dict[str, Any]]) -> None:
+    """
+    Rescales one source's scores to (0, 1] relative to its best hit. bm25 and ts_rank values
+    of different tables are not comparable (they depend on each table's term statistics),
+    relative ranks within each table are.
+    """
+    best = max((row["score"] for row in rows), default=0)
+    for row in rows:
+        row["score"] = row["score"] / best if best > 0 else 0.0
+
+
+def fts5_query(query: str) -> str:
+    """
+    Turns free text into a safe FTS5 query: every word becomes a quoted term (implicit AND),
+    the last one a prefix match so partially typed words still hit. FTS5 operators in the
+    user's input are therefore never interpreted.
+    """
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+class SearchRepository:
+    """
+    Owner-scoped, ranked full-text search over research goals, messages and task results.
+    SQLite uses the FTS5 tables, Postgres the GIN expression indexes (see search_schema).
+    """
+
+    def __init__(self, db_session: Session):
+        """Injects the scoped DB session."""
+        self.db = db_session
+
+    def search(self, owner_id: str, query: str, limit: int, sources: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        Returns up to `limit` hits across `sources`, best first, each as
+        {source, source_id, project_id, snippet, score}.
+        Each source is searched with its own index and the top hits are merged by their
+        per-source normalized score, so the cost is bounded by `limit` per source, not by
+        the number of matching rows.
+        """
+        dialect = self.db.bind.dialect.name
+        hits: List[Dict[str, Any]] = []
+        for source in sources:
+            table, columns = SEARCH_SOURCES[source]
+            if dialect == "sqlite":
+                rows = self._search_sqlite(owner_id, query, limit, table)
+            elif dialect == "postgresql":
+                rows = self._search_postgres(owner_id, query, limit, table, columns)
+            else:
+                raise NotImplementedError(f"Full-text search is not available on {dialect}")
+            normalize_scores(rows)
+            hits.extend({"source": source, **row, "snippet": highlight_snippet(row["snippet"])} for row in rows)
+
+        hits.sort(key=lambda hit: hit["score"], reverse=True)
+        return hits[:limit]
+
+    def _owner_join(self, table: str) -> str:
+        if table == "projects":
+            return ""
+        return "JOIN projects p ON p.project_id = t.project_id"
+
+    def _owner_column(self, table: str) -> str:
+        return "t.owner_id" if table == "projects" else "p.owner_id"
+
+    def _search_sqlite(self, owner_id: str, query: str, limit: int, table: str) -> List[Dict[str, Any]]:
+        match = fts5_query(query)
+        if not match:
+            return []
+        fts = f"{table}_fts"
+        sql = text(f"""
+            SELECT t.{_ID_COLUMNS[table]} AS source_id,
+                   t.project_id AS project_id,
+                   snippet({fts}, -1, :hl_start, :hl_end, '…', 16) AS snippet,
+                   -bm25({fts}) AS score
+            FROM {fts}
+            JOIN {table} t ON t.rowid = {fts}.rowid
+            {self._owner_join(table)}
+            WHERE {fts} MATCH :match AND {self._owner_column(table)} = :owner_id
+            ORDER BY bm25({fts})
+            LIMIT :limit
+        """)
+        params = {"match": match, "owner_id": owner_id, "limit": limit, "hl_start": _MATCH_START, "hl_end": _MATCH_END}
+        return [dict(row) for row in self.db.execute(sql, params).mappings()]
+
+    def _search_postgres(
+        self, owner_id: str, query: str, limit: int, table: str, columns: Sequence[str]
+    ) -> List[Dict[str, Any]]:
+        vector = postgres_tsvector_expression(tuple(f"t.{c}" for c in columns))
+        document = " || ' ' || ".join(f"coalesce(t.{c}, '')" for c in columns)
+        # Rank and limit first; ts_headline is expensive, so it only runs on the final rows
+        sql = text(f"""
+            WITH q AS (SELECT websearch_to_tsquery('english', :query) AS query),
+            ranked AS (
+                SELECT t.{_ID_COLUMNS[table]} AS source_id,
+                       t.project_id AS project_id,
+                       {document} AS document,
+                       ts_rank({vector}, q.query) AS score
+                FROM {table} t
+                {self._owner_join(table)}
+                CROSS JOIN q
+                WHERE {vector} @@ q.query AND {self._owner_column(table)} = :owner_id
+                ORDER BY score DESC
+                LIMIT :limit
+            )
+            SELECT ranked.source_id, ranked.project_id,
+                   ts_headline('english', ranked.document, q.query,
+                               'StartSel=' || :hl_start || ', StopSel=' || :hl_end || ', MaxFragments=1, MaxWords=24, MinWords=8') AS snippet,
+                   ranked.score
+            FROM ranked CROSS JOIN q
+            ORDER BY ranked.score DESC
+        """)
+        params = {"query": query, "owner_id": owner_id, "limit": limit, "hl_start": _MATCH_START, "hl_end": _MATCH_END}
+        return [dict(row) for row in self.db.execute(sql, params).mappings()]
@@ -0,0 +1,81 @@
+# app/db/search_schema.py
+
+# Full-text search schema (kept out of the ORM models: none of it is mapped).
+#
+# SQLite: one external-content FTS5 table per searchable table. The FTS rowid is the source
+#         row's rowid, and AFTER INSERT/UPDATE/DELETE triggers keep the index in sync on
+#         every write path (ORM flushes, bulk inserts, imports) with no application code.
+# Postgres: GIN expression indexes over to_tsvector('english', ...). The planner uses them
+#         for the exact same expression in a query, and Postgres maintains them on write.
+#
+# Caveat (SQLite): the FTS tables are keyed by rowid, which VACUUM and table-rebuilding
+# migrations (batch_alter_table "move and copy") may renumber. Run sqlite_fts_rebuild() after
+# either; recreated tables also need sqlite_fts_ddl() again for their triggers.
+#
+# The Alembic migration carries its own frozen copy of these statements; this module is
+# what create_all() (tests, fresh dev databases) uses via the after_create hook in models.py.
+
+from typing import Dict, List, Tuple
+
+# source name -> (table, indexed columns)
+SEARCH_SOURCES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "project": ("projects", ("original_research_goal", "refined_research_goal")),
+    "message": ("messages", ("content",)),
+    "task": ("tasks", ("description", "result")),
+}
+
+
+def sqlite_fts_ddl() -> List[str]:
+    """CREATE statements for the FTS5 tables and their sync triggers."""
+    statements = []
+    for table, columns in SEARCH_SOURCES.values():
+        fts = f"{table}_fts"
+        cols = ", ".join(columns)
+        new_values = ", ".join(f"new.{c}" for c in columns)
+        old_values = ", ".join(f"old.{c}" for c in columns)
+        statements += [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{cols}, content='{table}', content_rowid='rowid', tokenize='porter unicode61')",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_values}); "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_values}); END",
+        ]
+    return statements
+
+
+def postgres_tsvector_expression(columns: Tuple[str, ...]) -> str:
+    """The indexed expression; queries must repeat it verbatim for the GIN index to apply."""
+    return "to_tsvector('english', " + " || ' ' || ".join(f"coalesce({c}, '')" for c in columns) + ")"
+
+
+def postgres_fts_ddl() -> List[str]:
+    """CREATE statements for the GIN expression indexes."""
+    return [
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_fts ON {table} USING GIN ({postgres_tsvector_expression(columns)})"
+        for table, columns in SEARCH_SOURCES.values()
+    ]
+
+
+# Tables FTS5 creates next to each virtual table
+_FTS5_SHADOW_SUFFIXES = ("_data", "_idx", "_docsize", "_config", "_content")
+
+
+def is_search_object(name: str) -> bool:
+    """
+    Whether a table or index belongs to this unmapped schema (FTS5 tables and their shadow
+    tables, GIN indexes), so Alembic autogenerate leaves it alone.
+    """
+    for table, _ in SEARCH_SOURCES.values():
+        fts = f"{table}_fts"
+        if name in (fts, f"ix_{fts}") or name in (fts + suffix for suffix in _FTS5_SHADOW_SUFFIXES):
+            return True
+    return False
+
+
+def sqlite_fts_rebuild() -> List[str]:
+    """Re-index every FTS5 table from its content table (backfill, or repair after VACUUM)."""
+    return [f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')" for table, _ in SEARCH_SOURCES.values()]
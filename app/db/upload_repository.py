@@ -0,0 +1,83 @@
+# app/db/upload_repository.py
+
+from datetime import datetime, timezone
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from typing import List, Optional, Sequence
+from app.db.models import UploadSession
+
+
+class UploadClaimConflict(Exception):
+    """A referenced upload was attached by a concurrent request, or is no longer available."""
+
+
+class UploadRepository:
+    """Encapsulates all database access logic for resumable upload sessions."""
+
+    def __init__(self, db_session: Session):
+        """Injects the scoped DB session."""
+        self.db = db_session
+
+    def create_session(self, session: UploadSession) -> UploadSession:
+        """Persists a new upload session."""
+        try:
+            self.db.add(session)
+            self.db.commit()
+            self.db.refresh(session)
+            return session
+        except Exception as e:
+            self.db.rollback()
+            raise e
+
+    def get_session(self, upload_id: str, owner_id: str) -> Optional[UploadSession]:
+        """Fetches an upload session, scoped to its owner (None for unknown or foreign IDs)."""
+        return (
+            self.db.query(UploadSession)
+            .filter(UploadSession.upload_id == upload_id, UploadSession.owner_id == owner_id)
+            .first()
+        )
+
+    def advance_offset(self, upload_id: str, expected_offset: int, new_offset: int) -> bool:
+        """
+        Moves the resume offset forward, but only if nobody else moved it first
+        (compare-and-set on received_bytes, so concurrent PATCHes cannot both win).
+        """
+        result = self.db.execute(
+            update(UploadSession)
+            .where(
+                UploadSession.upload_id == upload_id,
+                UploadSession.received_bytes == expected_offset,
+                UploadSession.status == "in_progress",
+            )
+            .values(received_bytes=new_offset, updated_at=datetime.now(timezone.utc))
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def mark_completed(self, upload_id: str, content_sha256: str) -> bool:
+        """Finalizes a fully received upload. Returns False if it was not in progress."""
+        result = self.db.execute(
+            update(UploadSession)
+            .where(
+                UploadSession.upload_id == upload_id,
+                UploadSession.status == "in_progress",
+                UploadSession.received_bytes == UploadSession.total_size,
+            )
+            .values(status="completed", content_sha256=content_sha256, updated_at=datetime.now(timezone.utc))
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def get_completed_sessions(self, owner_id: str, upload_ids: Sequence[str]) -> List[UploadSession]:
+        """The owner's finalized, not yet attached uploads among `upload_ids` (one query)."""
+        if not upload_ids:
+            return []
+        return (
+            self.db.query(UploadSession)
+            .filter(
+                UploadSession.upload_id.in_(list(upload_ids)),
+                UploadSession.owner_id == owner_id,
+                UploadSession.status == "completed",
+            )
+            .all()
+        )
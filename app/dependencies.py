@@ -1,15 +1,31 @@
 # app/dependencies.py
 
+from functools import lru_cache
+from typing import Optional
 from sqlalchemy.orm import Session
 from fastapi import Depends
 
 # Import the foundational pieces
-from app.database import get_db # Your existing database session dependency
+from app.database import get_db, SessionLocal # Your existing database session dependency
+from app.core.redis_client import get_async_redis
 from app.db.project_repository import ProjectRepository 
 from app.jobs.agent_queue import AgentQueueService
 from app.services.project_service import ProjectService
 from app.services.project_service import FileStorageService # For the service injection
 from app.db.user_repository import UserRepository # <-- NEW IMPORT
+from app.db.upload_repository import UploadRepository
+from app.services.upload_service import UploadService
+from app.services.project_bundle import ProjectBundleService
+from app.db.search_repository import SearchRepository
+from app.services.search_service import SearchService
+from app.db.goal_index_repository import GoalIndexRepository
+from app.services.plan_reuse import PlanReuseService
+from app.services.project_events import ProjectEventBroker
+from app.services.state_cache import ProjectStateCache
+from app.services.idempotency import IdempotencyStore
+from app.services.admission import (
+    AdmissionController, TokenBucketLimiter, BULK_RATE_LIMIT_KEY, admission_settings_from_env
+)
 
 # --- 0. User Repository Dependency ---
 
@@ -30,9 +46,11 @@ def get_project_repository(db: Session = Depends(get_db)) -> ProjectRepository:
 
 # --- 2. Queue Dependency ---
 
+@lru_cache(maxsize=1)
 def get_agent_queue_service() -> AgentQueueService:
     """
     Dependency for the Agent Queue client (Singleton pattern typically used here).
+    Cached so the Redis connection (and its ping) is set up once, not on every request.
     """
     # Initialize once. Using a specific queue name for this service.
     return AgentQueueService(queue_name="agent_tasks")
@@ -46,13 +64,47 @@ def get_file_storage_service() -> FileStorageService:
     # Base path is typically configurable via environment variable
     return FileStorageService(base_path="storage/projects")
 
+# --- 3a. Resumable Upload Dependencies ---
+
+def get_upload_repository(db: Session = Depends(get_db)) -> UploadRepository:
+    """
+    Instantiates the UploadRepository, injecting the scoped DB session.
+    """
+    return UploadRepository(db_session=db)
+
+def get_upload_service(repository: UploadRepository = Depends(get_upload_repository)) -> UploadService:
+    """
+    Dependency for resumable uploads (chunks are stored next to the project files).
+    """
+    return UploadService(repository=repository, base_path="storage/uploads")
+
+# --- 3b. State Cache Dependency (one per process) ---
+
+@lru_cache(maxsize=1)
+def get_project_state_cache() -> ProjectStateCache:
+    """
+    Singleton cache of serialized project states (process LRU backed by Redis).
+    """
+    return ProjectStateCache(redis_conn=get_async_redis())
+
+# --- 3c. Plan Reuse Dependency (near-duplicate goals) ---
+
+def get_plan_reuse_service(db: Session = Depends(get_db)) -> PlanReuseService:
+    """
+    MinHash/LSH index of research goals; offers earlier plans for near-duplicates.
+    """
+    return PlanReuseService(repository=GoalIndexRepository(db_session=db))
+
 # --- 4. Project Service Dependency (The orchestrator) ---
 
 def get_project_service(
     repository: ProjectRepository = Depends(get_project_repository),
     user_repository: UserRepository = Depends(get_user_repository),
     storage: FileStorageService = Depends(get_file_storage_service),
-    queue: AgentQueueService = Depends(get_agent_queue_service)
+    queue: AgentQueueService = Depends(get_agent_queue_service),
+    state_cache: ProjectStateCache = Depends(get_project_state_cache),
+    uploads: UploadService = Depends(get_upload_service),
+    plan_reuse: PlanReuseService = Depends(get_plan_reuse_service)
 ) -> ProjectService:
     """
     The main dependency that orchestrates the core business logic.
@@ -62,5 +114,90 @@ def get_project_service(
         repository=repository,
         user_repository=user_repository,
         storage_service=storage,
-        agent_queue=queue
-    )
\ No newline at end of file
+        agent_queue=queue,
+        state_cache=state_cache,
+        upload_service=uploads,
+        plan_reuse=plan_reuse
+    )
+
+# --- 4b. Project Bundle Dependency (export / import) ---
+
+def get_project_bundle_service(
+    repository: ProjectRepository = Depends(get_project_repository),
+    storage: FileStorageService = Depends(get_file_storage_service)
+) -> ProjectBundleService:
+    """
+    Streaming export and bulk import of whole projects.
+    """
+    return ProjectBundleService(repository=repository, storage=storage)
+
+# --- 4c. Search Dependency ---
+
+def get_search_service(db: Session = Depends(get_db)) -> SearchService:
+    """
+    Full-text search over the caller's projects (FTS5 on SQLite, tsvector/GIN on Postgres).
+    """
+    return SearchService(repository=SearchRepository(db_session=db))
+
+# --- 5. Short-lived lookups (for long-running responses) ---
+
+def lookup_project_owner(project_id: str) -> Optional[str]:
+    """
+    Returns the owner_id of a project using its own short-lived session.
+    Streaming endpoints use this instead of get_db so an open stream never pins a pooled
+    DB connection for its whole lifetime. Synchronous: call it via run_in_threadpool.
+    """
+    db = SessionLocal()
+    try:
+        return ProjectRepository(db_session=db).get_project_owner_id(project_id)
+    finally:
+        db.close()
+
+# --- 6. Project Event Broker (one per process) ---
+
+@lru_cache(maxsize=1)
+def get_project_event_broker() -> ProjectEventBroker:
+    """
+    Singleton broker: every SSE connection in this process shares ONE Redis subscription.
+    """
+    return ProjectEventBroker(redis_conn=get_async_redis())
+
+# --- 7. Idempotency Store (one per process) ---
+
+@lru_cache(maxsize=1)
+def get_idempotency_store() -> IdempotencyStore:
+    """
+    Singleton store of Idempotency-Key records, shared across pods through Redis.
+    """
+    return IdempotencyStore(redis_conn=get_async_redis())
+
+# --- 8. Admission Controller (one per process) ---
+
+async def _agent_queue_depth() -> int:
+    return await get_agent_queue_service().get_queue_depth()
+
+@lru_cache(maxsize=1)
+def get_admission_controller() -> AdmissionController:
+    """
+    Singleton admission controller: per-owner token buckets (Redis) plus backpressure
+    from the agent queue's depth.
+    """
+    settings = admission_settings_from_env()
+    return AdmissionController(
+        limiter=TokenBucketLimiter(
+            redis_conn=get_async_redis(),
+            rate_per_minute=settings["rate_per_minute"],
+            burst=settings["burst"],
+        ),
+        bulk_limiter=TokenBucketLimiter(
+            redis_conn=get_async_redis(),
+            rate_per_minute=settings["bulk_rate_per_minute"],
+            burst=settings["bulk_burst"],
+            key=BULK_RATE_LIMIT_KEY,
+        ),
+        queue_depth=_agent_queue_depth,
+        max_queue_depth=settings["max_queue_depth"],
+        max_wait_seconds=settings["max_wait_seconds"],
+        avg_job_seconds=settings["avg_job_seconds"],
+        num_workers=settings["num_workers"],
+    )
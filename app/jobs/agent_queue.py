@@ -1,12 +1,13 @@
 # app/jobs/agent_queue.py
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timezone
 import os
 from redis import Redis
 from rq import Queue
 import logging
 from fastapi.concurrency import run_in_threadpool
+from app.utils.logger import get_request_id
 logger = logging.getLogger(__name__)
 
 class AgentQueueService:
@@ -49,7 +50,9 @@ class AgentQueueService:
                 project_id,
                 agent_name,
                 task_data,
-                job_timeout="10m"  # Allow up to 10 minutes for job execution
+                job_timeout="10m",  # Allow up to 10 minutes for job execution
+                # Carry the request ID so the worker's logs correlate with the API request
+                meta={"request_id": get_request_id()}
             )
             logger.info(
                 f"Job queued successfully",
@@ -67,4 +70,46 @@ class AgentQueueService:
                 extra={"project_id": project_id, "error": str(e)},
                 exc_info=True
             )
-            raise
\ No newline at end of file
+            raise
+
+    async def enqueue_agent_tasks(
+        self,
+        tasks: List[Tuple[str, str, Dict[str, Any]]]
+    ) -> List[str]:
+        """
+        Pushes many (project_id, agent_name, task_data) payloads in ONE pipelined Redis
+        round trip (RQ's enqueue_many). Returns the job IDs in input order.
+        """
+        if not tasks:
+            return []
+        meta = {"request_id": get_request_id()}
+        job_datas = [
+            Queue.prepare_data(
+                "app.workers.agent_worker.process_job",
+                args=(project_id, agent_name, task_data),
+                timeout="10m",
+                meta=dict(meta),
+            )
+            for project_id, agent_name, task_data in tasks
+        ]
+        try:
+            jobs = await run_in_threadpool(self.queue.enqueue_many, job_datas)
+        except Exception as e:
+            logger.error(
+                f"Failed to enqueue job batch",
+                extra={"count": len(tasks), "error": str(e)},
+                exc_info=True
+            )
+            raise
+        logger.info(
+            f"Job batch queued successfully",
+            extra={"count": len(jobs), "queue": self.queue_name}
+        )
+        return [job.id for job in jobs]
+
+    async def get_queue_depth(self) -> int:
+        """
+        Number of jobs waiting in the queue (one LLEN, run in the threadpool).
+        Used by admission control to apply backpressure.
+        """
+        return await run_in_threadpool(lambda: self.queue.count)
@@ -0,0 +1,19 @@
+"""
+LLM client layer: backends (model providers and a deterministic fake), optionally behind a
+micro-batching coalescer (in-process, or a batch server shared by all jobs), and a client
+with a content-hash keyed response cache on top.
+Agents use it through BaseAgent.llm.
+"""
+
+from app.llm.backends import LLMBackend, LLMRequest, LLMResponse, FakeLLMBackend
+from app.llm.batching import BatchingBackend, BatchStats
+from app.llm.batch_server import BatchServer, RemoteBatchingBackend
+from app.llm.cache import CacheStats, CacheTier, DiskCacheTier, RedisCacheTier, ResponseCache
+from app.llm.client import LLMClient, get_llm_client
+
+__all__ = [
+    "LLMBackend", "LLMRequest", "LLMResponse", "FakeLLMBackend",
+    "BatchingBackend", "BatchStats", "BatchServer", "RemoteBatchingBackend",
+    "CacheStats", "CacheTier", "DiskCacheTier", "RedisCacheTier", "ResponseCache",
+    "LLMClient", "get_llm_client",
+]
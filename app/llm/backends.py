@@ -0,0 +1,105 @@
+# app/llm/backends.py
+
+# Model backends: the one place that talks to a model provider. Agents never call a backend
+# directly; they go through LLMClient (app/llm/client.py), which adds the response cache.
+
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
+
+
+@dataclass(frozen=True)
+class LLMRequest:
+    """Everything that determines a completion (and therefore its cache key)."""
+    prompt: str
+    model: str
+    system: Optional[str] = None
+    temperature: float = 0.0
+    max_tokens: int = 1024
+
+    def content_hash(self) -> str:
+        """SHA-256 over the canonical JSON of the request: equal requests, equal keys."""
+        return hashlib.sha256(orjson.dumps(asdict(self), option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+@dataclass(frozen=True)
+class LLMResponse:
+    text: str
+    model: str
+    input_tokens: int
+    output_tokens: int
+    # Wall time the backend took to produce this response (kept when it is served from cache)
+    latency_seconds: float = 0.0
+    cached: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LLMResponse":
+        return cls(**data)
+
+
+class LLMBackend:
+    """Base class for model providers."""
+
+    async def complete(self, request: LLMRequest) -> LLMResponse:
+        raise NotImplementedError
+
+    async def complete_batch(self, requests: List[LLMRequest]) -> List[LLMResponse]:
+        """
+        Answers several requests in one provider call, in order. Providers with a batch
+        endpoint override this; the default just runs the single calls concurrently.
+        """
+        return list(await asyncio.gather(*(self.complete(request) for request in requests)))
+
+
+def _count_tokens(text: str) -> int:
+    # Whitespace words: good enough for the fake backend's bookkeeping
+    return len(text.split())
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Deterministic local model server for tests, benchmarks and development: the same request
+    always yields the same text, and every provider round trip (single or batched) costs one
+    simulated latency. Counts requests (`calls`) and round trips (`round_trips`) so tests can
+    assert what caching and batching saved.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0, responder: Optional[Callable[[LLMRequest], str]] = None):
+        self.latency_seconds = latency_seconds
+        self.responder = responder
+        self.calls = 0
+        self.round_trips = 0
+
+    async def complete(self, request: LLMRequest) -> LLMResponse:
+        return (await self.complete_batch([request]))[0]
+
+    async def complete_batch(self, requests: List[LLMRequest]) -> List[LLMResponse]:
+        self.calls += len(requests)
+        self.round_trips += 1
+        started = time.perf_counter()
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        latency = time.perf_counter() - started
+        return [self._respond(request, latency) for request in requests]
+
+    def _respond(self, request: LLMRequest, latency: float) -> LLMResponse:
+        if self.responder is not None:
+            text = self.responder(request)
+        else:
+            # Echo the prompt's last line, tagged with the request hash
+            lines = request.prompt.strip().splitlines() or [""]
+            text = f"[fake {request.content_hash()[:12]}] {lines[-1][:200]}"
+        return LLMResponse(
+            text=text,
+            model=request.model,
+            input_tokens=_count_tokens(request.prompt) + _count_tokens(request.system or ""),
+            output_tokens=_count_tokens(text),
+            latency_seconds=latency,
+        )
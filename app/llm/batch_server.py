@@ -0,0 +1,122 @@
+# app/llm/batch_server.py
+
+# Cross-job LLM batching. RQ forks a process per agent job, so a BatchingBackend inside a job
+# only ever coalesces that job's own concurrent calls. To batch across jobs, run ONE
+# long-lived batch server next to the workers (a sidecar):
+#
+#     python -m app.llm.batch_server
+#
+# and start the workers with LLM_BATCH_SERVER=1. Job processes then send every uncached call
+# through Redis (RemoteBatchingBackend) instead of calling the provider themselves:
+#
+#   llm-batch:requests          list of {"reply_to", "request"} messages (RPUSH / BLPOP)
+#   llm-batch:reply:{uuid}      one {"response"} or {"error"} message per request, short TTL
+#
+# The server hands every request to one BatchingBackend on one event loop, so concurrent
+# requests from all jobs share provider calls. Each call costs two extra Redis round trips.
+
+import asyncio
+import logging
+import os
+import uuid
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Set
+
+import orjson
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+from app.llm.backends import LLMBackend, LLMRequest, LLMResponse
+from app.llm.batching import BatchingBackend
+
+logger = logging.getLogger(__name__)
+
+REQUEST_QUEUE_KEY = "llm-batch:requests"
+REPLY_KEY = "llm-batch:reply:{reply_id}"
+
+
+class RemoteBatchingBackend(LLMBackend):
+    """Job-side backend: forwards requests to the batch server and waits for the replies."""
+
+    def __init__(self, redis_conn: Redis, timeout_seconds: float = 120.0):
+        self.redis = redis_conn
+        self.timeout_seconds = timeout_seconds
+
+    async def complete(self, request: LLMRequest) -> LLMResponse:
+        # Blocking client calls run in a thread: job processes start a new event loop per
+        # job, which an asyncio client's pooled connections could not outlive
+        reply_to = REPLY_KEY.format(reply_id=uuid.uuid4().hex)
+        message = orjson.dumps({"reply_to": reply_to, "request": asdict(request)})
+        await asyncio.to_thread(self.redis.rpush, REQUEST_QUEUE_KEY, message)
+
+        # BLPOP's timeout is in whole seconds
+        popped = await asyncio.to_thread(self.redis.blpop, [reply_to], max(1, round(self.timeout_seconds)))
+        if popped is None:
+            raise TimeoutError(f"No reply from the LLM batch server within {self.timeout_seconds}s")
+        reply = orjson.loads(popped[1])
+        if "error" in reply:
+            raise RuntimeError(f"LLM batch server: {reply['error']}")
+        return LLMResponse.from_dict(reply["response"])
+
+    async def complete_batch(self, requests: List[LLMRequest]) -> List[LLMResponse]:
+        # The server regroups them anyway
+        return list(await asyncio.gather(*(self.complete(request) for request in requests)))
+
+
+class BatchServer:
+    """Pops requests from Redis and answers them through one shared BatchingBackend."""
+
+    def __init__(self, redis_conn: AsyncRedis, backend: BatchingBackend, reply_ttl_seconds: int = 300):
+        self.redis = redis_conn
+        self.backend = backend
+        self.reply_ttl_seconds = reply_ttl_seconds
+        self._handling: Set[asyncio.Task] = set()
+
+    async def serve(self, stop: Optional[asyncio.Event] = None, poll_seconds: float = 1.0) -> None:
+        """Serves until `stop` is set (forever without one), then finishes what it popped."""
+        while stop is None or not stop.is_set():
+            popped = await self.redis.blpop([REQUEST_QUEUE_KEY], timeout=poll_seconds)
+            if popped is None:
+                continue
+            # Not awaited: the next request is popped while this one waits for company
+            task = asyncio.create_task(self._handle(popped[1]))
+            self._handling.add(task)
+            task.add_done_callback(self._handling.discard)
+        if self._handling:
+            await asyncio.gather(*self._handling, return_exceptions=True)
+
+    async def _handle(self, raw: bytes) -> None:
+        try:
+            message = orjson.loads(raw)
+            reply_to = message["reply_to"]
+        except (orjson.JSONDecodeError, KeyError, TypeError) as e:
+            logger.error(f"Dropping malformed LLM batch request: {e}")
+            return
+
+        reply: Dict[str, Any]
+        try:
+            response = await self.backend.complete(LLMRequest(**message["request"]))
+            reply = {"response": response.to_dict()}
+        except Exception as e:
+            reply = {"error": f"{type(e).__name__}: {e}"}
+        try:
+            await self.redis.rpush(reply_to, orjson.dumps(reply))
+            await self.redis.expire(reply_to, self.reply_ttl_seconds)
+        except Exception as e:
+            logger.error(f"Failed to send LLM batch reply", extra={"reply_to": reply_to, "error": str(e)})
+
+
+if __name__ == '__main__':
+    from app.core.redis_client import get_redis_url
+    from app.llm.client import build_backend
+
+    async def main() -> None:
+        backend = BatchingBackend(
+            build_backend(os.getenv("LLM_BACKEND", "fake")),
+            int(os.getenv("LLM_BATCH_MAX_SIZE", "8")),
+            float(os.getenv("LLM_BATCH_MAX_WAIT_MS", "5")) / 1000,
+        )
+        logger.info("LLM batch server listening", extra={"queue": REQUEST_QUEUE_KEY})
+        await BatchServer(AsyncRedis.from_url(get_redis_url()), backend).serve()
+
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+# app/llm/batching.py
+
+# Micro-batching: concurrent, compatible requests (same model, system prompt and sampling
+# parameters) are held for at most `max_wait_seconds` and sent to the provider as ONE batched
+# call of up to `max_batch_size` prompts; each caller gets its own response back. Fewer, larger
+# provider calls mean more throughput per worker and less rate-limit pressure, for a few
+# milliseconds of added latency on an uncached call.
+#
+# Coalescing happens within one process and event loop: concurrent tasks of a plan (see
+# TaskExecutor) and agents sharing a worker process. RQ's default Worker forks a process per
+# job, so to batch calls from different jobs run the batch server sidecar, which owns the
+# one BatchingBackend every job talks to (app/llm/batch_server.py, LLM_BATCH_SERVER=1).
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app.llm.backends import LLMBackend, LLMRequest, LLMResponse
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchStats:
+    batches: int = 0
+    requests: int = 0
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.requests / self.batches if self.batches else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {"batches": self.batches, "requests": self.requests, "mean_batch_size": round(self.mean_batch_size, 2)}
+
+
+@dataclass
+class _PendingBatch:
+    requests: List[LLMRequest] = field(default_factory=list)
+    futures: List["asyncio.Future[LLMResponse]"] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class BatchingBackend(LLMBackend):
+    """Wraps a backend; single `complete` calls are coalesced into `complete_batch` calls."""
+
+    def __init__(self, backend: LLMBackend, max_batch_size: int = 8, max_wait_seconds: float = 0.005):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.stats = BatchStats()
+        self._pending: Dict[Tuple, _PendingBatch] = {}
+        self._submitting: set = set()  # strong references to running submit tasks
+
+    @staticmethod
+    def _batch_key(loop: asyncio.AbstractEventLoop, request: LLMRequest) -> Tuple:
+        # Only requests a provider can serve in one call share a batch
+        return (loop, request.model, request.system, request.temperature, request.max_tokens)
+
+    async def complete(self, request: LLMRequest) -> LLMResponse:
+        loop = asyncio.get_running_loop()
+        key = self._batch_key(loop, request)
+        batch = self._pending.get(key)
+        if batch is None:
+            self._drop_closed_loops()
+            batch = self._pending[key] = _PendingBatch()
+            batch.timer = loop.call_later(self.max_wait_seconds, self._flush, key)
+
+        future = loop.create_future()
+        batch.requests.append(request)
+        batch.futures.append(future)
+        if len(batch.requests) >= self.max_batch_size:
+            self._flush(key)
+        return await future
+
+    async def complete_batch(self, requests: List[LLMRequest]) -> List[LLMResponse]:
+        # Already a batch: pass straight through
+        return await self.backend.complete_batch(requests)
+
+    def _drop_closed_loops(self) -> None:
+        # A loop that closed with a batch still waiting (asyncio.run returned first) never
+        # fires its timer: forget those batches, nobody can await them any more
+        for key in [key for key in self._pending if key[0].is_closed()]:
+            del self._pending[key]
+
+    def _flush(self, key: Tuple) -> None:
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        task = asyncio.ensure_future(self._submit(batch))
+        self._submitting.add(task)
+        task.add_done_callback(self._submitting.discard)
+
+    async def _submit(self, batch: _PendingBatch) -> None:
+        self.stats.batches += 1
+        self.stats.requests += len(batch.requests)
+        try:
+            responses = await self.backend.complete_batch(batch.requests)
+            if len(responses) != len(batch.requests):
+                raise RuntimeError(f"Backend returned {len(responses)} responses for {len(batch.requests)} requests")
+        except Exception as e:
+            logger.warning(f"Batched LLM call failed", extra={"batch_size": len(batch.requests), "error": str(e)})
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        # Callers that gave up (cancelled) simply do not get theirs
+        for future, response in zip(batch.futures, responses):
+            if not future.done():
+                future.set_result(response)
@@ -0,0 +1,198 @@
+# app/llm/cache.py
+
+# Response cache keyed by the request's content hash (LLMRequest.content_hash).
+#
+#   tier 1: process-local LRU (entry count + TTL), sub-microsecond hits
+#   tier 2: Redis (shared by every worker, survives RQ's fork-per-job) or a local directory
+#
+# A tier-1 miss that hits tier 2 is promoted into tier 1. Tier 2 is best effort: any error is
+# counted and treated as a miss, so a Redis outage costs model calls, never failed jobs.
+
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from redis import Redis
+
+from app.llm.backends import LLMResponse
+from app.utils.serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    tier2_hits: int = 0
+    misses: int = 0
+    tier2_errors: int = 0
+    # Backend latency the hits did not have to pay again
+    saved_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.memory_hits + self.tier2_hits + self.misses
+        return (self.memory_hits + self.tier2_hits) / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {**asdict(self), "hit_rate": round(self.hit_rate, 4)}
+
+
+class CacheTier:
+    """A second-level store of serialized responses. Implementations are blocking."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes) -> None:
+        raise NotImplementedError
+
+
+class RedisCacheTier(CacheTier):
+    """
+    Entries expire by TTL; size is bounded by Redis itself (run it with an allkeys-lru
+    maxmemory-policy, as for any cache).
+    """
+
+    KEY = "llm-cache:{key}"
+
+    def __init__(self, redis_conn: Redis, ttl_seconds: int):
+        self.redis = redis_conn
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.redis.get(self.KEY.format(key=key))
+
+    def set(self, key: str, value: bytes) -> None:
+        self.redis.set(self.KEY.format(key=key), value, ex=self.ttl_seconds)
+
+
+class DiskCacheTier(CacheTier):
+    """
+    One file per entry under `directory`. Expired entries are deleted when read; once the
+    directory grows past `max_bytes`, least recently used files (by mtime, refreshed on every
+    hit) are evicted down to 90% of the limit.
+    """
+
+    def __init__(self, directory: str, ttl_seconds: int, max_bytes: int):
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None  # computed on first write
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            if path.stat().st_mtime + self.ttl_seconds < time.time():
+                path.unlink(missing_ok=True)
+                return None
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # LRU: a hit makes the entry young again
+        return data
+
+    def set(self, key: str, value: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(value)
+        os.replace(tmp, path)  # readers never see a partial file
+
+        if self._size is None:
+            self._size = sum(f.stat().st_size for f in self.directory.glob("*/*.json"))
+        else:
+            self._size += len(value)
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        files = []
+        for f in self.directory.glob("*/*.json"):
+            try:
+                stat = f.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, f))
+        files.sort()
+        size = sum(entry[1] for entry in files)
+        target = int(self.max_bytes * 0.9)
+        for _, file_size, f in files:
+            if size <= target:
+                break
+            f.unlink(missing_ok=True)
+            size -= file_size
+        self._size = size
+
+
+class ResponseCache:
+    """Two-tier cache of LLMResponses. Synchronous: LLMClient runs tier-2 calls in a thread."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: int = 7 * 24 * 3600, tier: Optional[CacheTier] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.tier = tier
+        self.stats = CacheStats()
+        self._memory: "OrderedDict[str, Tuple[float, LLMResponse]]" = OrderedDict()
+
+    def get_local(self, key: str) -> Optional[LLMResponse]:
+        """Tier 1 only (never blocks)."""
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at < time.monotonic():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return response
+
+    def _remember(self, key: str, response: LLMResponse) -> None:
+        self._memory[key] = (time.monotonic() + self.ttl_seconds, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_tier2(self, key: str) -> Optional[LLMResponse]:
+        """Tier 2 lookup (blocking); hits are promoted into tier 1."""
+        if self.tier is None:
+            return None
+        try:
+            data = self.tier.get(key)
+        except Exception as e:
+            self.stats.tier2_errors += 1
+            logger.warning(f"LLM cache tier-2 read failed", extra={"error": str(e)})
+            return None
+        if data is None:
+            return None
+        response = LLMResponse.from_dict(loads(data))
+        self._remember(key, response)
+        return response
+
+    def set(self, key: str, response: LLMResponse) -> None:
+        """Stores in tier 1 and (blocking) tier 2."""
+        self._remember(key, response)
+        if self.tier is None:
+            return
+        try:
+            self.tier.set(key, dumps(response.to_dict()))
+        except Exception as e:
+            self.stats.tier2_errors += 1
+            logger.warning(f"LLM cache tier-2 write failed", extra={"error": str(e)})
+
+    def record_hit(self, response: LLMResponse, tier2: bool) -> None:
+        if tier2:
+            self.stats.tier2_hits += 1
+        else:
+            self.stats.memory_hits += 1
+        self.stats.saved_seconds += response.latency_seconds
+
+    def record_miss(self) -> None:
+        self.stats.misses += 1
@@ -0,0 +1,168 @@
+# app/llm/client.py
+
+# The LLM client agents use (BaseAgent.llm). It turns a call into an LLMRequest, serves it
+# from the response cache when the exact same request was answered before (same prompt,
+# system prompt, model and sampling parameters), and otherwise calls the backend once, even
+# when several coroutines ask the same thing at the same time (e.g. concurrent tasks).
+
+import asyncio
+import logging
+import os
+from dataclasses import replace
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from app.core.redis_client import get_redis
+from app.llm.backends import FakeLLMBackend, LLMBackend, LLMRequest, LLMResponse
+from app.llm.batching import BatchingBackend
+from app.llm.batch_server import RemoteBatchingBackend
+from app.llm.cache import DiskCacheTier, RedisCacheTier, ResponseCache
+
+logger = logging.getLogger(__name__)
+
+
+class LLMClient:
+    """Cached completions on top of an LLMBackend."""
+
+    def __init__(self, backend: LLMBackend, cache: Optional[ResponseCache] = None, default_model: str = "fake"):
+        self.backend = backend
+        self.cache = cache
+        self.default_model = default_model
+        self._in_flight: Dict[str, "asyncio.Future[LLMResponse]"] = {}
+
+    def metrics(self) -> Dict[str, Any]:
+        """Cache and batching counters of this process (logged by the worker after each job)."""
+        return {
+            "cache": self.cache.stats.as_dict() if self.cache is not None else None,
+            "batching": self.backend.stats.as_dict() if isinstance(self.backend, BatchingBackend) else None,
+        }
+
+    async def complete(
+        self,
+        prompt: str,
+        *,
+        system: Optional[str] = None,
+        model: Optional[str] = None,
+        temperature: float = 0.0,
+        max_tokens: int = 1024,
+        use_cache: bool = True,
+    ) -> LLMResponse:
+        """
+        Returns the completion for `prompt`. Cached responses come back with cached=True.
+        Pass use_cache=False to force a fresh sample (the new response still replaces the
+        cached one).
+        """
+        request = LLMRequest(
+            prompt=prompt,
+            model=model or self.default_model,
+            system=system,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        if self.cache is None:
+            return await self.backend.complete(request)
+
+        key = request.content_hash()
+        if use_cache:
+            response = self.cache.get_local(key)
+            if response is not None:
+                self.cache.record_hit(response, tier2=False)
+                return replace(response, cached=True)
+
+            # Identical request already on its way to the backend: share its answer
+            pending = self._in_flight.get(key)
+            if pending is not None:
+                response = await asyncio.shield(pending)
+                self.cache.record_hit(response, tier2=False)
+                return replace(response, cached=True)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            if use_cache and self.cache.tier is not None:
+                response = await asyncio.to_thread(self.cache.get_tier2, key)
+                if response is not None:
+                    self.cache.record_hit(response, tier2=True)
+                    future.set_result(response)
+                    return replace(response, cached=True)
+
+            self.cache.record_miss()
+            response = await self.backend.complete(request)
+            if self.cache.tier is not None:
+                await asyncio.to_thread(self.cache.set, key, response)
+            else:
+                self.cache.set(key, response)
+            future.set_result(response)
+            logger.debug(
+                "LLM completion",
+                extra={"model": request.model, "latency_seconds": round(response.latency_seconds, 3), "cache_key": key[:12]}
+            )
+            return response
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # Waiters re-raise it; make sure an unawaited future does not warn
+                future.exception()
+            raise
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+
+def build_backend(name: str) -> LLMBackend:
+    """Backend by LLM_BACKEND name. Only the local fake exists until a provider is wired in."""
+    if name == "fake":
+        return FakeLLMBackend(latency_seconds=float(os.getenv("LLM_FAKE_LATENCY_SECONDS", "0")))
+    raise ValueError(f"Unknown LLM_BACKEND: {name}")
+
+
+@lru_cache(maxsize=1)
+def get_llm_client() -> LLMClient:
+    """
+    Process-wide client configured from the environment:
+        LLM_BACKEND                 backend name (default: fake)
+        LLM_MODEL                   default model name
+        LLM_CACHE_TIER              redis | disk | memory | none (default: redis)
+        LLM_CACHE_MAX_ENTRIES       tier-1 LRU size (default: 1024)
+        LLM_CACHE_TTL_SECONDS       entry lifetime in both tiers (default: 7 days)
+        LLM_CACHE_DIR               disk tier directory (default: ./llm_cache)
+        LLM_CACHE_DISK_MAX_BYTES    disk tier size limit (default: 512 MiB)
+        LLM_BATCH_MAX_SIZE          prompts per batched provider call; 1 disables (default: 8)
+        LLM_BATCH_MAX_WAIT_MS       how long a prompt may wait for company (default: 5)
+        LLM_BATCH_SERVER            1: send calls to the shared batch server sidecar, which
+                                    batches across jobs (app/llm/batch_server.py)
+        LLM_BATCH_SERVER_TIMEOUT_SECONDS  how long to wait for its reply (default: 120)
+    """
+    backend_name = os.getenv("LLM_BACKEND", "fake")
+    tier_name = os.getenv("LLM_CACHE_TIER", "redis")
+    ttl_seconds = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+    cache = None
+    if tier_name != "none":
+        tier = None
+        if tier_name == "redis":
+            tier = RedisCacheTier(get_redis(), ttl_seconds)
+        elif tier_name == "disk":
+            tier = DiskCacheTier(
+                os.getenv("LLM_CACHE_DIR", "./llm_cache"),
+                ttl_seconds,
+                int(os.getenv("LLM_CACHE_DISK_MAX_BYTES", str(512 * 1024 ** 2))),
+            )
+        elif tier_name != "memory":
+            raise ValueError(f"Unknown LLM_CACHE_TIER: {tier_name}")
+        cache = ResponseCache(
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")),
+            ttl_seconds=ttl_seconds,
+            tier=tier,
+        )
+
+    max_batch_size = int(os.getenv("LLM_BATCH_MAX_SIZE", "8"))
+    if os.getenv("LLM_BATCH_SERVER", "0") == "1":
+        # The sidecar owns the provider backend and the batching
+        backend = RemoteBatchingBackend(get_redis(), float(os.getenv("LLM_BATCH_SERVER_TIMEOUT_SECONDS", "120")))
+    else:
+        backend = build_backend(backend_name)
+        if max_batch_size > 1:
+            backend = BatchingBackend(backend, max_batch_size, float(os.getenv("LLM_BATCH_MAX_WAIT_MS", "5")) / 1000)
+
+    return LLMClient(backend, cache, default_model=os.getenv("LLM_MODEL", backend_name))
@@ -2,13 +2,20 @@
 from fastapi import FastAPI
 from app.api.v1 import api_router
 from app.middleware.logging_middleware import RequestIDMiddleware
+from app.middleware.compression_middleware import CompressionMiddleware
+from app.utils.serialization import FastJSONResponse
 
-app = FastAPI(title="Research Assistant API", version="1.0.0")
+app = FastAPI(
+    title="Research Assistant API",
+    version="1.0.0",
+    default_response_class=FastJSONResponse,
+)
 
 # Include API routes
 app.include_router(api_router)
+app.add_middleware(CompressionMiddleware)
+# Added last = outermost: the request ID is set before anything else logs
 app.add_middleware(RequestIDMiddleware) 
-app.include_router(api_router)
 
 @app.get("/health")
 async def health_check():
@@ -0,0 +1,141 @@
+# app/middleware/compression_middleware.py
+
+# Negotiated response compression (br / zstd / gzip), written as a pure ASGI middleware so it
+# can wrap streaming responses chunk by chunk instead of buffering them.
+import logging
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.compression import MINIMUM_SIZE, StreamCompressor, compress, negotiate_encoding
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/problem+json",
+    "application/javascript",
+    "application/xml",
+)
+
+
+def _is_compressible(headers: Headers) -> bool:
+    content_type = headers.get("content-type", "").lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) or "+json" in content_type
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with the best encoding the client accepts.
+
+    - Complete bodies are compressed in one shot if they reach `minimum_size`.
+    - Streamed bodies (NDJSON exports) are buffered only until `minimum_size` is reached,
+      then compressed incrementally and flushed after every chunk. Event streams skip the
+      buffering entirely, so an event is never held back waiting for more data.
+    - Responses that already carry a Content-Encoding (e.g. precompressed cached state),
+      partial content, range-capable file downloads and non-text types pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Even without an acceptable encoding the responder runs: it adds Vary to every
+        # response whose representation depends on Accept-Encoding
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send: Send, encoding: Optional[str], minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self._start: Optional[Message] = None
+        self._passthrough = False
+        self._event_stream = False
+        self._buffer = bytearray()
+        self._stream: Optional[StreamCompressor] = None
+
+    def _start_compressed(self, content_length: Optional[int]) -> Message:
+        headers = MutableHeaders(raw=self._start["headers"])
+        headers["Content-Encoding"] = self.encoding
+        if content_length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(content_length)
+        # A strong validator must not be shared by different encodings of a resource
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        return self._start
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self._start = message
+            self._passthrough = (
+                "content-encoding" in headers
+                or "content-range" in headers
+                # Range-capable responses (file downloads): byte offsets refer to the identity body
+                or "accept-ranges" in headers
+                or message["status"] in (204, 206, 304)
+                or not _is_compressible(headers)
+            )
+            self._event_stream = headers.get("content-type", "").startswith("text/event-stream")
+            if not self._passthrough:
+                # Compressed or not (too small, identity only), the body was negotiated: a
+                # shared cache must key it on Accept-Encoding
+                mutable = MutableHeaders(raw=message["headers"])
+                if "accept-encoding" not in mutable.get("vary", "").lower():
+                    mutable.add_vary_header("Accept-Encoding")
+                self._passthrough = self.encoding is None
+            if self._passthrough:
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+
+        if self._stream is None:
+            self._buffer += body
+            body = b""
+
+            if not more_body:
+                # The whole body is known: compress in one shot if it is worth it
+                body = bytes(self._buffer)
+                if len(body) < self.minimum_size:
+                    await self._send(self._start)
+                    await self._send({"type": "http.response.body", "body": body})
+                    return
+                compressed = compress(body, self.encoding)
+                await self._send(self._start_compressed(len(compressed)))
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+
+            if len(self._buffer) < self.minimum_size and not self._event_stream:
+                return  # keep buffering until we know compression pays off
+
+            # Streamed body: switch to incremental compression
+            body = bytes(self._buffer)
+            self._buffer.clear()
+            self._stream = StreamCompressor(self.encoding)
+            await self._send(self._start_compressed(None))
+
+        chunk = self._stream.compress_chunk(body) if body else b""
+        if not more_body:
+            chunk += self._stream.finish()
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -1,35 +1,64 @@
 # app/middleware/logging_middleware.py
 
 #we inject a unique request ID into logs for tracing
+import re
+import time
 import uuid
 import logging
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
-from starlette.types import ASGIApp
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.logger import request_id_var
 
 logger = logging.getLogger(__name__)
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
+# Client-supplied IDs are echoed into logs and headers: accept only short, safe tokens
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._\-]{1,128}$")
+
+
+class RequestIDMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware): it wraps `send` instead of buffering the
+    response through an extra task and memory stream, so streaming responses (SSE, NDJSON)
+    pass straight through.
+
+    The request ID is stored in `request_id_var`, so every log line emitted while handling
+    the request - in any module - carries it (see RequestIDFilter), and enqueued jobs
+    inherit it (see AgentQueueService).
+    """
+
     def __init__(self, app: ASGIApp):
-        super().__init__(app)
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next):
         # 1. Generate or retrieve Request ID
-        request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
-        
-        # 2. CRITICAL: Inject the ID into the logger's context (simulated here)
-        # In a real setup, we use libraries like loguru or special context variables
-        
-        # For this minimal setup, we'll log the start/end and pass it in the response header
+        incoming = Headers(scope=scope).get("x-request-id")
+        request_id = incoming if incoming and _VALID_REQUEST_ID.match(incoming) else str(uuid.uuid4())
         
-        logger.info("Request started", extra={"request_id": request_id, "path": request.url.path, "method": request.method})
-        
-        response = await call_next(request)
-        
-        # 3. Add the ID to the response header
-        response.headers["X-Request-ID"] = request_id
-        
-        logger.info("Request finished", extra={"request_id": request_id, "status_code": response.status_code})
-        
-        return response
\ No newline at end of file
+        # 2. Make it the context's request ID (visible to all logs in this request)
+        token = request_id_var.set(request_id)
+        started = time.perf_counter()
+        status_code = 500
+
+        logger.info("Request started", extra={"path": scope["path"], "method": scope["method"]})
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # 3. Add the ID to the response header
+                MutableHeaders(scope=message).append("X-Request-ID", request_id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            logger.info(
+                "Request finished",
+                extra={"status_code": status_code, "duration_ms": round((time.perf_counter() - started) * 1000, 2)}
+            )
+            request_id_var.reset(token)
@@ -3,21 +3,78 @@
 # app/schemas/project.py (REFINED)
 
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Dict, Any, Optional, Literal
+from typing import List, Dict, Any, ClassVar, Optional, Literal
 from datetime import datetime
 
+# --- Trusted Construction ---
+
+# trusted() fills BaseModel's instance slots directly, which is private pydantic layout. It is
+# only used when the slots are exactly the ones it was written against (pydantic is pinned to
+# <3 and test_trusted_construction.py fails on a mismatch); otherwise it falls back to the
+# public model_construct().
+_PYDANTIC_SLOTS = ("__dict__", "__pydantic_fields_set__", "__pydantic_extra__", "__pydantic_private__")
+TRUSTED_FAST_PATH = getattr(BaseModel, "__slots__", None) == _PYDANTIC_SLOTS
+
+_new_instance = object.__new__
+_set_instance_dict = object.__setattr__
+if TRUSTED_FAST_PATH:
+    _set_fields_set = BaseModel.__pydantic_fields_set__.__set__
+    _set_extra = BaseModel.__pydantic_extra__.__set__
+    _set_private = BaseModel.__pydantic_private__.__set__
+
+
+class TrustedModel(BaseModel):
+    """
+    A model that can also be built WITHOUT validation from data we produced ourselves
+    (our DB rows, cache entries, agent code). Validation stays on for untrusted input:
+    request bodies, uploaded bundles, anything a client sent.
+    """
+
+    # False for subclasses with private attributes or a model_post_init(): the fast path
+    # would skip their setup, so they always go through model_construct()
+    _trusted_fast_path: ClassVar[bool] = True
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        cls._trusted_fast_path = not cls.__private_attributes__ and cls.model_post_init is BaseModel.model_post_init
+
+    @classmethod
+    def trusted(cls, **values: Any):
+        """
+        Builds an instance from already-valid values, used as-is (no coercion, no copies).
+        Every field must be passed - defaults are not filled in - or a TypeError is raised.
+        About 3x cheaper than validating an AuditEntry read from the DB, where
+        model_construct() is slower than validation itself.
+        """
+        if not (TRUSTED_FAST_PATH and cls._trusted_fast_path):
+            return cls.model_construct(**values)
+        if values.keys() != cls.model_fields.keys():
+            missing = sorted(cls.model_fields.keys() - values.keys())
+            unexpected = sorted(values.keys() - cls.model_fields.keys())
+            raise TypeError(f"{cls.__name__}.trusted() takes every field: missing {missing}, unexpected {unexpected}")
+        instance = _new_instance(cls)
+        _set_instance_dict(instance, "__dict__", values)
+        _set_fields_set(instance, set(values))
+        _set_extra(instance, None)
+        _set_private(instance, None)
+        return instance
+
+
 # --- Sub-models (Kept Clean) ---
-class TaskItem(BaseModel):
+class TaskItem(TrustedModel):
     id: str
     description: str
-    status: Literal["pending", "in_progress", "completed", "failed"]
+    status: Literal["pending", "in_progress", "completed", "failed", "cancelled"]
     result: Optional[Any] = None
+    # IDs of tasks (in the same task_list) that must complete before this one can start
+    depends_on: List[str] = Field(default_factory=list)
 
-class ConversationMessage(BaseModel):
+class ConversationMessage(TrustedModel):
     role: str
     content: str
 
-class AuditEntry(BaseModel):
+class AuditEntry(TrustedModel):
     # CRITICAL FIX: Ensure 'details' is a dictionary, not a generic string/Any
     timestamp: datetime 
     agent: str
@@ -49,9 +106,77 @@ class ProjectCreationResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True) # Allow ORM mapping
 
 
+# --- Batch Creation Schemas (For POST /api/v1/projects/batch) ---
+
+class BatchProjectResult(BaseModel):
+    """Outcome of one research goal in a batch, in request order."""
+    index: int
+    status: Literal["accepted", "rejected"]
+    project_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchProjectCreationResponse(BaseModel):
+    """Per-item results of a batch creation (202 Accepted once any item is accepted)."""
+    results: List[BatchProjectResult]
+    accepted: int
+    rejected: int
+
+
+# --- Listing Schemas (For GET /api/v1/projects) ---
+
+class ProjectSummary(BaseModel):
+    """
+    One row of a project listing. Only the fields requested via `fields=` are present
+    in the response (unset fields are excluded, not sent as null).
+    """
+    project_id: str
+    title: Optional[str] = None
+    original_research_goal: Optional[str] = None
+    refined_research_goal: Optional[str] = None
+    current_phase: Optional[str] = None
+    next_agent: Optional[str] = None
+    state_version: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+
+class ProjectListResponse(BaseModel):
+    """A page of projects plus the opaque cursor of the next page (None on the last page)."""
+    items: List[ProjectSummary]
+    next_cursor: Optional[str] = None
+
+
+# --- History Schemas (For GET /api/v1/projects/{id}/messages and /audit) ---
+
+class MessageRecord(ConversationMessage):
+    """A persisted conversation message."""
+    message_id: str
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AuditEntryRecord(AuditEntry):
+    """A persisted audit log entry."""
+    entry_id: str
+    details: Optional[Dict[str, Any]] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class MessagePage(BaseModel):
+    items: List[MessageRecord]
+    next_cursor: Optional[str] = None
+
+
+class AuditLogPage(BaseModel):
+    items: List[AuditEntryRecord]
+    next_cursor: Optional[str] = None
+
+
 # --- Main State Schema (For GET /api/v1/projects/{id}) ---
 
-class VirtualLabState(BaseModel):
+class VirtualLabState(TrustedModel):
     """
     API response for the final state retrieval (GET /{id}). 
     This should NOT be the POST response.
@@ -65,7 +190,7 @@ class VirtualLabState(BaseModel):
     messages: List[ConversationMessage]
     task_list: List[TaskItem]
     scratchpad: Dict[str, Any] # Scratchpad remains ephemeral/JSON in the DB
-    next_agent: Literal["pi_agent", "router", "worker", "user_approval"]
+    next_agent: Literal["pi_agent", "router", "worker", "task_executor", "user_approval", "done"]
     audit_log: List[AuditEntry]
     current_phase: str
     
@@ -81,4 +206,15 @@ class ProjectFileInfo(BaseModel):
     file_type: str
     uploaded_at: datetime
     
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+# --- Event Stream Schema (For GET /api/v1/projects/{id}/events) ---
+
+class ProjectEvent(BaseModel):
+    """
+    A single state change emitted by the worker and streamed to clients over SSE.
+    The event id is assigned by the Redis stream when the event is published.
+    """
+    event: Literal["phase_changed", "message", "task_updated", "audit"]
+    project_id: str
+    data: Dict[str, Any]
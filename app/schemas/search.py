@@ -0,0 +1,27 @@
+# app/schemas/search.py
+# Pydantic models for full-text search (GET /api/v1/search)
+
+from pydantic import BaseModel, Field
+from typing import List, Literal
+
+SearchSource = Literal["project", "message", "task"]
+
+
+class SearchHit(BaseModel):
+    """
+    One match. `snippet` is an HTML-escaped excerpt of the stored text with the matched
+    terms wrapped in <mark>...</mark>, safe to render as HTML.
+    """
+    source: SearchSource
+    source_id: str
+    project_id: str
+    snippet: str
+    score: float = Field(
+        ...,
+        description="Relevance in (0, 1], relative to the best hit of the same source; higher is better."
+    )
+
+
+class SearchResponse(BaseModel):
+    query: str
+    items: List[SearchHit]
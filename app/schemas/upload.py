@@ -0,0 +1,32 @@
+# app/schemas/upload.py
+# Pydantic models for the resumable upload API (/api/v1/uploads)
+
+from pydantic import BaseModel, Field, ConfigDict
+from typing import Literal, Optional
+from datetime import datetime
+
+
+class UploadCreateRequest(BaseModel):
+    """Opens an upload session. The total size must be known up front."""
+    filename: str = Field(..., min_length=1, max_length=255)
+    content_type: str = Field("application/octet-stream", max_length=50)
+    size: int = Field(..., gt=0, description="Total size of the file in bytes.")
+
+
+class UploadFinalizeRequest(BaseModel):
+    """Optional client-side checksum, verified against the received bytes."""
+    sha256: Optional[str] = Field(None, pattern=r"^[0-9a-fA-F]{64}$")
+
+
+class UploadStatus(BaseModel):
+    """State of an upload session; `offset` is where the next PATCH must start."""
+    upload_id: str
+    filename: str
+    file_type: str
+    total_size: int
+    offset: int = Field(..., validation_alias="received_bytes")
+    status: Literal["in_progress", "completed", "attached"]
+    content_sha256: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
@@ -0,0 +1,204 @@
+# app/services/admission.py
+
+# Admission control for work that lands on the agent queue.
+#
+# 1. Per-owner token bucket (429): a burst of `burst` requests, refilled at `rate_per_minute`.
+#    Buckets live in Redis (one Lua call per check, shared by every pod); if Redis is down the
+#    limiter falls back to process-local buckets rather than failing open or closed.
+# 2. Global backpressure (503): once the queue is deeper than `max_queue_depth` or the
+#    estimated wait exceeds `max_wait_seconds`, new work is refused with a Retry-After
+#    instead of joining a queue nobody will reach for hours.
+# 3. Bulk submissions (POST /projects/batch) have a bucket of their own, sized for hundreds
+#    of goals, and only the backlog already queued counts against the wait budget (a bulk
+#    import expects its own jobs to take a while). A batch that could never be admitted,
+#    however long the caller waits, is refused with 413 rather than a retryable status.
+
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from redis.asyncio import Redis as AsyncRedis
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_KEY = "ratelimit:projects:{owner_id}"
+BULK_RATE_LIMIT_KEY = "ratelimit:projects-bulk:{owner_id}"
+
+# KEYS[1] = bucket; ARGV = rate (tokens/s), burst, cost. Uses the Redis clock so pods agree.
+_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or burst
+local ts = tonumber(data[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+
+@dataclass
+class AdmissionDecision:
+    allowed: bool
+    status_code: int = 200
+    retry_after_seconds: int = 0
+    reason: str = ""
+
+
+class TokenBucketLimiter:
+    """Per-owner token bucket, in Redis with a process-local fallback."""
+
+    def __init__(self, redis_conn: Optional[AsyncRedis], rate_per_minute: float, burst: int, key: str = RATE_LIMIT_KEY):
+        self.redis = redis_conn
+        self.rate_per_second = rate_per_minute / 60.0
+        self.burst = burst
+        self.key = key
+        self._local: Dict[str, Tuple[float, float]] = {}
+
+    def _take_local(self, owner_id: str, cost: int) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, ts = self._local.get(owner_id, (float(self.burst), now))
+        tokens = min(self.burst, tokens + (now - ts) * self.rate_per_second)
+        if tokens >= cost:
+            self._local[owner_id] = (tokens - cost, now)
+            return True, 0.0
+        self._local[owner_id] = (tokens, now)
+        return False, (cost - tokens) / self.rate_per_second
+
+    async def take(self, owner_id: str, cost: int = 1) -> Tuple[bool, float]:
+        """Consumes `cost` tokens. Returns (allowed, seconds until enough tokens are available)."""
+        if cost > self.burst:
+            return False, math.inf
+        if self.redis is not None:
+            try:
+                allowed, retry_after = await self.redis.eval(
+                    _TOKEN_BUCKET, 1, self.key.format(owner_id=owner_id),
+                    self.rate_per_second, self.burst, cost
+                )
+                return bool(int(allowed)), float(retry_after)
+            except Exception as e:
+                logger.warning(f"Rate limiter falling back to local buckets: {e}")
+        return self._take_local(owner_id, cost)
+
+
+class AdmissionController:
+    """Combines the per-owner rate limit with queue-depth backpressure."""
+
+    def __init__(
+        self,
+        limiter: TokenBucketLimiter,
+        queue_depth: Callable[[], Awaitable[int]],
+        max_queue_depth: int,
+        max_wait_seconds: float,
+        avg_job_seconds: float,
+        num_workers: int,
+        depth_cache_seconds: float = 1.0,
+        bulk_limiter: Optional[TokenBucketLimiter] = None,
+    ):
+        self.limiter = limiter
+        self.bulk_limiter = bulk_limiter or limiter
+        self._queue_depth = queue_depth
+        self.max_queue_depth = max_queue_depth
+        self.max_wait_seconds = max_wait_seconds
+        self.avg_job_seconds = avg_job_seconds
+        self.num_workers = max(1, num_workers)
+        self.depth_cache_seconds = depth_cache_seconds
+        self._depth: Optional[int] = None
+        self._depth_checked_at = 0.0
+
+    async def queue_depth(self) -> Optional[int]:
+        """Queue length, cached briefly so admission checks don't hit Redis on every request."""
+        now = time.monotonic()
+        if self._depth is None or now - self._depth_checked_at > self.depth_cache_seconds:
+            try:
+                self._depth = await self._queue_depth()
+            except Exception as e:
+                logger.warning(f"Could not read agent queue depth: {e}")
+                self._depth = None
+            self._depth_checked_at = now
+        return self._depth
+
+    def estimated_wait_seconds(self, depth: int) -> float:
+        return depth * self.avg_job_seconds / self.num_workers
+
+    def _saturated(self, depth: int, cost: int, wait: float) -> Optional[AdmissionDecision]:
+        """503 if `cost` more jobs on a queue of `depth` exceed the depth or wait budget."""
+        if depth + cost > self.max_queue_depth or wait > self.max_wait_seconds:
+            # Roughly how long until the backlog drains below the threshold
+            excess = max(depth + cost - self.max_queue_depth, 0) * self.avg_job_seconds / self.num_workers
+            retry_after = max(excess, wait - self.max_wait_seconds, 1.0)
+            return AdmissionDecision(False, 503, math.ceil(retry_after), "Agent queue is at capacity.")
+        return None
+
+    @staticmethod
+    async def _take(limiter: TokenBucketLimiter, owner_id: str, cost: int) -> AdmissionDecision:
+        allowed, retry_after = await limiter.take(owner_id, cost)
+        if not allowed:
+            if math.isinf(retry_after):
+                return AdmissionDecision(False, 429, 60, "Request exceeds the per-user burst limit.")
+            return AdmissionDecision(False, 429, max(1, math.ceil(retry_after)), "Rate limit exceeded.")
+        return AdmissionDecision(True)
+
+    async def admit(self, owner_id: str, cost: int = 1) -> AdmissionDecision:
+        """Decides whether `cost` new jobs for `owner_id` may be enqueued now."""
+        # 1. Global backpressure first: a refused request must not spend the owner's tokens
+        depth = await self.queue_depth()
+        if depth is not None:
+            refused = self._saturated(depth, cost, self.estimated_wait_seconds(depth + cost))
+            if refused is not None:
+                return refused
+
+        # 2. Per-owner rate limit
+        return await self._take(self.limiter, owner_id, cost)
+
+    def max_bulk_cost(self) -> int:
+        """The largest bulk submission that can ever be admitted."""
+        return min(self.bulk_limiter.burst, self.max_queue_depth)
+
+    async def admit_bulk(self, owner_id: str, cost: int) -> AdmissionDecision:
+        """
+        Decides whether a bulk submission of `cost` jobs may be enqueued now, against the
+        owner's bulk bucket. 413 if it exceeds max_bulk_cost() (retrying cannot help).
+        """
+        if cost > self.max_bulk_cost():
+            return AdmissionDecision(
+                False, 413, 0, f"A bulk submission may contain at most {self.max_bulk_cost()} jobs."
+            )
+
+        depth = await self.queue_depth()
+        if depth is not None:
+            # Only the backlog ahead of the batch counts against the wait budget
+            refused = self._saturated(depth, cost, self.estimated_wait_seconds(depth))
+            if refused is not None:
+                return refused
+
+        return await self._take(self.bulk_limiter, owner_id, cost)
+
+
+def admission_settings_from_env() -> Dict[str, float]:
+    """Admission thresholds (env-configurable, like the rest of the service settings)."""
+    return {
+        "rate_per_minute": float(os.getenv("RATE_LIMIT_PROJECTS_PER_MINUTE", "10")),
+        "burst": int(os.getenv("RATE_LIMIT_PROJECTS_BURST", "20")),
+        "bulk_rate_per_minute": float(os.getenv("RATE_LIMIT_BULK_PROJECTS_PER_MINUTE", "50")),
+        "bulk_burst": int(os.getenv("RATE_LIMIT_BULK_PROJECTS_BURST", "500")),
+        "max_queue_depth": int(os.getenv("ADMISSION_MAX_QUEUE_DEPTH", "1000")),
+        "max_wait_seconds": float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "900")),
+        "avg_job_seconds": float(os.getenv("AGENT_JOB_AVG_SECONDS", "30")),
+        "num_workers": int(os.getenv("AGENT_WORKER_COUNT", "4")),
+    }
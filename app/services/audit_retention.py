@@ -0,0 +1,79 @@
+# app/services/audit_retention.py
+
+# Retention for the audit log: moves cold entries out of audit_log_entries into compressed
+# archive segments (app/db/audit_archive.py), so the hot table and its indexes only hold
+# what is still being written and read. Cold means older than AUDIT_ARCHIVE_AFTER_DAYS, or
+# belonging to a finished project. Reads through ProjectRepository stay unchanged: archived
+# entries are merged back in (the index lets them skip segments outside the range).
+# Each run also deletes the archived segments of projects that have been deleted.
+#
+# Run it periodically (cron, or an RQ scheduled job):  python -m app.services.audit_retention
+
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from app.db.audit_archive_repository import AuditArchiveRepository
+
+logger = logging.getLogger(__name__)
+
+AUDIT_ARCHIVE_AFTER_DAYS = int(os.getenv("AUDIT_ARCHIVE_AFTER_DAYS", "30"))
+AUDIT_ARCHIVE_SEGMENT_ENTRIES = int(os.getenv("AUDIT_ARCHIVE_SEGMENT_ENTRIES", "10000"))
+AUDIT_ARCHIVE_DELETE_BATCH = int(os.getenv("AUDIT_ARCHIVE_DELETE_BATCH", "1000"))
+
+
+class AuditRetentionService:
+    """Archives cold audit entries, one bounded segment (and transaction) at a time."""
+
+    def __init__(
+        self,
+        repository: AuditArchiveRepository,
+        archive_after_days: int = AUDIT_ARCHIVE_AFTER_DAYS,
+        segment_entries: int = AUDIT_ARCHIVE_SEGMENT_ENTRIES,
+        delete_batch_size: int = AUDIT_ARCHIVE_DELETE_BATCH,
+    ):
+        self._repo = repository
+        self.archive_after = timedelta(days=archive_after_days)
+        self.segment_entries = segment_entries
+        self.delete_batch_size = delete_batch_size
+
+    def run(self, now: Optional[datetime] = None, max_projects: int = 100) -> Dict[str, int]:
+        """
+        Archives what is cold right now, for up to `max_projects` projects.
+
+        Returns:
+            Counts: projects, segments and entries archived, archive bytes written, and
+            deleted projects whose segments were removed.
+        """
+        cutoff = (now or datetime.now(timezone.utc)) - self.archive_after
+        stats = {"projects": 0, "segments": 0, "entries": 0, "bytes": 0, "purged_projects": 0}
+
+        for project_id, finished in self._repo.find_archivable_projects(cutoff, limit=max_projects):
+            # Archived rows leave the hot table, so each round picks up where the last ended
+            while True:
+                rows = self._repo.archivable_entries(project_id, None if finished else cutoff, self.segment_entries)
+                if not rows:
+                    break
+                segment = self._repo.archive_entries(project_id, rows, self.delete_batch_size)
+                stats["segments"] += 1
+                stats["entries"] += segment.entry_count
+                stats["bytes"] += segment.byte_size
+                if len(rows) < self.segment_entries:
+                    break
+            stats["projects"] += 1
+
+        stats["purged_projects"] = self._repo.delete_orphaned_archives()
+        logger.info(f"Audit log retention run complete", extra={"cutoff": cutoff.isoformat(), **stats})
+        return stats
+
+
+if __name__ == '__main__':
+    from app.database import SessionLocal
+    from app.db.audit_archive import get_audit_archive_store
+
+    db = SessionLocal()
+    try:
+        AuditRetentionService(AuditArchiveRepository(db, get_audit_archive_store())).run()
+    finally:
+        db.close()
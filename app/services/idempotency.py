@@ -0,0 +1,227 @@
+# app/services/idempotency.py
+
+# Idempotency-Key support for non-idempotent POSTs (IETF draft "The Idempotency-Key HTTP
+# Header Field").
+#
+# A record per (owner_id, key) moves through two states:
+#   in_flight  -> created atomically (SET NX) by the first request, with a short lock TTL
+#   completed  -> the stored response, kept for `ttl_seconds` and replayed to every retry
+# Concurrent duplicates poll until the first request completes, then replay its response.
+# If the first request fails, the record is released so a later retry can do the work.
+# While the owner is still working, a heartbeat keeps extending the lock TTL, so slow
+# requests (large uploads) never lose the lock to a retry. The heartbeat gives up after
+# `max_lock_seconds`: a lock whose owner never completed nor released it (a leak) then
+# expires on its own one lock TTL later.
+#
+# Without Redis, or when Redis cannot be reached, records are process-local: duplicates are
+# then only detected within one pod, which is still better than failing the request.
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from fastapi import UploadFile
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_KEY = "idempotency:{owner_id}:{key_hash}"
+
+
+class IdempotencyError(Exception):
+    """Base class for Idempotency-Key protocol errors."""
+
+
+class IdempotencyKeyReused(IdempotencyError):
+    """The key was already used with a different request payload."""
+
+
+class IdempotencyInFlight(IdempotencyError):
+    """The original request is still running after the wait budget was exhausted."""
+
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "status_code": self.status_code,
+            "body": self.body.decode(),
+            "headers": self.headers,
+        })
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StoredResponse":
+        return cls(status_code=data["status_code"], body=data["body"].encode(), headers=data["headers"])
+
+
+def request_fingerprint(*parts: object) -> str:
+    """Hash of the request payload, used to reject a key reused for a different request."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode())
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+async def upload_digest(upload: UploadFile, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of an uploaded file's content (for request_fingerprint); rewinds the file."""
+    digest = hashlib.sha256()
+    await upload.seek(0)
+    while chunk := await upload.read(chunk_size):
+        digest.update(chunk)
+    await upload.seek(0)
+    return digest.hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Redis-backed (shared by all pods) idempotency records, process-local without Redis or
+    while Redis is unreachable.
+    """
+
+    def __init__(
+        self,
+        redis_conn: Optional[AsyncRedis] = None,
+        ttl_seconds: int = 24 * 3600,
+        lock_ttl_seconds: int = 120,
+        wait_timeout_seconds: float = 30.0,
+        poll_interval_seconds: float = 0.05,
+        max_lock_seconds: float = 15 * 60,
+    ):
+        self.redis = redis_conn
+        self.ttl_seconds = ttl_seconds
+        self.lock_ttl_seconds = lock_ttl_seconds
+        self.max_lock_seconds = max_lock_seconds
+        self.wait_timeout_seconds = wait_timeout_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self._local: Dict[str, dict] = {}
+        self._local_events: Dict[str, asyncio.Event] = {}
+        self._heartbeats: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def _record_key(owner_id: str, key: str) -> str:
+        key_hash = hashlib.sha256(key.encode()).hexdigest()
+        return IDEMPOTENCY_KEY.format(owner_id=owner_id, key_hash=key_hash)
+
+    def _is_local(self, record_key: str) -> bool:
+        """Whether the record lives in this process (no Redis, or Redis was unreachable)."""
+        return self.redis is None or record_key in self._local
+
+    async def _try_acquire(self, record_key: str, fingerprint: str) -> Optional[dict]:
+        """Creates the in-flight record. Returns None if acquired, else the existing record."""
+        in_flight = {"state": "in_flight", "fingerprint": fingerprint}
+        if not self._is_local(record_key):
+            try:
+                if await self.redis.set(record_key, json.dumps(in_flight), nx=True, ex=self.lock_ttl_seconds):
+                    self._start_heartbeat(record_key)
+                    return None
+                raw = await self.redis.get(record_key)
+                # Released or expired between SET and GET: report "in flight" so the caller retries
+                return json.loads(raw) if raw is not None else in_flight
+            except RedisError as e:
+                logger.warning(f"Idempotency store unavailable, using process-local records: {e}")
+
+        existing = self._local.get(record_key)
+        if existing is None or existing.get("expires_at", float("inf")) < time.monotonic():
+            self._local[record_key] = in_flight
+            self._local_events[record_key] = asyncio.Event()
+            return None
+        return existing
+
+    def _start_heartbeat(self, record_key: str) -> None:
+        async def extend_lock() -> None:
+            give_up_at = time.monotonic() + self.max_lock_seconds
+            while time.monotonic() < give_up_at:
+                await asyncio.sleep(self.lock_ttl_seconds / 3)
+                try:
+                    await self.redis.expire(record_key, self.lock_ttl_seconds)
+                except RedisError as e:
+                    logger.warning(f"Failed to extend idempotency lock: {e}")
+
+        self._heartbeats[record_key] = asyncio.create_task(extend_lock())
+
+    async def _stop_heartbeat(self, record_key: str) -> None:
+        """Stops extending the lock (before the record is completed or released)."""
+        task = self._heartbeats.pop(record_key, None)
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def begin(self, owner_id: str, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        """
+        Claims the key for this request.
+
+        Returns:
+            None if the caller now owns the key and must do the work (then call
+            complete() or release()), or the stored response to replay.
+
+        Raises:
+            IdempotencyKeyReused: The key belongs to a different payload.
+            IdempotencyInFlight: The original request did not finish within the wait budget.
+        """
+        record_key = self._record_key(owner_id, key)
+        deadline = time.monotonic() + self.wait_timeout_seconds
+
+        while True:
+            record = await self._try_acquire(record_key, fingerprint)
+            if record is None:
+                return None
+            if record["fingerprint"] != fingerprint:
+                raise IdempotencyKeyReused(key)
+            if record["state"] == "completed":
+                return StoredResponse.from_dict(record["response"])
+
+            # A duplicate of a request that is still running: wait for its outcome
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise IdempotencyInFlight(key)
+            if self._is_local(record_key):
+                try:
+                    await asyncio.wait_for(self._local_events[record_key].wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    raise IdempotencyInFlight(key)
+            else:
+                await asyncio.sleep(min(self.poll_interval_seconds, remaining))
+
+    async def complete(self, owner_id: str, key: str, fingerprint: str, response: StoredResponse) -> None:
+        """Stores the response of the request that owns the key (replayed to every retry)."""
+        record_key = self._record_key(owner_id, key)
+        record = {"state": "completed", "fingerprint": fingerprint, "response": json.loads(response.to_json())}
+        if self._is_local(record_key):
+            record["expires_at"] = time.monotonic() + self.ttl_seconds
+            self._local[record_key] = record
+            self._local_events.pop(record_key).set()
+            return
+        await self._stop_heartbeat(record_key)
+        try:
+            await self.redis.set(record_key, json.dumps(record), ex=self.ttl_seconds)
+        except Exception as e:
+            # The work is done; failing to record it only means a retry may repeat it
+            logger.error(f"Failed to store idempotent response: {e}")
+
+    async def release(self, owner_id: str, key: str) -> None:
+        """Drops the in-flight record after a failure so a retry can redo the work."""
+        record_key = self._record_key(owner_id, key)
+        if self._is_local(record_key):
+            self._local.pop(record_key, None)
+            event = self._local_events.pop(record_key, None)
+            if event is not None:
+                event.set()
+            return
+        await self._stop_heartbeat(record_key)
+        try:
+            await self.redis.delete(record_key)
+        except Exception as e:
+            logger.error(f"Failed to release idempotency key: {e}")
@@ -0,0 +1,132 @@
+# app/services/plan_reuse.py
+
+# Plan reuse for near-duplicate research goals.
+#
+# At project creation the goal's MinHash signature (character shingles, app/utils/minhash.py)
+# and the fingerprints of its attachments (content_sha256) are indexed. Earlier projects that
+# share an LSH bucket, already have a plan, and are similar enough on BOTH counts (estimated
+# goal Jaccard and attachment-set Jaccard >= threshold) are near-duplicates; the closest
+# one's refined goal and task plan are handed to the PI agent as a "warm start":
+#
+#   PLAN_REUSE_MODE=warm_start  (default) suggest only: the agent still plans, with the
+#                               earlier plan as a draft
+#   PLAN_REUSE_MODE=reuse       the plan is copied (no model call): duplicate planning is a lookup
+#   PLAN_REUSE_MODE=off         signatures are still indexed, nothing is offered
+#
+# PLAN_REUSE_SCOPE is "owner" by default: plans are only shared between a user's own projects,
+# since a refined goal can carry details of the user who asked. "global" matches across users.
+
+import logging
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.db.goal_index_repository import GoalIndexRepository
+from app.db.models import GoalSignature
+from app.utils.minhash import estimate_similarity, lsh_buckets, minhash, pack_signature, shingles, unpack_signature
+
+logger = logging.getLogger(__name__)
+
+PLAN_REUSE_MODE = os.getenv("PLAN_REUSE_MODE", "warm_start")
+PLAN_REUSE_THRESHOLD = float(os.getenv("PLAN_REUSE_THRESHOLD", "0.7"))
+PLAN_REUSE_SCOPE = os.getenv("PLAN_REUSE_SCOPE", "owner")
+
+
+def _jaccard(left: Sequence[str], right: Sequence[str]) -> float:
+    a, b = set(left), set(right)
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class PlanReuseService:
+    """Indexes research goals and finds plans to reuse for near-duplicates."""
+
+    def __init__(
+        self,
+        repository: GoalIndexRepository,
+        threshold: float = PLAN_REUSE_THRESHOLD,
+        mode: str = PLAN_REUSE_MODE,
+        scope: str = PLAN_REUSE_SCOPE,
+    ):
+        if mode not in ("reuse", "warm_start", "off"):
+            raise ValueError(f"Unknown PLAN_REUSE_MODE: {mode}")
+        if scope not in ("owner", "global"):
+            raise ValueError(f"Unknown PLAN_REUSE_SCOPE: {scope}")
+        self._repo = repository
+        self.threshold = threshold
+        self.mode = mode
+        self.scope = scope
+
+    def index_and_match(
+        self,
+        project_id: str,
+        owner_id: str,
+        research_goal: str,
+        document_fingerprints: Sequence[Optional[str]] = (),
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Indexes the new project and returns the warm start for its closest earlier
+        near-duplicate (None if there is none, or reuse is off). Blocking: run it in the
+        threadpool.
+
+        Returns:
+            {mode, scope, source_project_id, similarity, refined_research_goal,
+             tasks: [{id, description, depends_on}]}
+        """
+        signature = minhash(shingles(research_goal))
+        buckets = lsh_buckets(signature)
+        fingerprints = sorted({fp for fp in document_fingerprints if fp})
+
+        warm_start = self._best_match(project_id, owner_id, signature, buckets, fingerprints) if self.mode != "off" else None
+
+        self._repo.add_signature(
+            GoalSignature(
+                project_id=project_id,
+                owner_id=owner_id,
+                minhash=pack_signature(signature),
+                document_fingerprints=fingerprints or None,
+            ),
+            buckets,
+        )
+        return warm_start
+
+    def _best_match(
+        self,
+        project_id: str,
+        owner_id: str,
+        signature: List[int],
+        buckets: List[str],
+        fingerprints: List[str],
+    ) -> Optional[Dict[str, Any]]:
+        candidates = self._repo.find_candidates(
+            buckets, exclude_project_id=project_id, owner_id=owner_id if self.scope == "owner" else None
+        )
+        best = None
+        for candidate, project in candidates:
+            similarity = estimate_similarity(signature, unpack_signature(candidate.minhash))
+            if similarity < self.threshold:
+                continue
+            if _jaccard(fingerprints, candidate.document_fingerprints or []) < self.threshold:
+                continue
+            if best is None or similarity > best[0]:
+                best = (similarity, project)
+        if best is None:
+            return None
+
+        similarity, project = best
+        tasks = self._repo.get_plan_tasks(project.project_id)
+        logger.info(
+            "Near-duplicate research goal found",
+            extra={"project_id": project_id, "source_project_id": project.project_id, "similarity": similarity}
+        )
+        return {
+            "mode": self.mode,
+            "scope": self.scope,
+            "source_project_id": project.project_id,
+            "similarity": round(similarity, 3),
+            "refined_research_goal": project.refined_research_goal,
+            "tasks": [
+                {"id": task.task_id, "description": task.description, "depends_on": task.depends_on or []}
+                for task in tasks
+            ],
+        }
@@ -0,0 +1,214 @@
+# app/services/project_bundle.py
+
+# Project bundles: a whole project as ONE streaming tar archive, for moving projects between
+# environments and archiving cold ones.
+#
+#   files/<file_id>     raw bytes of every ProjectFile (local or object store)
+#   manifest.ndjson     {"type": "bundle", "data": {...}} header line, then one line per row:
+#                       project, file, message, task, audit (see BUNDLE_MODELS)
+#
+# Blobs come first and the manifest last, so an importer reading the archive front to back
+# can write blobs straight to storage and then insert every row in one transaction.
+# Imported file rows always point at the blob written from THIS archive: a file row without
+# a blob is rejected, since a storage_path taken from an uploaded manifest could name any
+# local path or another project's object.
+# Both directions are constant-memory: rows are fetched/inserted in batches, blobs are copied
+# in fixed-size chunks, and the only buffered piece (the manifest, whose size a tar header
+# needs up front) goes to a SpooledTemporaryFile that spills to disk.
+
+import hashlib
+import logging
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Tuple
+
+from app.db.project_repository import ProjectRepository
+from app.services.project_service import FileStorageService
+from app.utils.serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.ndjson"
+BLOB_PREFIX = "files/"
+CHUNK_SIZE = 64 * 1024
+# Manifests up to this size stay in memory; larger ones spill to a temp file
+MANIFEST_SPOOL_SIZE = 4 * 1024 * 1024
+
+
+class BundleError(Exception):
+    """The uploaded archive is not a valid project bundle."""
+
+
+def tar_entry(name: str, size: int, chunks: Iterator[bytes], mtime: float) -> Iterator[bytes]:
+    """One tar member (PAX header, data, padding to the 512-byte block size) as a byte stream."""
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = int(mtime)
+    info.mode = 0o644
+    yield info.tobuf(format=tarfile.PAX_FORMAT)
+    written = 0
+    for chunk in chunks:
+        written += len(chunk)
+        yield chunk
+    if written != size:
+        raise BundleError(f"{name} changed size while being exported")
+    if size % tarfile.BLOCKSIZE:
+        yield tarfile.NUL * (tarfile.BLOCKSIZE - size % tarfile.BLOCKSIZE)
+
+
+def _read_chunks(fileobj: BinaryIO) -> Iterator[bytes]:
+    return iter(lambda: fileobj.read(CHUNK_SIZE), b"")
+
+
+class ProjectBundleService:
+    """Streaming export and bulk import of project bundles."""
+
+    def __init__(self, repository: ProjectRepository, storage: FileStorageService):
+        self._repo = repository
+        self._storage = storage
+
+    # --- Export ---
+
+    def export_bundle(self, project_id: str) -> Iterator[bytes]:
+        """
+        The project as a tar stream. A synchronous generator: StreamingResponse iterates it
+        in the threadpool.
+        """
+        now = time.time()
+        with tempfile.SpooledTemporaryFile(max_size=MANIFEST_SPOOL_SIZE) as manifest:
+            manifest.write(dumps({
+                "type": "bundle",
+                "data": {
+                    "format_version": BUNDLE_FORMAT_VERSION,
+                    "project_id": project_id,
+                    "exported_at": datetime.now(timezone.utc),
+                },
+            }) + b"\n")
+
+            blobs = []
+            for record_type, row in self._repo.iter_project_records(project_id):
+                if record_type == "file":
+                    # Every file's bytes travel in the bundle (imports never trust a path)
+                    path = row["storage_path"]
+                    if not path.startswith("s3://") and not os.path.isfile(path):
+                        logger.warning(f"Exporting {project_id}: stored file missing, row skipped: {path}")
+                        continue
+                    blobs.append((row["file_id"], path))
+                manifest.write(dumps({"type": record_type, "data": row}) + b"\n")
+
+            for file_id, path in blobs:
+                with self._storage.open_stored_file(path) as (blob, size):
+                    yield from tar_entry(f"{BLOB_PREFIX}{file_id}", size, _read_chunks(blob), now)
+
+            size = manifest.tell()
+            manifest.seek(0)
+            yield from tar_entry(MANIFEST_NAME, size, _read_chunks(manifest), now)
+
+        # End of archive: two empty blocks
+        yield tarfile.NUL * (2 * tarfile.BLOCKSIZE)
+
+    # --- Import ---
+
+    def import_bundle(self, owner_id: str, archive: BinaryIO) -> Tuple[str, str]:
+        """
+        Imports a bundle as a NEW project owned by `owner_id` (every ID is regenerated, so a
+        bundle can be imported into the environment it came from). Blocking: run it in the
+        threadpool.
+
+        Returns:
+            (new project_id, the project_id recorded in the bundle)
+
+        Raises:
+            BundleError: Malformed archive, unsupported version, a file row without its
+                blob or a checksum mismatch.
+        """
+        project_id = str(uuid.uuid4())
+        project_dir = self._storage.base_path / project_id
+        new_file_ids: Dict[str, str] = {}
+        blob_paths: Dict[str, Tuple[str, int, str]] = {}
+        try:
+            with tarfile.open(fileobj=archive, mode="r|") as tar:
+                for member in tar:
+                    if not member.isfile():
+                        continue
+                    stream = tar.extractfile(member)
+                    if member.name.startswith(BLOB_PREFIX):
+                        old_file_id = member.name[len(BLOB_PREFIX):]
+                        new_file_id = new_file_ids.setdefault(old_file_id, str(uuid.uuid4()))
+                        blob_paths[old_file_id] = self._write_blob(project_dir, new_file_id, stream)
+                    elif member.name == MANIFEST_NAME:
+                        header = loads(stream.readline() or b"{}")
+                        if header.get("type") != "bundle" or header["data"].get("format_version") != BUNDLE_FORMAT_VERSION:
+                            raise BundleError("Unsupported bundle format")
+                        inserted = self._repo.import_project_records(
+                            self._remap_records(stream, project_id, owner_id, new_file_ids, blob_paths)
+                        )
+                        logger.info(f"Imported bundle into {project_id} ({inserted} rows)")
+                        return project_id, header["data"]["project_id"]
+            raise BundleError("Bundle has no manifest")
+        except (tarfile.TarError, ValueError, KeyError) as e:
+            shutil.rmtree(project_dir, ignore_errors=True)
+            raise BundleError(str(e)) from e
+        except Exception:
+            shutil.rmtree(project_dir, ignore_errors=True)
+            raise
+
+    @staticmethod
+    def _write_blob(project_dir: Path, file_id: str, stream: BinaryIO) -> Tuple[str, int, str]:
+        """Copies one blob to storage, hashing it on the way. Returns (path, size, sha256)."""
+        project_dir.mkdir(parents=True, exist_ok=True)
+        path = project_dir / file_id
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, "wb") as f:
+            for chunk in _read_chunks(stream):
+                digest.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+        return str(path), size, digest.hexdigest()
+
+    def _remap_records(
+        self,
+        manifest: BinaryIO,
+        project_id: str,
+        owner_id: str,
+        new_file_ids: Dict[str, str],
+        blob_paths: Dict[str, Tuple[str, int, str]],
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Parses the remaining manifest lines lazily, giving every row a new ID under the new project."""
+        id_columns = {"file": "file_id", "message": "message_id", "task": "task_id", "audit": "entry_id"}
+        # Tasks reference each other through depends_on, so their new IDs are looked up, not drawn
+        new_task_ids: Dict[str, str] = {}
+        for line in manifest:
+            if not line.strip():
+                continue
+            record = loads(line)
+            record_type, data = record["type"], record["data"]
+            if record_type == "project":
+                data.update(project_id=project_id, owner_id=owner_id)
+            else:
+                data["project_id"] = project_id
+                id_column = id_columns.get(record_type)
+                if record_type == "file":
+                    old_file_id = data["file_id"]
+                    if old_file_id not in blob_paths:
+                        raise BundleError(f"File {old_file_id} has no blob in the bundle")
+                    data["file_id"] = new_file_ids[old_file_id]
+                    path, size, sha256 = blob_paths[old_file_id]
+                    if data.get("content_sha256") and data["content_sha256"] != sha256:
+                        raise BundleError(f"Checksum mismatch for file {old_file_id}")
+                    data.update(storage_path=path, file_size=size, content_sha256=sha256)
+                elif record_type == "task":
+                    data["task_id"] = new_task_ids.setdefault(data["task_id"], str(uuid.uuid4()))
+                    if data.get("depends_on"):
+                        data["depends_on"] = [new_task_ids.setdefault(dep, str(uuid.uuid4())) for dep in data["depends_on"]]
+                elif id_column:
+                    data[id_column] = str(uuid.uuid4())
+            yield record_type, data
@@ -0,0 +1,305 @@
+# app/services/project_events.py
+
+# Project event fan-out for the SSE endpoint.
+#
+# Worker side: diff the state before/after an agent run and publish one event per change.
+#   Each event is XADDed to a capped per-project Redis stream (the resume log, its id is the
+#   SSE event id) and then PUBLISHed on a single shared channel.
+# API side: ONE pub/sub connection per pod listens on that channel and fans messages out to
+#   in-memory queues, one per open SSE connection. An idle stream therefore costs a queue and a
+#   suspended coroutine - no Redis connection and no DB session.
+#   A client resuming from an event the log no longer holds (trimmed, or the stream expired)
+#   gets a "reset" event instead of a silent gap: it should refetch the full state.
+
+import asyncio
+import json
+import logging
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+from app.agents.base import VirtualLabState
+from app.schemas.project import ProjectEvent
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = "project-events"
+EVENT_STREAM_KEY = "project-events:{project_id}"
+# Last-Event-ID values the resume log can look up ('<ms>' or '<ms>-<seq>')
+EVENT_ID_PATTERN = re.compile(r"^\d+(-\d+)?$")
+
+
+def _stream_key(project_id: str) -> str:
+    return EVENT_STREAM_KEY.format(project_id=project_id)
+
+
+def _parse_event_id(event_id: str) -> Tuple[int, int]:
+    """Redis stream ids are '<ms>-<seq>'; compare them numerically, not as strings."""
+    ms, _, seq = event_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+def is_valid_event_id(event_id: str) -> bool:
+    return EVENT_ID_PATTERN.fullmatch(event_id) is not None
+
+
+def _decode(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+# --- Worker side: state diffing and publishing ---
+
+@dataclass
+class StateSnapshot:
+    """The parts of a VirtualLabState needed to detect what an agent run changed."""
+    current_phase: str
+    num_messages: int
+    num_audit_entries: int
+    tasks: Dict[str, Tuple[str, Any]] = field(default_factory=dict)
+
+
+def snapshot_state(state: VirtualLabState) -> StateSnapshot:
+    """Captures a snapshot BEFORE the agent mutates the state in place."""
+    return StateSnapshot(
+        current_phase=state.current_phase,
+        num_messages=len(state.messages),
+        num_audit_entries=len(state.audit_log),
+        tasks={task.id: (task.status, task.result) for task in state.task_list},
+    )
+
+
+def diff_state_events(project_id: str, before: StateSnapshot, after: VirtualLabState) -> List[ProjectEvent]:
+    """
+    Returns the events describing how `after` differs from `before`, in the order a client
+    should apply them: phase transition, new messages, task changes, new audit entries.
+    """
+    events: List[ProjectEvent] = []
+
+    if after.current_phase != before.current_phase:
+        events.append(ProjectEvent(
+            event="phase_changed",
+            project_id=project_id,
+            data={
+                "previous_phase": before.current_phase,
+                "current_phase": after.current_phase,
+                "next_agent": after.next_agent,
+            },
+        ))
+
+    for message in after.messages[before.num_messages:]:
+        events.append(ProjectEvent(event="message", project_id=project_id, data=message.model_dump(mode="json")))
+
+    for task in after.task_list:
+        if before.tasks.get(task.id) != (task.status, task.result):
+            events.append(ProjectEvent(event="task_updated", project_id=project_id, data=task.model_dump(mode="json")))
+
+    for entry in after.audit_log[before.num_audit_entries:]:
+        events.append(ProjectEvent(event="audit", project_id=project_id, data=entry.model_dump(mode="json")))
+
+    return events
+
+
+class ProjectEventPublisher:
+    """Synchronous publisher used by the RQ worker."""
+
+    def __init__(self, redis_conn: Redis, max_stream_length: int = 1000, stream_ttl_seconds: int = 24 * 3600):
+        self.redis = redis_conn
+        self.max_stream_length = max_stream_length
+        self.stream_ttl_seconds = stream_ttl_seconds
+
+    def publish(self, project_id: str, events: List[ProjectEvent]) -> List[str]:
+        """
+        Appends the events to the project's resume log and notifies every API pod.
+        Returns the assigned event ids.
+        """
+        if not events:
+            return []
+
+        key = _stream_key(project_id)
+
+        # 1. Append to the capped stream (one round trip); the ids are needed for the notifications
+        pipe = self.redis.pipeline(transaction=False)
+        for event in events:
+            pipe.xadd(
+                key,
+                {"event": event.event, "data": json.dumps(event.data)},
+                maxlen=self.max_stream_length,
+                approximate=True,
+            )
+        pipe.expire(key, self.stream_ttl_seconds)
+        event_ids = [_decode(event_id) for event_id in pipe.execute()[:-1]]
+
+        # 2. Fan the events out to the pods' listeners (second round trip)
+        pipe = self.redis.pipeline(transaction=False)
+        for event_id, event in zip(event_ids, events):
+            pipe.publish(EVENTS_CHANNEL, json.dumps({
+                "id": event_id,
+                "project_id": project_id,
+                "event": event.event,
+                "data": event.data,
+            }))
+        pipe.execute()
+
+        logger.debug(
+            "Project events published",
+            extra={"project_id": project_id, "num_events": len(events), "last_event_id": event_ids[-1]},
+        )
+        return event_ids
+
+
+# --- API side: one listener per pod, fanned out to SSE connections ---
+
+@dataclass
+class StreamedEvent:
+    id: str
+    event: str
+    data: Dict[str, Any]
+
+
+_OVERFLOW = StreamedEvent(id="", event="__overflow__", data={})
+# Sent when the requested resume point is gone from the log; the empty id clears the
+# client's Last-Event-ID
+RESET_EVENT = StreamedEvent(id="", event="reset", data={"reason": "resume point no longer available, refetch the project state"})
+
+
+def format_sse(event: StreamedEvent) -> bytes:
+    """Encodes one event as an SSE frame."""
+    return f"id: {event.id}\nevent: {event.event}\ndata: {json.dumps(event.data)}\n\n".encode()
+
+
+class ProjectEventBroker:
+    """
+    Fans out project events from a single Redis pub/sub subscription to many SSE connections.
+    A slow client whose queue fills up is disconnected; it reconnects with Last-Event-ID and
+    catches up from the stream, so the listener never blocks on one consumer.
+    """
+
+    def __init__(
+        self,
+        redis_conn: AsyncRedis,
+        queue_size: int = 256,
+        keepalive_seconds: float = 15.0,
+        retry_ms: int = 3000,
+    ):
+        self.redis = redis_conn
+        self.queue_size = queue_size
+        self.keepalive_seconds = keepalive_seconds
+        self.retry_ms = retry_ms
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def num_connections(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def dispatch(self, raw_message: Any) -> None:
+        """Routes one pub/sub payload to the queues subscribed to its project."""
+        payload = json.loads(_decode(raw_message))
+        queues = self._subscribers.get(payload["project_id"])
+        if not queues:
+            return
+
+        event = StreamedEvent(id=payload["id"], event=payload["event"], data=payload["data"])
+        for queue in list(queues):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Drop the slow consumer; it resumes from the stream on reconnect
+                queues.discard(queue)
+                queue.get_nowait()
+                queue.put_nowait(_OVERFLOW)
+
+    async def _listen(self) -> None:
+        """Single long-lived subscription; reconnects with backoff if Redis goes away."""
+        backoff = 0.5
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(EVENTS_CHANNEL)
+                backoff = 0.5
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        self.dispatch(message["data"])
+                    except (ValueError, KeyError) as e:
+                        logger.warning(f"Dropping malformed project event: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Project event listener lost its Redis subscription: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                await pubsub.aclose()
+
+    def _ensure_listener(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _replay(self, project_id: str, last_event_id: str) -> Optional[List[StreamedEvent]]:
+        """
+        Reads everything after `last_event_id` from the project's resume log, or returns None
+        if that event is no longer in the log. The log is only ever trimmed from the head, so
+        while the client's last event is still there, nothing after it is missing.
+        """
+        entries = await self.redis.xrange(_stream_key(project_id), min=last_event_id, max="+")
+        if not entries or _parse_event_id(_decode(entries[0][0])) != _parse_event_id(last_event_id):
+            return None
+        replayed = []
+        for event_id, fields in entries[1:]:
+            fields = {_decode(k): _decode(v) for k, v in fields.items()}
+            replayed.append(StreamedEvent(id=_decode(event_id), event=fields["event"], data=json.loads(fields["data"])))
+        return replayed
+
+    async def events(self, project_id: str, last_event_id: Optional[str] = None) -> AsyncIterator[Optional[StreamedEvent]]:
+        """
+        Yields the project's events, replaying from `last_event_id` first (RESET_EVENT if it
+        can no longer be replayed; an id that is not a stream id is ignored).
+        Yields None when the stream has been idle for `keepalive_seconds`.
+        """
+        self._ensure_listener()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        # Register BEFORE replaying so nothing published during the replay is missed
+        self._subscribers[project_id].add(queue)
+        try:
+            last_seen = None
+            if last_event_id and is_valid_event_id(last_event_id):
+                replayed = await self._replay(project_id, last_event_id)
+                if replayed is None:
+                    yield RESET_EVENT
+                else:
+                    last_seen = _parse_event_id(last_event_id)
+                    for event in replayed:
+                        last_seen = _parse_event_id(event.id)
+                        yield event
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=self.keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event is _OVERFLOW:
+                    return
+                event_key = _parse_event_id(event.id)
+                if last_seen is not None and event_key <= last_seen:
+                    continue  # already delivered by the replay
+                last_seen = event_key
+                yield event
+        finally:
+            queues = self._subscribers.get(project_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[project_id]
+
+    async def sse_stream(self, project_id: str, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """The SSE body: a retry hint, then event frames interleaved with keepalive comments."""
+        yield f"retry: {self.retry_ms}\n\n".encode()
+        async for event in self.events(project_id, last_event_id):
+            yield b": keepalive\n\n" if event is None else format_sse(event)
@@ -1,9 +1,12 @@
 # app/services/project_service.py (REFINED)
 
+import hashlib
+import os
 import uuid
 import shutil
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Type
 from fastapi import UploadFile, HTTPException, status
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
@@ -18,10 +21,23 @@ logger = logging.getLogger(__name__)
 # Conceptual imports (replace with actual classes)
 from app.db.project_repository import ProjectRepository # New: Repository for DB interaction
 from app.jobs.agent_queue import AgentQueueService # New: Service to push tasks to a worker queue
+from app.services.state_cache import ProjectStateCache, CachedProjectState, build_cached_state
+from app.services.upload_service import UploadService
+from app.services.plan_reuse import PlanReuseService
 
 # Existing models and state (Pydantic)
 from app.db.models import Project, ProjectFile, Message, Task, AuditLogEntry
 from app.agents.base import VirtualLabState, ConversationMessage, TaskItem, AuditEntry
+from app.schemas.project import ProjectSummary, ProjectListResponse
+from app.schemas.project import MessageRecord, AuditEntryRecord, MessagePage, AuditLogPage
+from pydantic import BaseModel
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.serialization import dumps
+
+try:
+    import boto3
+except ImportError:  # pragma: no cover - only needed for object-store paths
+    boto3 = None
 
 # --- Service Helper: Storage (Conceptual/Local) ---
 
@@ -53,9 +69,46 @@ class FileStorageService:
             file_size=len(content),
             storage_path=storage_path, # In Prod, this would be S3/GCS URL
             file_type=upload_file.content_type or "application/octet-stream",
-            uploaded_at=datetime.now(timezone.utc)
+            uploaded_at=datetime.now(timezone.utc),
+            content_sha256=hashlib.sha256(content).hexdigest()
+        )
+
+    def presigned_download_url(self, storage_path: str, filename: str, expires_seconds: int = 300) -> Optional[str]:
+        """
+        Short-lived GET URL for objects in an object store ("s3://bucket/key" paths), so the
+        download bypasses the API entirely. Returns None for local files.
+        """
+        if not storage_path.startswith("s3://"):
+            return None
+        if boto3 is None:
+            raise RuntimeError("boto3 is required to serve s3:// storage paths")
+        bucket, _, key = storage_path.removeprefix("s3://").partition("/")
+        return boto3.client("s3").generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": bucket,
+                "Key": key,
+                "ResponseContentDisposition": f'attachment; filename="{filename}"',
+            },
+            ExpiresIn=expires_seconds,
         )
 
+    @contextmanager
+    def open_stored_file(self, storage_path: str) -> Iterator[Tuple[BinaryIO, int]]:
+        """Opens a stored file (local, or "s3://bucket/key") for streaming. Yields (stream, size)."""
+        if not storage_path.startswith("s3://"):
+            with open(storage_path, "rb") as f:
+                yield f, os.fstat(f.fileno()).st_size
+            return
+        if boto3 is None:
+            raise RuntimeError("boto3 is required to read s3:// storage paths")
+        bucket, _, key = storage_path.removeprefix("s3://").partition("/")
+        obj = boto3.client("s3").get_object(Bucket=bucket, Key=key)
+        try:
+            yield obj["Body"], obj["ContentLength"]
+        finally:
+            obj["Body"].close()
+
     def cleanup_project_files(self, project_id: str):
         """Remove project directory on failure."""
         project_dir = self.base_path / project_id
@@ -71,32 +124,22 @@ class ProjectService:
                  repository: ProjectRepository, 
                  user_repository: UserRepository,
                  storage_service: FileStorageService,
-                 agent_queue: AgentQueueService):
+                 agent_queue: AgentQueueService,
+                 state_cache: Optional[ProjectStateCache] = None,
+                 upload_service: Optional[UploadService] = None,
+                 plan_reuse: Optional[PlanReuseService] = None):
         # Dependencies injected (IoC)
         self._repo = repository
         self._user_repo = user_repository
         self._storage = storage_service
         self._agent_queue = agent_queue
+        self._state_cache = state_cache or ProjectStateCache()
+        self._uploads = upload_service
+        self._plan_reuse = plan_reuse
     
-    async def start_new_project(
-        self,
-        owner_id: str,
-        original_research_goal: str,
-        context_docs: Optional[List[UploadFile]] = None
-    ) -> Project:
-        """
-        Initiates a new project: saves files, creates DB record, and queues agent task.
-        
-        Returns:
-            The initial Project model (202 Accepted response data).
-        """
-        logger.info(
-            "Starting new project transaction", 
-            extra={"owner_id": owner_id, "goal": original_research_goal}
-        )
-        
-
-        # 1. Create initial Project Model & State
+    @staticmethod
+    def _new_project(owner_id: str, original_research_goal: str) -> Tuple[Project, VirtualLabState]:
+        """Builds the (unsaved) Project record and its initial VirtualLabState."""
         project_id = str(uuid.uuid4())
         
         # The first message from the user
@@ -131,6 +174,78 @@ class ProjectService:
             current_phase=initial_state.current_phase,
             next_agent=initial_state.next_agent,
         )
+        return project, initial_state
+
+    async def _user_metadata(self, owner_id: str) -> Dict[str, Any]:
+        """Loads the owner's profile for the agent prompt (404 if the user is missing)."""
+        # We must use run_in_threadpool because the UserRepository call is synchronous (blocking I/O).
+        user = await run_in_threadpool(self._user_repo.get_user_by_id, owner_id)
+        
+        if not user:
+             # CRITICAL: Crash if user doesn't exist, as Auth passed but DB failed.
+             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found after authentication.")
+        
+        return {
+            "user_id": user.user_id, # Always good to pass the ID for context
+            "profession": user.profession,
+            "institution": user.institute,
+        }
+
+    def _index_goals(
+        self,
+        projects: List[Project],
+        document_fingerprints: List[Optional[str]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Indexes the new projects' goals for near-duplicate detection and returns the warm
+        starts found (project_id -> warm start). Best effort: an indexing failure costs the
+        reuse, never the project. Blocking: run it in the threadpool.
+        """
+        warm_starts: Dict[str, Dict[str, Any]] = {}
+        if self._plan_reuse is None:
+            return warm_starts
+        for project in projects:
+            try:
+                warm_start = self._plan_reuse.index_and_match(
+                    project.project_id, project.owner_id, project.original_research_goal, document_fingerprints
+                )
+            except Exception as e:
+                logger.warning(
+                    "Failed to index research goal",
+                    extra={"project_id": project.project_id, "error": str(e)}
+                )
+                continue
+            if warm_start is not None:
+                warm_starts[project.project_id] = warm_start
+        return warm_starts
+
+    async def start_new_project(
+        self,
+        owner_id: str,
+        original_research_goal: str,
+        context_docs: Optional[List[UploadFile]] = None,
+        upload_ids: Optional[List[str]] = None
+    ) -> Project:
+        """
+        Initiates a new project: saves files, creates DB record, and queues agent task.
+        `upload_ids` reference finalized resumable uploads; they are attached by metadata only.
+        
+        Raises:
+            UploadNotFound: An upload ID is unknown, unfinished or already attached.
+            UploadClaimConflict: A concurrent request attached one of the uploads first.
+        
+        Returns:
+            The initial Project model (202 Accepted response data).
+        """
+        logger.info(
+            "Starting new project transaction", 
+            extra={"owner_id": owner_id, "goal": original_research_goal}
+        )
+        
+
+        # 1. Create initial Project Model & State
+        project, initial_state = self._new_project(owner_id, original_research_goal)
+        project_id = project.project_id
         
         # 2. Store Files and Create File Records (Transactional)
         file_records: List[ProjectFile] = []
@@ -140,39 +255,42 @@ class ProjectService:
                     # Note: We rely on the storage service to handle the I/O
                     file_record = await self._storage.save_file(project_id, upload_file)
                     file_records.append(file_record)
+
+            # 2b. Reference pre-uploaded files (no bytes move)
+            if upload_ids:
+                file_records.extend(await self._uploads.resolve_for_project(owner_id, project_id, upload_ids))
             
             # 3. Persist Project and File Metadata
-            # We must use a single commit here for atomicity (Project + Files)
-            await run_in_threadpool(self._repo.create_project_and_files, project, file_records)
+            # We must use a single commit here for atomicity (Project + Files + upload claims)
+            await run_in_threadpool(
+                self._repo.create_project_and_files, project, file_records, initial_state, upload_ids or ()
+            )
 
-            # We must use run_in_threadpool because the UserRepository call is synchronous (blocking I/O).
-            user = await run_in_threadpool(self._user_repo.get_user_by_id, owner_id)
-            
-            if not user:
-                 # CRITICAL: Crash if user doesn't exist, as Auth passed but DB failed.
-                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found after authentication.")
-            
             # Construct the metadata package for the AI
-            user_metadata = {
-                "user_id": user.user_id, # Always good to pass the ID for context
-                "profession": user.profession,
-                "institution": user.institute,
-            }
+            user_metadata = await self._user_metadata(owner_id)
+
+            # 3b. Near-duplicate goals: offer an earlier plan to the PI agent
+            warm_starts = await run_in_threadpool(
+                self._index_goals, [project], [f.content_sha256 for f in file_records]
+            )
             
             # 4. Asynchronously Trigger Agent (DECOUPLED)
             # Send the core data to the queue. The worker will process it.
+            task_data = {
+                "original_research_goal": original_research_goal,
+                "context_file_paths": [f.storage_path for f in file_records],
+                "user_metadata": user_metadata,
+            }
+            if project_id in warm_starts:
+                task_data["warm_start"] = warm_starts[project_id]
             await self._agent_queue.enqueue_agent_task(
                 project_id=project_id,
                 agent_name="pi_agent",
-                task_data={
-                    "original_research_goal": original_research_goal,
-                    "context_file_paths": [f.storage_path for f in file_records],
-                    "user_metadata": user_metadata,
-                }
+                task_data=task_data
             )
             logger.info(
                 "Project created and task queued successfully", 
-                extra={"project_id": project.project_id, "user_role": user.profession}
+                extra={"project_id": project.project_id, "user_role": user_metadata["profession"]}
             )
 
             # 5. Return the newly created Project record immediately (202 Accepted)
@@ -183,6 +301,205 @@ class ProjectService:
             self._storage.cleanup_project_files(project_id)
             raise e
             
+    async def start_new_projects(
+        self,
+        owner_id: str,
+        research_goals: List[str],
+        context_docs: Optional[List[UploadFile]] = None
+    ) -> List[Project]:
+        """
+        Batch variant of start_new_project for bulk imports.
+        
+        The owner is looked up once, shared attachments are stored once (every project gets
+        its own ProjectFile row pointing at the same object), all rows are written in one
+        transaction and every agent job is enqueued in one pipelined Redis call.
+        
+        Returns:
+            The created Project models, in the order of `research_goals`.
+        """
+        logger.info("Starting batch project creation", extra={"owner_id": owner_id, "count": len(research_goals)})
+
+        # 1. Fail fast before touching storage or the DB
+        user_metadata = await self._user_metadata(owner_id)
+
+        created = [self._new_project(owner_id, goal) for goal in research_goals]
+        projects = [project for project, _ in created]
+
+        batch_key = f"batch-{uuid.uuid4()}"
+        try:
+            # 2. Store shared attachments once
+            shared_files: List[ProjectFile] = []
+            for upload_file in context_docs or []:
+                shared_files.append(await self._storage.save_file(batch_key, upload_file))
+
+            file_records = [
+                ProjectFile(
+                    file_id=str(uuid.uuid4()),
+                    project_id=project.project_id,
+                    filename=shared.filename,
+                    file_size=shared.file_size,
+                    storage_path=shared.storage_path,
+                    file_type=shared.file_type,
+                    uploaded_at=shared.uploaded_at,
+                    content_sha256=shared.content_sha256,
+                )
+                for project in projects
+                for shared in shared_files
+            ]
+
+            # 3. Persist everything in a single transaction
+            await run_in_threadpool(
+                self._repo.create_projects_bulk, projects, file_records, [state for _, state in created]
+            )
+        except Exception:
+            self._storage.cleanup_project_files(batch_key)
+            raise
+
+        # 4. Index the goals (one threadpool hop for the whole batch)
+        warm_starts = await run_in_threadpool(
+            self._index_goals, projects, [f.content_sha256 for f in shared_files]
+        )
+
+        # 5. Queue every agent job in one round trip
+        context_file_paths = [f.storage_path for f in shared_files]
+        jobs = []
+        for project in projects:
+            task_data = {
+                "original_research_goal": project.original_research_goal,
+                "context_file_paths": context_file_paths,
+                "user_metadata": user_metadata,
+            }
+            if project.project_id in warm_starts:
+                task_data["warm_start"] = warm_starts[project.project_id]
+            jobs.append((project.project_id, "pi_agent", task_data))
+        await self._agent_queue.enqueue_agent_tasks(jobs)
+        logger.info("Batch projects created and tasks queued", extra={"owner_id": owner_id, "count": len(projects)})
+        return projects
+
+    async def list_projects(
+        self,
+        owner_id: str,
+        fields: List[str],
+        limit: int,
+        cursor: Optional[str] = None
+    ) -> ProjectListResponse:
+        """
+        Returns one page of the owner's projects (newest first) with only `fields` selected.
+        
+        Raises:
+            ValueError: On an unknown field or a malformed cursor.
+        """
+        after = tuple(decode_cursor(cursor, 2)) if cursor else None
+
+        # Fetch one extra row to learn whether another page exists
+        rows = await run_in_threadpool(self._repo.list_projects, owner_id, fields, limit + 1, after)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["project_id"]) if has_more else None
+        items = [
+            ProjectSummary(**{name: row[name] for name in ("project_id", *fields)})
+            for row in rows
+        ]
+        return ProjectListResponse(items=items, next_cursor=next_cursor)
+
+    # --- History (messages / audit log) ---
+
+    @staticmethod
+    def _history_filters(cursor: Optional[str], **filters) -> Dict[str, Any]:
+        """Decodes the cursor and normalizes time bounds to UTC (naive input is taken as UTC)."""
+        for bound in ("since", "until"):
+            value = filters.get(bound)
+            if value is not None:
+                filters[bound] = value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+        if cursor:
+            filters["after"] = tuple(decode_cursor(cursor, 2))
+        return {k: v for k, v in filters.items() if v is not None}
+
+    @staticmethod
+    def _history_page(rows: List[Dict[str, Any]], limit: int, time_key: str, id_key: str, page_cls: Type[BaseModel]):
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][time_key], rows[-1][id_key]) if has_more else None
+        return page_cls(items=rows, next_cursor=next_cursor)
+
+    async def list_messages(self, project_id: str, limit: int, cursor: Optional[str] = None, **filters) -> MessagePage:
+        """
+        One page of the project's messages (oldest first).
+        
+        Raises:
+            ValueError: On a malformed cursor.
+        """
+        filters = self._history_filters(cursor, **filters)
+        rows = await run_in_threadpool(self._repo.list_messages, project_id, limit + 1, **filters)
+        return self._history_page(rows, limit, "created_at", "message_id", MessagePage)
+
+    async def list_audit_entries(self, project_id: str, limit: int, cursor: Optional[str] = None, **filters) -> AuditLogPage:
+        """
+        One page of the project's audit log (oldest first).
+        
+        Raises:
+            ValueError: On a malformed cursor.
+        """
+        filters = self._history_filters(cursor, **filters)
+        rows = await run_in_threadpool(self._repo.list_audit_entries, project_id, limit + 1, **filters)
+        return self._history_page(rows, limit, "timestamp", "entry_id", AuditLogPage)
+
+    def export_messages_ndjson(self, project_id: str, **filters) -> Iterator[bytes]:
+        """
+        Every matching message as NDJSON, one line per row.
+        A synchronous generator: StreamingResponse iterates it in the threadpool, row batches
+        are fetched lazily, so memory stays flat regardless of history length.
+        """
+        filters = self._history_filters(None, **filters)
+        for row in self._repo.iter_messages(project_id, **filters):
+            yield dumps(MessageRecord.model_validate(row)) + b"\n"
+
+    def export_audit_entries_ndjson(self, project_id: str, **filters) -> Iterator[bytes]:
+        """Every matching audit entry as NDJSON (see export_messages_ndjson)."""
+        filters = self._history_filters(None, **filters)
+        for row in self._repo.iter_audit_entries(project_id, **filters):
+            yield dumps(AuditEntryRecord.model_validate(row)) + b"\n"
+
+    async def get_project_file(self, project_id: str, file_id: str) -> Optional[Tuple[ProjectFile, Optional[str]]]:
+        """
+        Resolves a stored file for download.
+        
+        Returns:
+            (file record, presigned URL or None for local storage), or None if the file does
+            not belong to the project.
+        """
+        file = await run_in_threadpool(self._repo.get_project_file, project_id, file_id)
+        if file is None:
+            return None
+        return file, self._storage.presigned_download_url(file.storage_path, file.filename)
+
+    async def get_project_state(self, project_id: str) -> Optional[CachedProjectState]:
+        """
+        Returns the serialized state of a project for GET /projects/{id}.
+        Served from the state cache when the project has not changed; otherwise rebuilt
+        from the DB once and cached under the project's current state_version.
+        
+        Returns:
+            The cached entry, or None if the project does not exist.
+        """
+        cached = await self._state_cache.get(project_id)
+        if cached is not None:
+            return cached
+
+        try:
+            entry = await run_in_threadpool(self._build_state_entry, project_id)
+        except ValueError:
+            return None
+
+        await self._state_cache.put(entry)
+        return entry
+
+    def _build_state_entry(self, project_id: str) -> CachedProjectState:
+        """Loads and serializes the full state (synchronous: runs in the threadpool)."""
+        project, state = self._repo.get_project_with_state(project_id)
+        return build_cached_state(project, state)
+            
     # NOTE: The _save_state_to_db logic is now moved to the ASYNC WORKER
     # The worker will fetch the project, run the agent, and then call a repository 
     # method to update all related tables (Messages, Tasks, AuditLog).
\ No newline at end of file
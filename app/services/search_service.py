@@ -0,0 +1,29 @@
+# app/services/search_service.py
+
+import logging
+import time
+from typing import Sequence
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.db.search_repository import SearchRepository
+from app.schemas.search import SearchHit, SearchResponse
+
+logger = logging.getLogger(__name__)
+
+
+class SearchService:
+    """Service layer for full-text search across a user's projects."""
+
+    def __init__(self, repository: SearchRepository):
+        self._repo = repository
+
+    async def search(self, owner_id: str, query: str, limit: int, sources: Sequence[str]) -> SearchResponse:
+        """Ranked hits with highlighted snippets, only from projects `owner_id` owns."""
+        started = time.perf_counter()
+        rows = await run_in_threadpool(self._repo.search, owner_id, query, limit, sources)
+        logger.info(
+            "Search completed",
+            extra={"hits": len(rows), "duration_ms": round((time.perf_counter() - started) * 1000, 2)}
+        )
+        return SearchResponse(query=query, items=[SearchHit(**row) for row in rows])
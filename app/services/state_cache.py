@@ -0,0 +1,239 @@
+# app/services/state_cache.py
+
+# Pre-serialized project state for GET /api/v1/projects/{id}.
+#
+# Layout in Redis:
+#   project-state:{project_id}:version         -> latest known state_version (monotonic pointer)
+#   project-state:{project_id}:v{version}      -> hash {owner_id, etag, body}
+# Each API process keeps a small LRU of entries keyed by (project_id, version) on top, so a
+# poll of an unchanged project costs one Redis GET and zero DB queries.
+#
+# The worker "invalidates" by moving the version pointer forward after it commits. Pointer
+# updates are set-if-greater, so a GET that rebuilt an older snapshot can never move it back.
+#
+# Compressed variants live in the same hash ("body.br", "body.gzip", ...). They are made
+# lazily: the first GET that negotiates an encoding compresses the body once and stores the
+# variant, so versions nobody reads (or reads uncompressed) are never compressed.
+
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+from app.agents.base import VirtualLabState
+from app.schemas.project import VirtualLabState as VirtualLabStateResponse
+from app.utils.serialization import dumps
+from app.utils.compression import compress, strip_variant_etag
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "project-state:{project_id}:version"
+ENTRY_KEY = "project-state:{project_id}:v{version}"
+
+# KEYS[1] = version pointer, ARGV[1] = version, ARGV[2] = ttl seconds
+_SET_IF_GREATER = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '-1')
+if tonumber(ARGV[1]) > current then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+
+def make_etag(version: int, body: bytes) -> str:
+    """Strong validator: changes whenever the serialized representation does."""
+    return f'"{version}-{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match evaluation (RFC 9110 uses the weak comparison for this header)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = strip_variant_etag(etag.removeprefix("W/"))
+    return any(
+        strip_variant_etag(candidate.strip().removeprefix("W/")) == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+@dataclass(frozen=True)
+class CachedProjectState:
+    """A serialized VirtualLabState response plus what is needed to authorize and validate it."""
+    project_id: str
+    owner_id: str
+    version: int
+    etag: str
+    body: bytes
+    # Precompressed bodies keyed by Content-Encoding ("br", "zstd", "gzip")
+    variants: Dict[str, bytes] = field(default_factory=dict, compare=False)
+
+    def to_hash(self) -> Dict[str, bytes]:
+        """Redis hash layout of the entry."""
+        mapping = {"owner_id": self.owner_id, "etag": self.etag, "body": self.body}
+        mapping.update({f"body.{encoding}": data for encoding, data in self.variants.items()})
+        return mapping
+
+
+def build_cached_state(project, state: VirtualLabState) -> CachedProjectState:
+    """
+    Serializes a project's state into a cache entry (pydantic-core, straight to bytes).
+    `project` is the Project ORM record (owner, goals and state_version).
+    """
+    # Both halves come from our own DB/agents: assemble the response without re-validating
+    response = VirtualLabStateResponse.trusted(
+        project_id=project.project_id,
+        original_research_goal=project.original_research_goal,
+        refined_research_goal=project.refined_research_goal,
+        messages=state.messages,
+        task_list=state.task_list,
+        scratchpad=state.scratchpad,
+        next_agent=state.next_agent,
+        audit_log=state.audit_log,
+        current_phase=state.current_phase,
+    )
+    body = dumps(response)
+    version = project.state_version or 0
+    return CachedProjectState(
+        project_id=project.project_id,
+        owner_id=project.owner_id,
+        version=version,
+        etag=make_etag(version, body),
+        body=body,
+    )
+
+
+class ProjectStateCache:
+    """
+    Two-tier cache (process LRU + Redis) of serialized project states.
+    Without Redis it degrades to a process-local cache (tests / single-process dev).
+    """
+
+    def __init__(self, redis_conn: Optional[AsyncRedis] = None, max_local_entries: int = 1024, ttl_seconds: int = 3600):
+        self.redis = redis_conn
+        self.max_local_entries = max_local_entries
+        self.ttl_seconds = ttl_seconds
+        self._local: "OrderedDict[Tuple[str, int], CachedProjectState]" = OrderedDict()
+        self._latest: Dict[str, int] = {}
+
+    def _remember(self, entry: CachedProjectState) -> None:
+        key = (entry.project_id, entry.version)
+        self._local[key] = entry
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_local_entries:
+            self._local.popitem(last=False)
+
+    def _local_get(self, project_id: str, version: int) -> Optional[CachedProjectState]:
+        entry = self._local.get((project_id, version))
+        if entry is not None:
+            self._local.move_to_end((project_id, version))
+        return entry
+
+    async def get(self, project_id: str) -> Optional[CachedProjectState]:
+        """Returns the cached entry for the project's CURRENT version, or None."""
+        if self.redis is None:
+            version = self._latest.get(project_id)
+            return None if version is None else self._local_get(project_id, version)
+
+        try:
+            raw_version = await self.redis.get(VERSION_KEY.format(project_id=project_id))
+            if raw_version is None:
+                return None
+            version = int(raw_version)
+
+            entry = self._local_get(project_id, version)
+            if entry is not None:
+                return entry
+
+            fields = await self.redis.hgetall(ENTRY_KEY.format(project_id=project_id, version=version))
+            if not fields:
+                return None
+            entry = CachedProjectState(
+                project_id=project_id,
+                owner_id=fields[b"owner_id"].decode(),
+                version=version,
+                etag=fields[b"etag"].decode(),
+                body=fields[b"body"],
+                variants={
+                    key.decode().removeprefix("body."): value
+                    for key, value in fields.items()
+                    if key.startswith(b"body.")
+                },
+            )
+            self._remember(entry)
+            return entry
+        except Exception as e:
+            # The cache is an optimization: fall back to rebuilding from the DB
+            logger.warning(f"Project state cache read failed: {e}")
+            return None
+
+    async def put(self, entry: CachedProjectState) -> None:
+        """Stores a freshly built entry without ever moving the version pointer backwards."""
+        self._remember(entry)
+        if self.redis is None:
+            self._latest[entry.project_id] = max(entry.version, self._latest.get(entry.project_id, -1))
+            return
+
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            entry_key = ENTRY_KEY.format(project_id=entry.project_id, version=entry.version)
+            pipe.hset(entry_key, mapping=entry.to_hash())
+            pipe.expire(entry_key, self.ttl_seconds)
+            pipe.eval(_SET_IF_GREATER, 1, VERSION_KEY.format(project_id=entry.project_id), entry.version, self.ttl_seconds)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Project state cache write failed: {e}")
+
+    async def get_variant(self, entry: CachedProjectState, encoding: str) -> bytes:
+        """
+        Returns the body compressed with `encoding`, compressing (and caching) it at most
+        once per version instead of on every hit.
+        """
+        data = entry.variants.get(encoding)
+        if data is not None:
+            return data
+
+        data = compress(entry.body, encoding)
+        entry.variants[encoding] = data
+        if self.redis is not None:
+            try:
+                await self.redis.hset(
+                    ENTRY_KEY.format(project_id=entry.project_id, version=entry.version),
+                    f"body.{encoding}",
+                    data
+                )
+            except Exception as e:
+                logger.warning(f"Project state cache variant write failed: {e}")
+        return data
+
+    def invalidate_local(self, project_id: str) -> None:
+        """Drops the process-local pointer (local-only mode)."""
+        self._latest.pop(project_id, None)
+
+
+def invalidate_project_state(redis_conn: Redis, project_id: str, version: int, ttl_seconds: int = 3600) -> None:
+    """
+    Moves the pointer forward after a new state_version is committed, so every pod's
+    next GET misses and rebuilds (once) from the DB.
+    """
+    redis_conn.eval(_SET_IF_GREATER, 1, VERSION_KEY.format(project_id=project_id), version, ttl_seconds)
+
+
+def store_project_state(redis_conn: Redis, entry: CachedProjectState, ttl_seconds: int = 3600) -> None:
+    """
+    Write-through used by the worker after it commits: stores the freshly serialized state
+    and moves the pointer forward in one round trip, so the next GET is already a hit.
+    Compressed variants are left to ProjectStateCache.get_variant.
+    """
+    pipe = redis_conn.pipeline(transaction=False)
+    entry_key = ENTRY_KEY.format(project_id=entry.project_id, version=entry.version)
+    pipe.hset(entry_key, mapping=entry.to_hash())
+    pipe.expire(entry_key, ttl_seconds)
+    pipe.eval(_SET_IF_GREATER, 1, VERSION_KEY.format(project_id=entry.project_id), entry.version, ttl_seconds)
+    pipe.execute()
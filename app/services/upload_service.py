@@ -0,0 +1,281 @@
+# app/services/upload_service.py
+
+# Resumable chunked uploads for large context documents (modelled on the tus protocol):
+#
+#   POST  /uploads                 -> session with a declared total size, offset 0
+#   PATCH /uploads/{id}            -> body appended at Upload-Offset, streamed straight to disk
+#   HEAD  /uploads/{id}            -> current offset, so a client can resume after a drop
+#   POST  /uploads/{id}/finalize   -> SHA-256 verified, upload becomes attachable
+#
+# The SHA-256 is computed incrementally while chunks arrive. hashlib state cannot be persisted,
+# so the running hashers live in this process; if a chunk lands on another pod (or the process
+# restarted) the hasher is dropped and finalize re-hashes the stored file instead.
+
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.db.models import ProjectFile, UploadSession
+from app.db.upload_repository import UploadRepository
+
+logger = logging.getLogger(__name__)
+
+# Writes are batched to this size so each threadpool hop moves a useful amount of data
+WRITE_BUFFER_SIZE = 1024 * 1024
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(5 * 1024 ** 3)))
+
+
+class UploadError(Exception):
+    """Base class for upload protocol errors."""
+
+
+class UploadNotFound(UploadError):
+    """Unknown upload, or one that belongs to another user."""
+
+
+class UploadOffsetMismatch(UploadError):
+    """The chunk's Upload-Offset is not the session's current offset."""
+
+    def __init__(self, expected: int):
+        super().__init__(f"Expected Upload-Offset {expected}")
+        self.expected = expected
+
+
+class UploadTooLarge(UploadError):
+    """The chunk would exceed the declared total size."""
+
+
+class UploadIncomplete(UploadError):
+    """Finalize was called before every byte arrived, or the upload is not in progress."""
+
+
+class UploadChecksumMismatch(UploadError):
+    """The received bytes do not match the client's SHA-256."""
+
+
+class _HasherRegistry:
+    """Process-local running SHA-256 per upload: upload_id -> (offset hashed so far, hasher)."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._hashers: "OrderedDict[str, Tuple[int, object]]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def lock(self, upload_id: str) -> asyncio.Lock:
+        return self._locks.setdefault(upload_id, asyncio.Lock())
+
+    def get(self, upload_id: str, offset: int):
+        """The hasher, if it has consumed exactly the first `offset` bytes."""
+        entry = self._hashers.get(upload_id)
+        if entry is not None and entry[0] == offset:
+            return entry[1]
+        if offset == 0:
+            return hashlib.sha256()
+        return None
+
+    def put(self, upload_id: str, offset: int, hasher) -> None:
+        self._hashers[upload_id] = (offset, hasher)
+        self._hashers.move_to_end(upload_id)
+        while len(self._hashers) > self.max_entries:
+            evicted, _ = self._hashers.popitem(last=False)
+            self._locks.pop(evicted, None)
+
+    def discard(self, upload_id: str) -> None:
+        self._hashers.pop(upload_id, None)
+        self._locks.pop(upload_id, None)
+
+
+_hashers = _HasherRegistry()
+
+
+def _write_at(path: str, offset: int, data: bytes) -> None:
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(data)
+
+
+def _truncate(path: str, size: int) -> None:
+    with open(path, "r+b") as f:
+        f.truncate(size)
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(WRITE_BUFFER_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class UploadService:
+    """Service layer for resumable uploads."""
+
+    def __init__(self, repository: UploadRepository, base_path: str = "storage/uploads"):
+        self._repo = repository
+        self.base_path = Path(base_path)
+
+    async def create(self, owner_id: str, filename: str, file_type: str, total_size: int) -> UploadSession:
+        """
+        Opens an upload session and allocates its (empty) storage file.
+
+        Raises:
+            UploadTooLarge: total_size exceeds MAX_UPLOAD_SIZE.
+        """
+        if total_size > MAX_UPLOAD_SIZE:
+            raise UploadTooLarge(f"Uploads are limited to {MAX_UPLOAD_SIZE} bytes")
+
+        upload_id = str(uuid.uuid4())
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        storage_path = str(self.base_path / f"{upload_id}{Path(filename).suffix}")
+        Path(storage_path).touch()
+
+        session = UploadSession(
+            upload_id=upload_id,
+            owner_id=owner_id,
+            filename=filename,
+            file_type=file_type or "application/octet-stream",
+            total_size=total_size,
+            received_bytes=0,
+            storage_path=storage_path,
+            status="in_progress",
+        )
+        return await run_in_threadpool(self._repo.create_session, session)
+
+    async def get(self, owner_id: str, upload_id: str) -> UploadSession:
+        """
+        Raises:
+            UploadNotFound: Unknown or foreign upload.
+        """
+        session = await run_in_threadpool(self._repo.get_session, upload_id, owner_id)
+        if session is None:
+            raise UploadNotFound(upload_id)
+        return session
+
+    async def append(
+        self, owner_id: str, upload_id: str, offset: int, chunks: AsyncIterator[bytes]
+    ) -> int:
+        """
+        Streams one PATCH body to storage at `offset`, hashing as it goes.
+
+        Returns:
+            The new offset.
+
+        Raises:
+            UploadNotFound, UploadOffsetMismatch, UploadTooLarge, UploadIncomplete (not in progress).
+        """
+        async with _hashers.lock(upload_id):
+            session = await self.get(owner_id, upload_id)
+            if session.status != "in_progress":
+                raise UploadIncomplete(f"Upload is {session.status}")
+            if offset != session.received_bytes:
+                raise UploadOffsetMismatch(session.received_bytes)
+
+            hasher = _hashers.get(upload_id, offset)
+            position = offset
+            buffer = bytearray()
+            try:
+                async for chunk in chunks:
+                    if position + len(buffer) + len(chunk) > session.total_size:
+                        raise UploadTooLarge("Chunk exceeds the declared upload size")
+                    buffer += chunk
+                    if len(buffer) >= WRITE_BUFFER_SIZE:
+                        position = await self._flush(session.storage_path, position, buffer, hasher)
+                if buffer:
+                    position = await self._flush(session.storage_path, position, buffer, hasher)
+            except (Exception, asyncio.CancelledError):
+                # Dropped connection (or oversized chunk): keep every byte already flushed so
+                # the client resumes from there, and cut off anything beyond it
+                await run_in_threadpool(_truncate, session.storage_path, position)
+                await self._commit(owner_id, upload_id, offset, position, hasher)
+                raise
+
+            return await self._commit(owner_id, upload_id, offset, position, hasher)
+
+    async def _commit(self, owner_id: str, upload_id: str, offset: int, position: int, hasher) -> int:
+        if position == offset:
+            return offset
+        if not await run_in_threadpool(self._repo.advance_offset, upload_id, offset, position):
+            # Another pod advanced this upload concurrently: our hash state is unreliable
+            _hashers.discard(upload_id)
+            current = await self.get(owner_id, upload_id)
+            raise UploadOffsetMismatch(current.received_bytes)
+        if hasher is not None:
+            _hashers.put(upload_id, position, hasher)
+        return position
+
+    @staticmethod
+    async def _flush(path: str, position: int, buffer: bytearray, hasher) -> int:
+        data = bytes(buffer)
+        buffer.clear()
+        if hasher is not None:
+            hasher.update(data)
+        await run_in_threadpool(_write_at, path, position, data)
+        return position + len(data)
+
+    async def finalize(self, owner_id: str, upload_id: str, expected_sha256: Optional[str] = None) -> UploadSession:
+        """
+        Verifies the checksum and marks the upload attachable.
+
+        Raises:
+            UploadNotFound, UploadIncomplete, UploadChecksumMismatch.
+        """
+        async with _hashers.lock(upload_id):
+            session = await self.get(owner_id, upload_id)
+            if session.status == "completed":
+                return session  # finalize is idempotent
+            if session.status != "in_progress" or session.received_bytes != session.total_size:
+                raise UploadIncomplete(
+                    f"Received {session.received_bytes} of {session.total_size} bytes"
+                )
+
+            hasher = _hashers.get(upload_id, session.received_bytes)
+            if hasher is not None:
+                digest = hasher.hexdigest()
+            else:
+                logger.info(f"No running hash for upload {upload_id}; re-hashing stored file")
+                digest = await run_in_threadpool(_hash_file, session.storage_path)
+
+            if expected_sha256 and expected_sha256.lower() != digest:
+                raise UploadChecksumMismatch(digest)
+
+            await run_in_threadpool(self._repo.mark_completed, upload_id, digest)
+            _hashers.discard(upload_id)
+            return await self.get(owner_id, upload_id)
+
+    async def resolve_for_project(
+        self, owner_id: str, project_id: str, upload_ids: Sequence[str]
+    ) -> List[ProjectFile]:
+        """
+        Turns finalized uploads into ProjectFile records for a new project. Metadata only:
+        the stored bytes stay where they are. The caller marks the uploads attached in the
+        same transaction that inserts the files.
+
+        Raises:
+            UploadNotFound: An ID is unknown, foreign, unfinished or already attached.
+        """
+        unique_ids = list(dict.fromkeys(upload_ids))
+        sessions = await run_in_threadpool(self._repo.get_completed_sessions, owner_id, unique_ids)
+        found = {s.upload_id: s for s in sessions}
+        missing = [upload_id for upload_id in unique_ids if upload_id not in found]
+        if missing:
+            raise UploadNotFound(", ".join(missing))
+
+        return [
+            ProjectFile(
+                file_id=str(uuid.uuid4()),
+                project_id=project_id,
+                filename=found[upload_id].filename,
+                file_size=found[upload_id].total_size,
+                storage_path=found[upload_id].storage_path,
+                file_type=found[upload_id].file_type,
+                content_sha256=found[upload_id].content_sha256,
+            )
+            for upload_id in unique_ids
+        ]
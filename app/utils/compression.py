@@ -0,0 +1,126 @@
+# app/utils/compression.py
+
+# Content-Encoding helpers shared by the compression middleware and the state cache.
+# brotli and zstandard are optional: when a codec's package is missing it is simply not
+# offered, and gzip (stdlib zlib) is always available.
+
+import os
+import zlib
+from typing import Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+# Responses smaller than this are not worth the CPU (and the encoding header overhead)
+MINIMUM_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# Server preference when the client accepts several encodings with the same q-value
+_PREFERENCE = ("br", "zstd", "gzip")
+
+
+def available_encodings() -> List[str]:
+    return [
+        encoding for encoding in _PREFERENCE
+        if encoding == "gzip"
+        or (encoding == "br" and brotli is not None)
+        or (encoding == "zstd" and zstandard is not None)
+    ]
+
+
+SUPPORTED_ENCODINGS = tuple(available_encodings())
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Picks the best supported encoding for an Accept-Encoding header (None = identity).
+    Honours q-values (q=0 means "not acceptable") and the '*' wildcard.
+    """
+    if not accept_encoding:
+        return None
+
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qualities[name.strip()] = q
+
+    wildcard = qualities.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        q = qualities.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """One-shot compression of a complete body (used for cached/precompressed variants)."""
+    if encoding == "br":
+        return brotli.compress(data, quality=5)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    if encoding == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class StreamCompressor:
+    """
+    Incremental compressor for streamed bodies (SSE, NDJSON).
+    Each chunk is flushed to a decodable boundary so clients see events immediately.
+    """
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=4)
+        elif encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+        elif encoding == "gzip":
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+    def compress_chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        if self.encoding == "zstd":
+            return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def variant_etag(etag: str, encoding: Optional[str]) -> str:
+    """
+    Strong ETags must differ per Content-Encoding: '"3-abc"' -> '"3-abc-br"'.
+    """
+    if not encoding:
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def strip_variant_etag(etag: str) -> str:
+    """Inverse of variant_etag, so If-None-Match matches any encoding of the same state."""
+    for encoding in _PREFERENCE:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[: -len(suffix)] + '"'
+    return etag
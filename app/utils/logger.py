@@ -3,12 +3,33 @@
 import logging
 import sys
 import os
+from contextvars import ContextVar
+from typing import Optional
 from pythonjsonlogger import jsonlogger
 
 # Define the format for the JSON log entries
-LOG_FORMAT = '%(levelname)s %(asctime)s %(module)s %(funcName)s %(lineno)d %(message)s'
+LOG_FORMAT = '%(levelname)s %(asctime)s %(module)s %(funcName)s %(lineno)d %(request_id)s %(message)s'
 logger = logging.getLogger(__name__)
 
+# The ID of the request (or of the request that enqueued the current job).
+# Set by RequestIDMiddleware in the API and by process_job in the worker.
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+def get_request_id() -> Optional[str]:
+    """Returns the request ID of the current context, if any."""
+    return request_id_var.get()
+
+
+class RequestIDFilter(logging.Filter):
+    """Stamps the current request ID on every record (unless one was passed via `extra`)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return True
+
+
 def configure_logging(level=logging.INFO):
     """Configures the root logger for structured JSON output."""
     
@@ -23,8 +44,11 @@ def configure_logging(level=logging.INFO):
         # 3. Use the JSON formatter
         formatter = jsonlogger.JsonFormatter(LOG_FORMAT)
         handler.setFormatter(formatter)
+
+        # 4. Handler-level filter: applies to records propagated from every module's logger
+        handler.addFilter(RequestIDFilter())
         
         root_logger.addHandler(handler)
         
 # Initialize logging right now
-configure_logging()
\ No newline at end of file
+configure_logging()
@@ -0,0 +1,43 @@
+# app/utils/merge_patch.py
+
+# JSON Merge Patch (RFC 7396): a patch is a JSON document shaped like the target, where an
+# object merges key by key (recursively), null deletes a key and any other value replaces.
+# The worker sends the scratchpad's changes this way, so only changed keys are written; the
+# database applies the patch server-side (see app/db/json_merge_patch.py).
+#
+# Limitation of the format: null cannot be stored as a value (it means "delete").
+
+from typing import Any, Dict
+
+_MISSING = object()
+
+
+def apply_merge_patch(target: Any, patch: Any) -> Any:
+    """RFC 7396 MergePatch(target, patch); neither argument is modified."""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
+
+
+def create_merge_patch(source: Dict[str, Any], target: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The smallest merge patch turning `source` into `target` (empty if they are equal):
+    removed keys become null, changed objects are diffed recursively, anything else that
+    changed is sent whole.
+    """
+    patch: Dict[str, Any] = {key: None for key in source if key not in target}
+    for key, value in target.items():
+        old = source.get(key, _MISSING)
+        if type(old) is type(value) and old == value:
+            continue
+        if isinstance(old, dict) and isinstance(value, dict):
+            patch[key] = create_merge_patch(old, value)
+        else:
+            patch[key] = value
+    return patch
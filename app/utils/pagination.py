@@ -0,0 +1,36 @@
+# app/utils/pagination.py
+
+# Opaque keyset-pagination cursors.
+# A cursor is the sort key of the last row of a page, JSON-encoded and base64url'd, so clients
+# can't (and needn't) interpret it. Keyset pages cost the same at page 1 and page 10,000 because
+# the DB seeks straight to the key through the index instead of counting past an OFFSET.
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encodes a sort key (datetimes are stored as ISO strings)."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, num_values: int) -> List[Any]:
+    """
+    Decodes a cursor produced by encode_cursor. The FIRST value is parsed back into a datetime
+    (every keyset in this API is ordered by a timestamp, then an ID).
+    
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != num_values:
+            raise ValueError("unexpected cursor shape")
+        values[0] = datetime.fromisoformat(values[0])
+        return values
+    except (ValueError, TypeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}") from e
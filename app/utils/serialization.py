@@ -0,0 +1,45 @@
+# app/utils/serialization.py
+
+# One JSON encoding path for the API and the worker.
+#
+# - Pydantic models are dumped straight to bytes by pydantic-core (model_dump_json), skipping
+#   the intermediate Python dict that model_dump(mode='json') + json.dumps would build.
+# - Everything else (plain dicts/lists from Core queries) goes through orjson.
+# Both produce compact UTF-8 bytes, so the result can be cached and sent as-is.
+
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+
+def _default(obj: Any) -> Any:
+    """orjson fallback for types it does not know (nested Pydantic models)."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj: Any, **model_dump_kwargs: Any) -> bytes:
+    """
+    Serializes a Pydantic model or plain data to JSON bytes.
+    `model_dump_kwargs` (e.g. exclude_unset=True) apply to Pydantic models only.
+    """
+    if isinstance(obj, BaseModel):
+        return obj.model_dump_json(**model_dump_kwargs).encode()
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def loads(data: Any) -> Any:
+    return orjson.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse that renders with pydantic-core/orjson instead of the stdlib encoder.
+    Accepts Pydantic models directly, so callers never need model_dump(mode='json').
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,20 +1,102 @@
 # app/workers/agent_worker.py
 
 from typing import Dict, Any
+import copy
 import os
 import asyncio
 import logging
 
 from redis import Redis
-from rq import Worker, Queue
+from rq import Worker, Queue, get_current_job
 
 from app.database import SessionLocal
 from app.db.project_repository import ProjectRepository  # Repository handles all DB logic
-from app.agents.base import VirtualLabState  # Only domain model import needed
-from app.agents.pi_agent import PIAgent
+from app.db.audit_sink import get_audit_sink
+from app.agents.base import VirtualLabState, audit_listener_var  # Only domain model import needed
+from app.agents.orchestrator import run_agent_loop
+from app.agents.registry import build_default_registry
+from app.llm import get_llm_client
+from app.utils.logger import request_id_var
+from app.utils.merge_patch import create_merge_patch
+from app.core.redis_client import get_redis
+from app.services.project_events import ProjectEventPublisher, snapshot_state, diff_state_events
+from app.services.state_cache import build_cached_state, store_project_state, invalidate_project_state
 
 logger = logging.getLogger(__name__)
 
+# Agents the router loop can dispatch to, and how far one job may follow next_agent
+AGENT_REGISTRY = build_default_registry()
+AGENT_MAX_STEPS = int(os.getenv("AGENT_MAX_STEPS", "8"))
+AGENT_CHECKPOINT_EVERY = int(os.getenv("AGENT_CHECKPOINT_EVERY", "1"))
+
+
+def cache_project_state(
+    repository: ProjectRepository,
+    project_id: str,
+    state_version: int,
+    final_state: VirtualLabState
+) -> None:
+    """
+    Writes the just-persisted state through to the API's state cache (serialized once,
+    here), which also moves the cache's version pointer past the old state.
+    Best effort, like event publishing: the DB remains the source of truth.
+    """
+    try:
+        project = repository.get_project_by_id(project_id)
+        store_project_state(get_redis(), build_cached_state(project, final_state))
+    except Exception as e:
+        logger.warning(
+            f"Failed to cache project state, invalidating instead",
+            extra={"project_id": project_id, "error": str(e)}
+        )
+        try:
+            invalidate_project_state(get_redis(), project_id, state_version)
+        except Exception:
+            pass
+
+
+def publish_state_events(project_id: str, before, final_state: VirtualLabState) -> None:
+    """
+    Publishes the state changes of a job to the project's event stream.
+    Best effort: a Redis hiccup must not fail a job whose results are already computed.
+    """
+    try:
+        events = diff_state_events(project_id, before, final_state)
+        ProjectEventPublisher(get_redis()).publish(project_id, events)
+    except Exception as e:
+        logger.warning(
+            f"Failed to publish project events",
+            extra={"project_id": project_id, "error": str(e)}
+        )
+
+
+class StateCheckpointer:
+    """
+    Persists the in-memory state during the router loop: saves the new rows, writes the
+    state through to the cache and publishes what changed since the previous checkpoint.
+    The scratchpad is saved as a merge patch of the keys changed since then.
+    """
+
+    def __init__(self, repository: ProjectRepository, project_id: str, state: VirtualLabState):
+        self.repository = repository
+        self.project_id = project_id
+        self.before = snapshot_state(state)
+        self.scratchpad = copy.deepcopy(state.scratchpad)
+        self.state_version = None
+
+    def __call__(self, state: VirtualLabState) -> int:
+        scratchpad_patch = create_merge_patch(self.scratchpad, state.scratchpad)
+        self.state_version = self.repository.save_agent_results(self.project_id, state, scratchpad_patch)
+        cache_project_state(self.repository, self.project_id, self.state_version, state)
+        publish_state_events(self.project_id, self.before, state)
+        self.before = snapshot_state(state)
+        self.scratchpad = copy.deepcopy(state.scratchpad)
+        logger.info(
+            f"State checkpoint saved",
+            extra={"project_id": self.project_id, "state_version": self.state_version}
+        )
+        return self.state_version
+
 
 def process_job(project_id: str, agent_name: str, task_data: Dict[str, Any]):
     """
@@ -24,30 +106,38 @@ def process_job(project_id: str, agent_name: str, task_data: Dict[str, Any]):
     Responsibilities:
     - Orchestrates the job execution flow
     - Delegates DB access to Repository
-    - Delegates business logic to Agent
+    - Delegates business logic to the agents, chained in-process by next_agent
     
     Args:
         project_id: The project ID to process
-        agent_name: The name of the agent to execute
+        agent_name: The first agent to execute (see AGENT_REGISTRY)
         task_data: Dictionary containing:
             - original_research_goal: str
             - context_file_paths: List[str]
             - user_metadata: Dict[str, Any] with user_id, profession, institution
+            - warm_start: optional Dict, see PlanReuseService.index_and_match
     """
+    # Adopt the request ID of the API request that enqueued this job (see AgentQueueService)
+    job = get_current_job()
+    request_id_var.set(job.meta.get("request_id") if job is not None else None)
+
     logger.info(
         f"Starting job processing",
         extra={"project_id": project_id, "agent_name": agent_name}
     )
     
     db = None
+    audit_sink = get_audit_sink()
+    # Audit entries go to the write-behind sink as agents add them
+    audit_listener = audit_listener_var.set(lambda entry: audit_sink.add(project_id, [entry]))
     try:
         db = SessionLocal()
         
         # 1. Initialize Repository (encapsulates ALL DB logic)
-        repository = ProjectRepository(db_session=db)
+        repository = ProjectRepository(db_session=db, audit_sink=audit_sink)
         
         # 2. Get project state (Repository handles ORM → Pydantic conversion)
-        state = repository.get_project_state(project_id)
+        project, state = repository.get_project_with_state(project_id)
         logger.debug(
             f"VirtualLabState loaded from database",
             extra={
@@ -67,39 +157,45 @@ def process_job(project_id: str, agent_name: str, task_data: Dict[str, Any]):
         user_metadata = task_data.get("user_metadata", {})
         context_files = task_data.get("context_file_paths", [])
         
-        # 4. Execute agent (pure business logic - no DB knowledge)
-        if agent_name == "pi_agent":
-            agent = PIAgent()
-            
-            logger.info(f"Executing {agent_name} for project {project_id}")
-            final_state = asyncio.run(
-                agent.execute(
-                    state=state,
-                    original_research_goal=original_research_goal,
-                    user_metadata=user_metadata,
-                    context_files=context_files
-                )
-            )
-            
-            logger.info(
-                f"Agent execution completed",
-                extra={
+        # 4. Run agents by next_agent, starting with `agent_name` (pure business logic - no DB
+        #    knowledge), until a human gate or the step budget; checkpoints persist as we go
+        checkpointer = StateCheckpointer(repository, project_id, state)
+        result = asyncio.run(
+            run_agent_loop(
+                state=state,
+                start_agent=agent_name,
+                registry=AGENT_REGISTRY,
+                context={
+                    "original_research_goal": original_research_goal,
+                    "user_metadata": user_metadata,
+                    "context_files": context_files,
+                    # Earlier plan of a near-duplicate goal, if the API found one
+                    "warm_start": task_data.get("warm_start"),
+                    # For per-version caches (kept current by the loop)
                     "project_id": project_id,
-                    "agent_name": agent_name,
-                    "num_tasks_created": len(final_state.task_list),
-                    "num_messages": len(final_state.messages),
-                    "next_agent": final_state.next_agent,
-                    "refined_goal": final_state.scratchpad.get("refined_research_goal", "N/A")[:100]
-                }
+                    "state_version": project.state_version,
+                },
+                max_steps=AGENT_MAX_STEPS,
+                checkpoint=checkpointer,
+                checkpoint_every=AGENT_CHECKPOINT_EVERY,
             )
-            
-            # TODO: Phase 2 - repository.save_agent_results(project_id, final_state)
-            # This will encapsulate Pydantic → ORM conversion and persistence
-            logger.info(f"Job completed successfully (Phase 2 will save results to DB)")
-            
-        else:
-            logger.warning(f"Unknown agent: {agent_name}. Skipping.")
-            raise ValueError(f"Unknown agent: {agent_name}")
+        )
+        final_state = result.state
+
+        logger.info(
+            f"Job completed successfully",
+            extra={
+                "project_id": project_id,
+                "agents_run": result.agents_run,
+                "stop_reason": result.stop_reason,
+                "num_tasks": len(final_state.task_list),
+                "num_messages": len(final_state.messages),
+                "next_agent": final_state.next_agent,
+                "state_version": checkpointer.state_version,
+                "llm": get_llm_client().metrics(),
+                "refined_goal": final_state.scratchpad.get("refined_research_goal", "N/A")[:100]
+            }
+        )
             
     except Exception as e:
         logger.error(
@@ -109,6 +205,16 @@ def process_job(project_id: str, agent_name: str, task_data: Dict[str, Any]):
         )
         raise
     finally:
+        # Entries of a failed step are still audit history; the job process exits without
+        # running atexit, so write them now
+        audit_listener_var.reset(audit_listener)
+        try:
+            audit_sink.flush()
+        except Exception as e:
+            logger.error(
+                f"Failed to flush audit entries",
+                extra={"project_id": project_id, "num_entries": len(audit_sink), "error": str(e)}
+            )
         # Always close the database session if it was created
         if db is not None:
             db.close()
@@ -0,0 +1,72 @@
+# tests/agents/test_context.py
+
+import pytest
+from datetime import datetime, timezone
+from app.agents.context import ContextAssembler, ContextBudget, count_tokens, iter_text_chunks
+from app.schemas.project import AuditEntry, ConversationMessage
+
+
+def audit(action):
+    return AuditEntry(timestamp=datetime.now(timezone.utc), agent="pi_agent", action=action, current_phase="intake", details={})
+
+
+@pytest.fixture
+def big_document(tmp_path):
+    path = tmp_path / "paper.txt"
+    filler = "Unrelated methods paragraph about buffer preparation and pipetting.\n\n" * 30
+    with open(path, "w") as f:
+        for i in range(400):  # ~800 KB
+            f.write(filler)
+            if i == 250:
+                f.write("The KP.3 spike protein mutations increase antibody escape in neutralization assays.\n\n")
+    return str(path)
+
+
+@pytest.mark.asyncio
+async def test_context_fits_the_budget_and_keeps_what_matters(big_document):
+    messages = [ConversationMessage(role="user", content=f"message {i} " + "word " * 40) for i in range(200)]
+    budget = ContextBudget(total_tokens=800)
+
+    context = await ContextAssembler().assemble(
+        goal="Analyze KP.3 spike protein mutations",
+        messages=messages,
+        audit_log=[audit(f"step_{i}") for i in range(100)],
+        scratchpad={"refined_research_goal": "x"},
+        document_paths=[big_document],
+        budget=budget,
+    )
+
+    assert context.tokens <= budget.total_tokens
+    assert context.truncated
+    assert "message 199" in context.text and "message 0 " not in context.text  # newest win
+    assert "step_99" in context.text
+    assert "antibody escape" in context.text                                    # relevant chunk found
+    assert context.excerpts[0].label.startswith("[document 1.txt @")
+
+
+def test_chunks_stream_with_offsets(tmp_path):
+    path = tmp_path / "doc.md"
+    path.write_text("α" * 70_000 + " end")  # multi-byte characters straddle read blocks
+    chunks = list(iter_text_chunks(str(path), chunk_chars=1000))
+    assert "".join(chunk for _, chunk in chunks) == path.read_text()
+    assert all(len(chunk) <= 1000 for _, chunk in chunks)
+    assert chunks[1][0] == len(chunks[0][1])
+
+
+@pytest.mark.asyncio
+async def test_contexts_are_cached_per_state_version(big_document, monkeypatch):
+    assembler = ContextAssembler()
+    builds = []
+    original_build = assembler.build
+    monkeypatch.setattr(assembler, "build", lambda *args: builds.append(1) or original_build(*args))
+    kwargs = dict(goal="spike", messages=[], audit_log=[], scratchpad={}, document_paths=[big_document], project_id="p1")
+
+    first = await assembler.assemble(**kwargs, state_version=3)
+    assert await assembler.assemble(**kwargs, state_version=3) is first
+    await assembler.assemble(**kwargs, state_version=4)
+    await assembler.assemble(**kwargs, state_version=None)  # unsaved state: never cached
+    assert len(builds) == 3
+
+
+def test_token_counter_counts_words_and_punctuation():
+    assert count_tokens("KP.3 escapes, fast!") == 7
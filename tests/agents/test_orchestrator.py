@@ -0,0 +1,97 @@
+# tests/agents/test_orchestrator.py
+
+import pytest
+from app.agents.base import BaseAgent, VirtualLabState
+from app.agents.orchestrator import run_agent_loop
+from app.agents.registry import AgentRegistry, UnknownAgentError
+from app.db.audit_sink import AuditSink
+from app.db.models import Project
+from app.db.project_repository import ProjectRepository
+from app.schemas.project import ConversationMessage
+
+
+def make_agent(name, next_agent):
+    class Agent(BaseAgent):
+        async def execute(self, state, **kwargs):
+            state.messages.append(ConversationMessage(role="assistant", content=f"{name} ran"))
+            state.add_audit_entry(agent=name, action="ran", details={})
+            state.next_agent = next_agent
+            return state
+    return Agent
+
+
+def new_state(next_agent="a"):
+    return VirtualLabState(messages=[], task_list=[], scratchpad={}, next_agent=next_agent, audit_log=[])
+
+
+@pytest.fixture
+def registry():
+    registry = AgentRegistry()
+    registry.register("a", make_agent("a", "b"))
+    registry.register("b", make_agent("b", "user_approval"))
+    registry.register("loop", make_agent("loop", "loop"))
+    return registry
+
+
+@pytest.mark.asyncio
+async def test_chains_agents_until_the_human_gate_with_checkpoints(registry):
+    saved = []
+    result = await run_agent_loop(new_state(), "a", registry, {}, max_steps=5, checkpoint=lambda s: saved.append(len(s.messages)))
+
+    assert result.agents_run == ["a", "b"]
+    assert result.stop_reason == "human_gate"
+    assert saved == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_step_budget_stops_runaway_routing(registry):
+    saved = []
+    result = await run_agent_loop(
+        new_state(), "loop", registry, {}, max_steps=3, checkpoint=lambda s: saved.append(len(s.messages)), checkpoint_every=2
+    )
+
+    assert result.stop_reason == "step_budget"
+    assert result.state.next_agent == "loop"  # resumable
+    assert result.state.audit_log[-1].action == "step_budget_exhausted"
+    assert saved == [2, 3]
+
+
+@pytest.mark.asyncio
+async def test_unknown_agent_raises(registry):
+    with pytest.raises(UnknownAgentError):
+        await run_agent_loop(new_state(), "nope", registry, {}, max_steps=3)
+
+
+def test_worker_runs_the_pipeline_in_one_job(db_session, monkeypatch):
+    from app.workers import agent_worker
+
+    registry = AgentRegistry()
+    registry.register("pi_agent", make_agent("pi_agent", "b"))
+    registry.register("b", make_agent("b", "user_approval"))
+    monkeypatch.setattr(agent_worker, "AGENT_REGISTRY", registry)
+    monkeypatch.setattr(agent_worker, "SessionLocal", lambda: db_session)
+    monkeypatch.setattr(agent_worker, "cache_project_state", lambda *args: None)
+    monkeypatch.setattr(agent_worker, "publish_state_events", lambda *args: None)
+    monkeypatch.setattr(agent_worker, "get_audit_sink", lambda: AuditSink(lambda: db_session, interval_seconds=60))
+    db_session.add(Project(project_id="p1", owner_id="u1", next_agent="pi_agent"))
+    db_session.commit()
+
+    agent_worker.process_job("p1", "pi_agent", {"original_research_goal": "Goal"})
+
+    project, state = ProjectRepository(db_session).get_project_with_state("p1")
+    assert [m.content for m in state.messages] == ["pi_agent ran", "b ran"]
+    assert [(e.agent, e.action) for e in state.audit_log] == [("pi_agent", "ran"), ("b", "ran")]  # sink + save, no duplicates
+    # Two checkpoints, each a version for the flushed sink entries plus one for the save
+    assert (project.next_agent, project.state_version) == ("user_approval", 4)
+
+
+@pytest.mark.asyncio
+async def test_loop_keeps_the_context_state_version_current(registry):
+    versions = iter([11, 12])
+    context = {"state_version": 10}
+    await run_agent_loop(new_state(), "a", registry, context, max_steps=5, checkpoint=lambda s: next(versions), checkpoint_every=2)
+    assert context["state_version"] == 11
+
+    context = {"state_version": 10}
+    await run_agent_loop(new_state(), "a", registry, context, max_steps=5)
+    assert context["state_version"] is None  # ran without persisting
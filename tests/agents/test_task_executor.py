@@ -0,0 +1,99 @@
+# tests/agents/test_task_executor.py
+
+import asyncio
+import pytest
+from app.agents.base import VirtualLabState
+from app.agents.task_executor import TaskExecutor, TaskGraphError
+from app.db.models import Project
+from app.db.project_repository import ProjectRepository
+from app.schemas.project import TaskItem
+
+
+def plan(*tasks):
+    return VirtualLabState(
+        messages=[], scratchpad={}, next_agent="task_executor", audit_log=[],
+        task_list=[TaskItem(id=task_id, description=task_id, status="pending", depends_on=deps) for task_id, deps in tasks]
+    )
+
+
+@pytest.mark.asyncio
+async def test_independent_tasks_run_concurrently_and_dependents_wait():
+    events = []
+    running = set()
+    a_and_b_overlap = asyncio.Event()
+
+    async def run(task, state):
+        events.append(("start", task.id))
+        running.add(task.id)
+        if {"a", "b"} <= running:
+            a_and_b_overlap.set()
+        if task.id in ("a", "b"):
+            # Run one after the other, a would never get past this (the timeout only stops a hang)
+            await asyncio.wait_for(a_and_b_overlap.wait(), timeout=5)
+        running.discard(task.id)
+        events.append(("end", task.id))
+        return task.id.upper()
+
+    state = plan(("a", []), ("b", []), ("c", ["a", "b"]))
+    report = await TaskExecutor(run, max_concurrency=4, global_limit=asyncio.Semaphore(4)).execute(state)
+
+    assert sorted(report.completed) == ["a", "b", "c"]
+    assert [(t.status, t.result) for t in state.task_list] == [("completed", "A"), ("completed", "B"), ("completed", "C")]
+    assert a_and_b_overlap.is_set()                          # a and b overlapped
+    assert events.index(("start", "c")) > max(events.index(("end", "a")), events.index(("end", "b")))
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_is_respected():
+    active = peak = 0
+
+    async def run(task, state):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+
+    state = plan(*[(f"t{i}", []) for i in range(6)])
+    await TaskExecutor(run, max_concurrency=2, global_limit=asyncio.Semaphore(8)).execute(state)
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_failure_cancels_dependents_only():
+    async def run(task, state):
+        if task.id == "a":
+            raise RuntimeError("boom")
+        return "ok"
+
+    state = plan(("a", []), ("b", ["a"]), ("c", ["b"]), ("d", []))
+    report = await TaskExecutor(run, global_limit=asyncio.Semaphore(4)).execute(state)
+
+    statuses = {t.id: t.status for t in state.task_list}
+    assert statuses == {"a": "failed", "b": "cancelled", "c": "cancelled", "d": "completed"}
+    assert state.task_list[0].result == "RuntimeError: boom"
+    assert (report.failed, sorted(report.cancelled)) == (["a"], ["b", "c"])
+
+
+@pytest.mark.asyncio
+async def test_invalid_graphs_are_rejected_before_running():
+    async def run(task, state):
+        raise AssertionError("must not run")
+
+    with pytest.raises(TaskGraphError):
+        await TaskExecutor(run).execute(plan(("a", ["b"]), ("b", ["a"])))
+    with pytest.raises(TaskGraphError):
+        await TaskExecutor(run).execute(plan(("a", ["missing"])))
+
+
+def test_depends_on_follows_agent_ids_to_database_ids(db_session):
+    db_session.add(Project(project_id="p1", owner_id="u1"))
+    db_session.commit()
+    repository = ProjectRepository(db_session)
+
+    state = plan(("t1", []), ("t2", ["t1"]))
+    repository.save_agent_results("p1", state)
+
+    _, loaded = repository.get_project_with_state("p1")
+    first, second = loaded.task_list
+    assert first.id != "t1" and second.depends_on == [first.id]
@@ -0,0 +1,62 @@
+# tests/api/test_project_files.py
+
+import hashlib
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from unittest.mock import MagicMock
+from app.main import app
+from app.api.v1.endpoints.projects import require_project_owner
+from app.db.models import ProjectFile
+from app.dependencies import get_project_service
+from app.services.project_service import FileStorageService, ProjectService
+
+client = TestClient(app)
+AUTH = {"Authorization": "Bearer TEST_AUTH_TOKEN"}
+CONTENT = b"line of context text\n" * 200
+URL = "/api/v1/projects/p-1/files/f-1"
+
+
+@pytest.fixture(autouse=True)
+def stored_file(tmp_path):
+    path = tmp_path / "f-1.txt"
+    path.write_bytes(CONTENT)
+    repo = MagicMock()
+    repo.get_project_file.return_value = ProjectFile(
+        file_id="f-1", project_id="p-1", filename="notes.txt", storage_path=str(path),
+        file_type="text/plain", file_size=len(CONTENT), content_sha256=hashlib.sha256(CONTENT).hexdigest(),
+    )
+    service = ProjectService(repo, MagicMock(), FileStorageService(), MagicMock())
+    app.dependency_overrides[get_project_service] = lambda: service
+    app.dependency_overrides[require_project_owner] = lambda: "p-1"
+    yield
+    app.dependency_overrides.pop(get_project_service, None)
+    app.dependency_overrides.pop(require_project_owner, None)
+
+
+def test_download_is_uncompressed_with_a_strong_content_hash_etag():
+    response = client.get(URL, headers={**AUTH, "Accept-Encoding": "gzip"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == CONTENT
+    assert "content-encoding" not in response.headers
+    assert response.headers["ETag"] == f'"{hashlib.sha256(CONTENT).hexdigest()}"'
+    assert response.headers["Accept-Ranges"] == "bytes"
+
+
+def test_range_and_if_range():
+    etag = f'"{hashlib.sha256(CONTENT).hexdigest()}"'
+
+    partial = client.get(URL, headers={**AUTH, "Range": "bytes=10-19", "If-Range": etag})
+    assert partial.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert partial.content == CONTENT[10:20]
+
+    # A stale validator means "send me the whole (changed) file"
+    full = client.get(URL, headers={**AUTH, "Range": "bytes=10-19", "If-Range": '"stale"'})
+    assert full.status_code == status.HTTP_200_OK
+    assert full.content == CONTENT
+
+
+def test_if_none_match_returns_304():
+    etag = client.get(URL, headers=AUTH).headers["ETag"]
+    assert client.get(URL, headers={**AUTH, "If-None-Match": etag}).status_code == status.HTTP_304_NOT_MODIFIED
@@ -0,0 +1,59 @@
+# tests/api/test_project_state.py
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from unittest.mock import MagicMock
+from app.main import app
+from app.agents.base import VirtualLabState
+from app.dependencies import get_project_service
+from app.services.project_service import ProjectService
+from app.services.state_cache import ProjectStateCache
+
+client = TestClient(app)
+AUTH = {"Authorization": "Bearer TEST_AUTH_TOKEN"}
+
+
+@pytest.fixture
+def make_service():
+    """Installs a ProjectService over a mocked repository; the override is removed on teardown."""
+    def install(owner_id="test-user-f81d4"):
+        project = MagicMock(
+            project_id="p-1",
+            owner_id=owner_id,
+            original_research_goal="Goal",
+            refined_research_goal=None,
+            state_version=3,
+        )
+        state = VirtualLabState(messages=[], task_list=[], scratchpad={}, next_agent="pi_agent", audit_log=[])
+        repo = MagicMock()
+        repo.get_project_with_state.return_value = (project, state)
+        service = ProjectService(repo, MagicMock(), MagicMock(), MagicMock(), state_cache=ProjectStateCache())
+        app.dependency_overrides[get_project_service] = lambda: service
+        return repo
+
+    yield install
+    app.dependency_overrides.pop(get_project_service, None)
+
+
+def test_get_project_serves_cached_state_and_304(make_service):
+    repo = make_service()
+
+    first = client.get("/api/v1/projects/p-1", headers=AUTH)
+    assert first.status_code == status.HTTP_200_OK
+    assert first.json()["project_id"] == "p-1"
+    etag = first.headers["ETag"]
+    assert etag.startswith('"3-')
+
+    second = client.get("/api/v1/projects/p-1", headers={**AUTH, "If-None-Match": etag})
+    assert second.status_code == status.HTTP_304_NOT_MODIFIED
+    assert second.headers["ETag"] == etag
+
+    # The state was built from the DB exactly once
+    repo.get_project_with_state.assert_called_once_with("p-1")
+
+
+def test_get_project_hides_foreign_projects(make_service):
+    make_service(owner_id="someone-else")
+    response = client.get("/api/v1/projects/p-1", headers=AUTH)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
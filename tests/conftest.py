@@ -50,4 +50,28 @@ def override_dependencies(mock_project_service):
     yield
     
     # CLEANUP: Remove the override after the test finishes
-    app.dependency_overrides.clear()
\ No newline at end of file
+    app.dependency_overrides.clear()
+
+# 4. In-memory Database Session Fixture (Used by the repository tests)
+@pytest.fixture
+def db_session():
+    """
+    Provides a Session bound to a fresh in-memory SQLite database
+    with every table created, so repository tests never touch development.db.
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from app.database import Base
+    import app.db.models  # noqa: F401  (registers the tables on Base.metadata)
+
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
@@ -0,0 +1,73 @@
+# tests/core/test_auth.py
+
+import json
+import time
+import pytest
+from unittest.mock import patch
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwt, jwk
+from app.core.auth import (
+    InvalidToken, JWKSKeyStore, TokenVerifier, TEST_AUTH_TOKEN, TEST_USER_ID
+)
+
+SECRET = "unit-test-secret"
+
+
+def make_token(sub="user-1", exp_in=300, secret=SECRET, **claims):
+    return jwt.encode({"sub": sub, "exp": int(time.time()) + exp_in, **claims}, secret, algorithm="HS256")
+
+
+def test_hs256_token_is_verified_then_served_from_cache():
+    verifier = TokenVerifier(algorithms=["HS256"], secret=SECRET)
+    token = make_token()
+
+    assert verifier.verify(token) == "user-1"
+    with patch("app.core.auth.jwt.decode") as decode:
+        assert verifier.verify(token) == "user-1"
+        decode.assert_not_called()
+
+
+@pytest.mark.parametrize("token", [
+    make_token(exp_in=-10),
+    make_token(secret="wrong-secret"),
+    "not-a-jwt",
+])
+def test_invalid_tokens_are_rejected(token):
+    verifier = TokenVerifier(algorithms=["HS256"], secret=SECRET)
+    with pytest.raises(InvalidToken):
+        verifier.verify(token)
+
+
+def test_audience_is_enforced():
+    verifier = TokenVerifier(algorithms=["HS256"], secret=SECRET, audience="bridge-api")
+    assert verifier.verify(make_token(aud="bridge-api")) == "user-1"
+    with pytest.raises(InvalidToken):
+        verifier.verify(make_token(sub="user-2", aud="someone-else"))
+
+
+def test_test_token_requires_opt_in():
+    assert TokenVerifier(algorithms=["HS256"], allow_test_token=True).verify(TEST_AUTH_TOKEN) == TEST_USER_ID
+    with pytest.raises(InvalidToken):
+        TokenVerifier(algorithms=["HS256"]).verify(TEST_AUTH_TOKEN)
+
+
+@pytest.mark.asyncio
+async def test_rs256_key_is_loaded_from_jwks(tmp_path):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+    jwks_path = tmp_path / "jwks.json"
+    jwks_path.write_text(json.dumps({"keys": [{**public_jwk, "kid": "k1", "use": "sig"}]}))
+
+    verifier = TokenVerifier(algorithms=["RS256"], key_store=JWKSKeyStore(jwks_path=str(jwks_path)))
+    token = jwt.encode(
+        {"sub": "user-rs", "exp": int(time.time()) + 300}, private_pem, algorithm="RS256", headers={"kid": "k1"}
+    )
+
+    assert await verifier.verify_async(token) == "user-rs"
@@ -0,0 +1,136 @@
+# tests/db/test_audit_sink.py
+
+import threading
+import pytest
+from sqlalchemy import text
+from datetime import datetime, timezone
+from app.agents.base import audit_listener_var
+from app.db.audit_sink import AuditSink
+from app.db.models import AuditLogEntry, Project
+from app.db.project_repository import ProjectRepository
+from app.schemas.project import AuditEntry
+
+
+def entries(count):
+    now = datetime.now(timezone.utc)
+    return [AuditEntry(timestamp=now, agent="pi_agent", action=f"step_{i}", current_phase="intake", details={"i": i})
+            for i in range(count)]
+
+
+def stored(db_session):
+    return db_session.query(AuditLogEntry).count()
+
+
+def test_flushes_by_size_and_by_time(db_session):
+    db_session.add(Project(project_id="p1", owner_id="u1"))
+    db_session.commit()
+    flushed = threading.Event()
+    sink = AuditSink(lambda: db_session, max_entries=3, interval_seconds=0.05, on_flush=lambda versions: flushed.set())
+
+    sink.add("p1", entries(2))
+    assert stored(db_session) == 0                  # buffered
+    sink.add("p1", entries(1))
+    assert stored(db_session) == 3 and len(sink) == 0
+
+    flushed.clear()
+    sink.add("p1", entries(1))
+    # Not polling the shared session while the timer thread writes on it
+    assert flushed.wait(timeout=2)
+    assert stored(db_session) == 4
+    sink.close()
+
+
+def test_failed_flush_keeps_the_entries(db_session):
+    class BrokenSession:
+        def execute(self, *args):
+            raise RuntimeError("database is down")
+        def rollback(self):
+            pass
+        def close(self):
+            pass
+
+    sink = AuditSink(BrokenSession, max_entries=100, interval_seconds=60)
+    sink.add("p1", entries(2))
+    with pytest.raises(RuntimeError):
+        sink.flush()
+    assert len(sink) == 2
+
+    sink.session_factory = lambda: db_session
+    sink.close()                                    # shutdown writes what is left
+    assert stored(db_session) == 2
+
+
+def test_save_flushes_the_sink_first_without_duplicates(db_session):
+    db_session.add(Project(project_id="p1", owner_id="u1"))
+    db_session.commit()
+    sink = AuditSink(lambda: db_session, max_entries=100, interval_seconds=60)
+    repository = ProjectRepository(db_session, audit_sink=sink)
+    _, state = repository.get_project_with_state("p1")
+
+    token = audit_listener_var.set(lambda entry: sink.add("p1", [entry]))
+    try:
+        for i in range(5):
+            state.add_audit_entry(agent="pi_agent", action=f"step_{i}", details={})
+    finally:
+        audit_listener_var.reset(token)
+    state.audit_log.extend(entries(1))              # appended without the listener
+    assert len(sink) == 5
+
+    repository.save_agent_results("p1", state)
+
+    assert len(sink) == 0 and stored(db_session) == 6
+
+
+def test_save_stores_direct_appends_interleaved_with_sink_entries(db_session):
+    db_session.add(Project(project_id="p1", owner_id="u1"))
+    db_session.commit()
+    sink = AuditSink(lambda: db_session, max_entries=100, interval_seconds=60)
+    repository = ProjectRepository(db_session, audit_sink=sink)
+    _, state = repository.get_project_with_state("p1")
+
+    token = audit_listener_var.set(lambda entry: sink.add("p1", [entry]))
+    try:
+        state.add_audit_entry(agent="pi_agent", action="via_sink_1", details={})
+        state.audit_log.append(AuditEntry(timestamp=datetime.now(timezone.utc), agent="pi_agent",
+                                          action="direct", current_phase="intake", details={}))
+        state.add_audit_entry(agent="pi_agent", action="via_sink_2", details={})
+    finally:
+        audit_listener_var.reset(token)
+
+    repository.save_agent_results("p1", state)
+    repository.save_agent_results("p1", state)     # nothing new the second time
+
+    actions = sorted(action for (action,) in db_session.query(AuditLogEntry.action))
+    assert actions == ["direct", "via_sink_1", "via_sink_2"]
+
+
+def test_flush_bumps_state_versions_and_reports_them(db_session):
+    db_session.add_all([Project(project_id="p1", owner_id="u1", state_version=3),
+                        Project(project_id="p2", owner_id="u1", state_version=7)])
+    db_session.commit()
+    reported = []
+    sink = AuditSink(lambda: db_session, max_entries=100, interval_seconds=60, on_flush=reported.append)
+
+    sink.add("p1", entries(2))
+    sink.add("p2", entries(1))
+    assert sink.flush() == 3
+
+    assert reported == [{"p1": 4, "p2": 8}]
+    db_session.expire_all()
+    assert [db_session.get(Project, p).state_version for p in ("p1", "p2")] == [4, 8]
+
+
+def test_rows_the_database_rejects_are_dropped_not_retried_forever(db_session):
+    db_session.execute(text("PRAGMA foreign_keys=ON"))
+    db_session.add(Project(project_id="p1", owner_id=None))
+    db_session.commit()
+    sink = AuditSink(lambda: db_session, max_entries=100, interval_seconds=60)
+
+    sink.add("deleted-project", entries(2))
+    sink.add("p1", entries(1))
+    assert sink.flush() == 1                        # the valid project's rows still land
+    assert len(sink) == 0
+
+    sink.add("p1", entries(2))
+    assert sink.flush() == 2                        # later flushes are not blocked
+    assert stored(db_session) == 3
@@ -0,0 +1,45 @@
+# tests/db/test_project_batch.py
+
+import io
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from fastapi import UploadFile
+from app.db.models import Message, AuditLogEntry, Project, ProjectFile
+from app.db.project_repository import ProjectRepository
+from app.services.project_service import FileStorageService, ProjectService
+
+
+@pytest.mark.asyncio
+async def test_batch_creation_writes_everything_and_enqueues_once(db_session, tmp_path):
+    user_repo = MagicMock()
+    user_repo.get_user_by_id.return_value = MagicMock(user_id="u1", profession="PI", institute="Lab")
+    queue = MagicMock(enqueue_agent_tasks=AsyncMock(return_value=["j1", "j2", "j3"]))
+    service = ProjectService(
+        ProjectRepository(db_session), user_repo, FileStorageService(base_path=str(tmp_path)), queue
+    )
+    shared = UploadFile(file=io.BytesIO(b"%PDF-1.4"), filename="grant.pdf")
+
+    projects = await service.start_new_projects("u1", ["goal a", "goal b", "goal c"], [shared])
+
+    assert [p.original_research_goal for p in projects] == ["goal a", "goal b", "goal c"]
+    assert db_session.query(Project).count() == 3
+    assert db_session.query(Message).count() == 3
+    assert db_session.query(AuditLogEntry).count() == 3
+    # One stored object, referenced by every project
+    files = db_session.query(ProjectFile).all()
+    assert len(files) == 3 and len({f.storage_path for f in files}) == 1
+
+    user_repo.get_user_by_id.assert_called_once_with("u1")
+    queue.enqueue_agent_tasks.assert_awaited_once()
+    tasks = queue.enqueue_agent_tasks.await_args.args[0]
+    assert [t[0] for t in tasks] == [p.project_id for p in projects]
+
+
+def test_bulk_insert_rolls_back_as_a_unit(db_session):
+    repo = ProjectRepository(db_session)
+    projects = [Project(project_id="dup", owner_id="u1"), Project(project_id="dup", owner_id="u1")]
+
+    with pytest.raises(Exception):
+        repo.create_projects_bulk(projects, [], [])
+
+    assert db_session.query(Project).count() == 0
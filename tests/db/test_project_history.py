@@ -0,0 +1,45 @@
+# tests/db/test_project_history.py
+
+import json
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+from app.db.models import AuditLogEntry, Project
+from app.db.project_repository import ProjectRepository
+from app.services.project_service import ProjectService
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def service(db_session):
+    db_session.add(Project(project_id="p1", owner_id="u1"))
+    for i in range(10):
+        db_session.add(AuditLogEntry(
+            entry_id=f"e{i}",
+            project_id="p1",
+            timestamp=START + timedelta(hours=i),
+            agent="pi_agent" if i % 2 else "user",
+            action="step",
+            current_phase="intake",
+            details={"i": i},
+        ))
+    db_session.commit()
+    return ProjectService(ProjectRepository(db_session), MagicMock(), MagicMock(), MagicMock())
+
+
+@pytest.mark.asyncio
+async def test_audit_pages_respect_filters_and_cursor(service):
+    filters = {"agent": "pi_agent", "since": START + timedelta(hours=2)}
+
+    first = await service.list_audit_entries("p1", 2, **filters)
+    assert [e.entry_id for e in first.items] == ["e3", "e5"]
+
+    second = await service.list_audit_entries("p1", 2, first.next_cursor, **filters)
+    assert [e.entry_id for e in second.items] == ["e7", "e9"]
+    assert second.next_cursor is None
+
+
+def test_audit_ndjson_export_streams_every_row(service):
+    lines = list(service.export_audit_entries_ndjson("p1", until=START + timedelta(hours=5)))
+    assert [json.loads(line)["details"]["i"] for line in lines] == [0, 1, 2, 3, 4]
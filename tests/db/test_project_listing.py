@@ -0,0 +1,49 @@
+# tests/db/test_project_listing.py
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+from app.db.models import Project, User
+from app.db.project_repository import ProjectRepository
+from app.services.project_service import ProjectService
+
+
+@pytest.fixture
+def repo(db_session):
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    db_session.add_all([User(user_id="u1"), User(user_id="u2")])
+    for i in range(7):
+        db_session.add(Project(
+            project_id=f"p{i}",
+            owner_id="u1",
+            title=f"Project {i}",
+            original_research_goal="Goal",
+            # Two projects share each timestamp so the project_id tie-breaker matters
+            created_at=start + timedelta(minutes=i // 2),
+        ))
+    db_session.add(Project(project_id="other", owner_id="u2", created_at=start))
+    db_session.commit()
+    return ProjectRepository(db_session)
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cover_every_project_once(repo):
+    service = ProjectService(repo, MagicMock(), MagicMock(), MagicMock())
+
+    seen, cursor = [], None
+    while True:
+        page = await service.list_projects("u1", ["title"], limit=3, cursor=cursor)
+        seen += [item.project_id for item in page.items]
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert seen == ["p6", "p5", "p4", "p3", "p2", "p1", "p0"]
+
+
+def test_projection_selects_only_requested_columns(repo):
+    rows = repo.list_projects("u1", ["title"], limit=1)
+    assert set(rows[0]) == {"created_at", "project_id", "title"}
+
+    with pytest.raises(ValueError):
+        repo.list_projects("u1", ["owner"], limit=1)
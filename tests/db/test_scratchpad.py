@@ -0,0 +1,123 @@
+# tests/db/test_scratchpad.py
+
+import copy
+import pytest
+from sqlalchemy import event
+from app.db import project_repository
+from app.db.models import Project
+from app.db.project_repository import ProjectRepository
+from app.utils.merge_patch import apply_merge_patch, create_merge_patch
+
+# RFC 7396, Appendix A (a selection)
+RFC_EXAMPLES = [
+    ({"a": "b"}, {"a": "c"}, {"a": "c"}),
+    ({"a": "b"}, {"b": "c"}, {"a": "b", "b": "c"}),
+    ({"a": "b"}, {"a": None}, {}),
+    ({"a": [{"b": "c"}]}, {"a": [1]}, {"a": [1]}),
+    ({"a": {"b": "c"}}, {"a": {"b": "d", "c": None}}, {"a": {"b": "d"}}),
+    ({"e": None}, {"a": 1}, {"e": None, "a": 1}),
+    ({}, {"a": {"bb": {"ccc": None}}}, {"a": {"bb": {}}}),
+]
+
+
+@pytest.mark.parametrize("target, patch, result", RFC_EXAMPLES)
+def test_merge_patch_follows_rfc_7396(db_session, target, patch, result):
+    assert apply_merge_patch(target, patch) == result
+
+    # SQLite's json_patch() (the server-side path) agrees with the reference
+    db_session.add(Project(project_id="p1", owner_id="u1", scratchpad=target))
+    db_session.commit()
+    repository = ProjectRepository(db_session)
+    repository.save_agent_results("p1", repository.get_project_state("p1"), patch)
+    db_session.expire_all()
+    assert db_session.get(Project, "p1").scratchpad == result
+
+
+def test_create_merge_patch_round_trips():
+    before = {"goal": "x", "notes": {"a": 1, "b": [1, 2]}, "gone": True, "flag": 1}
+    after = {"goal": "x", "notes": {"a": 2, "b": [1, 2]}, "new": {"k": "v"}, "flag": True}
+
+    patch = create_merge_patch(before, after)
+
+    assert patch == {"gone": None, "notes": {"a": 2}, "new": {"k": "v"}, "flag": True}
+    assert apply_merge_patch(before, patch) == after
+    assert create_merge_patch(after, after) == {}
+
+
+@pytest.fixture
+def project(db_session):
+    db_session.add(Project(project_id="p1", owner_id="u1", next_agent="pi_agent"))
+    db_session.commit()
+
+
+def test_scratchpad_survives_between_jobs(db_session, project):
+    repository = ProjectRepository(db_session)
+    _, state = repository.get_project_with_state("p1")
+    assert state.scratchpad == {}
+
+    state.scratchpad["refined_research_goal"] = "Refined"
+    repository.save_agent_results("p1", state)
+
+    project, state = repository.get_project_with_state("p1")
+    assert state.scratchpad == {"refined_research_goal": "Refined"}
+    assert project.refined_research_goal == "Refined"
+
+
+def test_checkpoints_send_only_the_changed_keys(db_session, project, monkeypatch):
+    from app.workers import agent_worker
+
+    monkeypatch.setattr(agent_worker, "cache_project_state", lambda *args: None)
+    monkeypatch.setattr(agent_worker, "publish_state_events", lambda *args: None)
+    repository = ProjectRepository(db_session)
+    _, state = repository.get_project_with_state("p1")
+    state.scratchpad["corpus"] = "x" * 100_000
+    repository.save_agent_results("p1", state)
+
+    _, state = repository.get_project_with_state("p1")
+    checkpoint = agent_worker.StateCheckpointer(repository, "p1", state)
+    statements = []
+    engine = db_session.get_bind()
+    listener = lambda conn, cursor, statement, parameters, context, many: statements.append((statement, str(parameters)))
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        state.scratchpad["step"] = 2
+        checkpoint_state_version = checkpoint(state)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    written = [params for statement, params in statements if "scratchpad" in statement]
+    assert len(written) == 1 and '{"step":2}' in written[0] and "xxxx" not in written[0]
+    _, state = repository.get_project_with_state("p1")
+    assert state.scratchpad == {"corpus": "x" * 100_000, "step": 2}
+    assert checkpoint_state_version == 2
+
+
+def test_read_modify_write_fallback(db_session, project, monkeypatch):
+    monkeypatch.setattr(project_repository, "merge_patch_expression", lambda *args: None)
+    repository = ProjectRepository(db_session)
+
+    repository.save_agent_results("p1", repository.get_project_state("p1"), {"a": {"b": 1}})
+    repository.save_agent_results("p1", repository.get_project_state("p1"), {"a": {"c": 2}, "d": 3})
+
+    assert repository.get_project_with_state("p1")[1].scratchpad == {"a": {"b": 1, "c": 2}, "d": 3}
+
+
+def test_none_values_are_dropped_on_both_write_paths(db_session, project):
+    repository = ProjectRepository(db_session)
+    with_nones = {"kept": 1, "cleared": None, "nested": {"x": None}}
+
+    state = repository.get_project_state("p1")
+    state.scratchpad.update(with_nones)
+    repository.save_agent_results("p1", state)                  # whole document
+    whole = repository.get_project_state("p1").scratchpad
+    assert state.scratchpad == whole == {"kept": 1, "nested": {}}
+
+    state = repository.get_project_state("p1")
+    state.scratchpad.clear()
+    state.scratchpad["cleared"] = 0
+    repository.save_agent_results("p1", state)
+    before = copy.deepcopy(state.scratchpad)
+    state.scratchpad.clear()
+    state.scratchpad.update(copy.deepcopy(with_nones))
+    repository.save_agent_results("p1", state, create_merge_patch(before, state.scratchpad))
+    assert state.scratchpad == repository.get_project_state("p1").scratchpad == whole
@@ -0,0 +1,70 @@
+# tests/db/test_search.py
+
+import pytest
+from app.db.models import Message, Project, Task
+from app.db.search_repository import SearchRepository, fts5_query
+from app.db.search_schema import is_search_object
+
+
+@pytest.fixture
+def search(db_session):
+    db_session.add_all([
+        Project(project_id="p1", owner_id="u1", original_research_goal="CRISPR screening of kinase inhibitors"),
+        Project(project_id="p2", owner_id="u2", original_research_goal="Kinase inhibitors in zebrafish"),
+        Message(message_id="m1", project_id="p1", role="assistant", content="Plan: run a pooled CRISPR screen on kinases."),
+        Message(message_id="m2", project_id="p2", role="assistant", content="Zebrafish kinase assay protocol."),
+        Task(task_id="t1", project_id="p1", description="Analyse screen", status="completed", result="Top kinase hits: CDK4, CDK6"),
+    ])
+    db_session.commit()
+    return SearchRepository(db_session)
+
+
+def test_search_is_owner_scoped_ranked_and_highlighted(search):
+    hits = search.search("u1", "kinase", 10, ["project", "message", "task"])
+
+    assert {(h["source"], h["source_id"]) for h in hits} == {("project", "p1"), ("message", "m1"), ("task", "t1")}
+    assert all(h["project_id"] == "p1" for h in hits)
+    assert all("<mark>" in h["snippet"] for h in hits)
+    assert [h["score"] for h in hits] == sorted((h["score"] for h in hits), reverse=True)
+
+
+def test_index_follows_updates_and_deletes(search, db_session):
+    message = db_session.get(Message, "m1")
+    message.content = "Switched to a proteomics approach."
+    db_session.commit()
+    assert [h["source_id"] for h in search.search("u1", "proteomics", 10, ["message"])] == ["m1"]
+    assert search.search("u1", "crispr", 10, ["message"]) == []
+
+    db_session.delete(message)
+    db_session.commit()
+    assert search.search("u1", "proteomics", 10, ["message"]) == []
+
+
+def test_user_input_cannot_inject_fts_syntax(search):
+    assert fts5_query('kinase" OR owner_id:*') == '"kinase" "OR" "owner_id"*'
+    assert search.search("u1", '") NEAR(', 10, ["message"]) == []
+
+
+def test_snippets_escape_stored_text_before_highlighting(search, db_session):
+    db_session.add(Message(message_id="m3", project_id="p1", role="user", content='<img src=x onerror="alert(1)"> kinase'))
+    db_session.commit()
+
+    [hit] = [h for h in search.search("u1", "kinase", 10, ["message"]) if h["source_id"] == "m3"]
+
+    assert "<img" not in hit["snippet"]
+    assert "&lt;img src=x onerror=&quot;alert(1)&quot;&gt;" in hit["snippet"]
+    assert "<mark>kinase</mark>" in hit["snippet"]
+
+
+def test_scores_are_normalized_per_source(search):
+    hits = search.search("u1", "kinase", 10, ["project", "message", "task"])
+
+    assert all(0 < h["score"] <= 1 for h in hits)
+    # Each source's best hit ranks the same, whatever the raw bm25 scale of its table
+    assert [h["score"] for h in hits] == [1.0, 1.0, 1.0]
+
+
+def test_alembic_filter_recognizes_the_unmapped_search_schema():
+    assert is_search_object("messages_fts") and is_search_object("messages_fts_docsize")
+    assert is_search_object("ix_tasks_fts")
+    assert not is_search_object("messages")
@@ -0,0 +1,84 @@
+# tests/llm/test_batch_server.py
+
+import asyncio
+import threading
+from collections import defaultdict, deque
+import pytest
+from app.llm import BatchingBackend, BatchServer, FakeLLMBackend, LLMRequest, RemoteBatchingBackend
+
+
+class ListStore:
+    """The few Redis list commands the batch server protocol uses, shared across threads."""
+
+    def __init__(self):
+        self.lists = defaultdict(deque)
+        self.changed = threading.Condition()
+
+    def rpush(self, key, value):
+        with self.changed:
+            self.lists[key].append(value)
+            self.changed.notify_all()
+
+    def blpop(self, keys, timeout=0):
+        with self.changed:
+            self.changed.wait_for(lambda: any(self.lists[key] for key in keys), timeout=timeout)
+            for key in keys:
+                if self.lists[key]:
+                    return key, self.lists[key].popleft()
+            return None
+
+    def expire(self, key, seconds):
+        pass
+
+
+class AsyncListStore:
+    def __init__(self, store):
+        self.store = store
+
+    async def rpush(self, key, value):
+        self.store.rpush(key, value)
+
+    async def blpop(self, keys, timeout=0):
+        return await asyncio.to_thread(self.store.blpop, keys, timeout)
+
+    async def expire(self, key, seconds):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_requests_from_separate_jobs_share_one_provider_call():
+    store = ListStore()
+    fake = FakeLLMBackend()
+    server = BatchServer(AsyncListStore(store), BatchingBackend(fake, max_batch_size=4, max_wait_seconds=5))
+    stop = asyncio.Event()
+    serving = asyncio.create_task(server.serve(stop, poll_seconds=0.05))
+
+    # Each "job" has its own backend instance, as forked job processes would
+    jobs = [RemoteBatchingBackend(store) for _ in range(4)]
+    responses = await asyncio.gather(*(
+        job.complete(LLMRequest(prompt=f"task {i}", model="fake")) for i, job in enumerate(jobs)
+    ))
+    stop.set()
+    await serving
+
+    assert [r.text for r in responses] == [
+        fake._respond(LLMRequest(prompt=f"task {i}", model="fake"), 0).text for i in range(4)
+    ]
+    assert (fake.calls, fake.round_trips) == (4, 1)
+
+
+@pytest.mark.asyncio
+async def test_provider_errors_are_sent_back_to_the_job():
+    class DownBackend(FakeLLMBackend):
+        async def complete_batch(self, requests):
+            raise ConnectionError("rate limited")
+
+    store = ListStore()
+    server = BatchServer(AsyncListStore(store), BatchingBackend(DownBackend(), max_wait_seconds=0))
+    stop = asyncio.Event()
+    serving = asyncio.create_task(server.serve(stop, poll_seconds=0.05))
+
+    with pytest.raises(RuntimeError, match="ConnectionError: rate limited"):
+        await RemoteBatchingBackend(store).complete(LLMRequest(prompt="p", model="fake"))
+    stop.set()
+    await serving
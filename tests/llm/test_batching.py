@@ -0,0 +1,86 @@
+# tests/llm/test_batching.py
+
+import asyncio
+import pytest
+from app.llm import BatchingBackend, FakeLLMBackend, LLMClient, LLMRequest, ResponseCache
+
+
+def request(prompt, system="PI"):
+    return LLMRequest(prompt=prompt, model="fake", system=system)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_prompts_share_provider_round_trips():
+    fake = FakeLLMBackend(latency_seconds=0.02)
+    backend = BatchingBackend(fake, max_batch_size=8, max_wait_seconds=0.005)
+
+    responses = await asyncio.gather(*(backend.complete(request(f"prompt {i}")) for i in range(32)))
+
+    assert [r.text for r in responses] == [fake._respond(request(f"prompt {i}"), 0).text for i in range(32)]
+    assert (fake.calls, fake.round_trips) == (32, 4)  # 4 batched calls, not 32
+    assert backend.stats.mean_batch_size == 8
+
+
+@pytest.mark.asyncio
+async def test_a_lone_prompt_is_flushed_by_the_window_timer(mocker):
+    fake = FakeLLMBackend()
+    backend = BatchingBackend(fake, max_batch_size=8, max_wait_seconds=0.01)
+    call_later = mocker.spy(asyncio.get_running_loop(), "call_later")
+
+    await backend.complete(request("alone"))
+
+    assert call_later.call_args.args[:2] == (0.01, backend._flush)
+    assert fake.round_trips == 1
+
+
+def test_batches_left_behind_by_a_closed_event_loop_are_dropped():
+    backend = BatchingBackend(FakeLLMBackend(), max_batch_size=8, max_wait_seconds=60)
+    loop = asyncio.new_event_loop()
+    abandoned = loop.create_task(backend.complete(request("abandoned")))
+    loop.run_until_complete(asyncio.sleep(0))
+    abandoned.cancel()
+    loop.run_until_complete(asyncio.gather(abandoned, return_exceptions=True))
+    loop.close()
+    assert len(backend._pending) == 1
+
+    backend.max_wait_seconds = 0
+    asyncio.run(backend.complete(request("next")))
+
+    assert backend._pending == {}
+
+
+@pytest.mark.asyncio
+async def test_incompatible_requests_are_not_mixed():
+    seen = []
+
+    class RecordingBackend(FakeLLMBackend):
+        async def complete_batch(self, requests):
+            seen.append({r.system for r in requests})
+            return await super().complete_batch(requests)
+
+    backend = BatchingBackend(RecordingBackend(), max_batch_size=8, max_wait_seconds=0.005)
+    await asyncio.gather(*(backend.complete(request(str(i), system=f"s{i % 2}")) for i in range(6)))
+    assert sorted(map(sorted, seen)) == [["s0"], ["s1"]]
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_reaches_every_waiter():
+    class DownBackend(FakeLLMBackend):
+        async def complete_batch(self, requests):
+            raise ConnectionError("rate limited")
+
+    backend = BatchingBackend(DownBackend(), max_batch_size=4, max_wait_seconds=0.005)
+    results = await asyncio.gather(*(backend.complete(request(str(i))) for i in range(3)), return_exceptions=True)
+    assert all(isinstance(r, ConnectionError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_client_batches_cache_misses():
+    fake = FakeLLMBackend(latency_seconds=0.01)
+    client = LLMClient(BatchingBackend(fake, max_batch_size=16), ResponseCache())
+
+    await asyncio.gather(*(client.complete(f"task {i}") for i in range(10)))
+    await asyncio.gather(*(client.complete(f"task {i}") for i in range(10)))
+
+    assert (fake.calls, fake.round_trips) == (10, 1)
+    assert client.metrics()["batching"]["mean_batch_size"] == 10
@@ -0,0 +1,80 @@
+# tests/llm/test_client.py
+
+import asyncio
+import pytest
+from app.agents.base import VirtualLabState
+from app.agents.pi_agent import PIAgent
+from app.llm import DiskCacheTier, FakeLLMBackend, LLMClient, ResponseCache
+
+
+def make_client(tier=None, latency=0.0, max_entries=16):
+    backend = FakeLLMBackend(latency_seconds=latency)
+    return LLMClient(backend, ResponseCache(max_entries=max_entries, tier=tier)), backend
+
+
+@pytest.mark.asyncio
+async def test_identical_prompts_are_served_from_cache():
+    client, backend = make_client(latency=0.02)
+
+    first = await client.complete("Refine: spike protein", system="PI")
+    second = await client.complete("Refine: spike protein", system="PI")
+
+    assert second.text == first.text and second.cached and not first.cached
+    assert backend.calls == 1
+    await client.complete("Refine: spike protein", system="PI", temperature=0.7)  # different request
+    assert backend.calls == 2
+    stats = client.cache.stats
+    assert (stats.memory_hits, stats.misses, round(stats.hit_rate, 2)) == (1, 2, 0.33)
+    assert stats.saved_seconds >= 0.02
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_call_the_backend_once():
+    client, backend = make_client(latency=0.02)
+    responses = await asyncio.gather(*[client.complete("same prompt") for _ in range(5)])
+    assert backend.calls == 1
+    assert len({r.text for r in responses}) == 1
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_a_new_process_and_evicts_by_size(tmp_path):
+    tier = DiskCacheTier(str(tmp_path), ttl_seconds=60, max_bytes=10_000)
+    client, _ = make_client(tier=tier)
+    original = await client.complete("persist me")
+
+    fresh_client, fresh_backend = make_client(tier=DiskCacheTier(str(tmp_path), ttl_seconds=60, max_bytes=10_000))
+    again = await fresh_client.complete("persist me")
+    assert (again.text, again.cached, fresh_backend.calls) == (original.text, True, 0)
+    assert fresh_client.cache.stats.tier2_hits == 1
+
+    for i in range(100):
+        await client.complete(f"filler {i}")
+    assert sum(f.stat().st_size for f in tmp_path.glob("*/*.json")) <= 10_000
+
+
+@pytest.mark.asyncio
+async def test_failing_tier_degrades_to_a_miss():
+    class BrokenTier:
+        def get(self, key):
+            raise ConnectionError("redis down")
+
+        def set(self, key, value):
+            raise ConnectionError("redis down")
+
+    client, backend = make_client(tier=BrokenTier())
+    response = await client.complete("still works")
+    assert response.text and backend.calls == 1
+    assert client.cache.stats.tier2_errors == 2
+
+
+@pytest.mark.asyncio
+async def test_pi_agent_rerun_is_a_cache_hit():
+    client, backend = make_client()
+    metadata = {"profession": "Virologist", "institution": "Lab"}
+
+    for _ in range(2):
+        state = VirtualLabState(messages=[], task_list=[], scratchpad={}, next_agent="pi_agent", audit_log=[])
+        state = await PIAgent(llm=client).execute(state, original_research_goal="KP.3 escape", user_metadata=metadata)
+
+    assert backend.calls == 1
+    assert state.scratchpad["refined_research_goal"].endswith("Research goal: KP.3 escape")
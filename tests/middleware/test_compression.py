@@ -0,0 +1,67 @@
+# tests/middleware/test_compression.py
+
+import zlib
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from app.middleware.compression_middleware import CompressionMiddleware
+from app.utils.compression import negotiate_encoding, StreamCompressor
+
+BIG = "spike protein " * 500
+
+
+async def big(request):
+    return PlainTextResponse(BIG)
+
+
+async def small(request):
+    return PlainTextResponse("ok")
+
+
+async def events(request):
+    async def gen():
+        for i in range(3):
+            yield f"data: {i}\n\n"
+    return StreamingResponse(gen(), media_type="text/event-stream")
+
+
+app = Starlette(routes=[Route("/big", big), Route("/small", small), Route("/events", events)])
+app.add_middleware(CompressionMiddleware, minimum_size=500)
+client = TestClient(app)
+
+
+def test_negotiation_honours_q_values():
+    assert negotiate_encoding("gzip;q=0.5, identity") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding(None) is None
+
+
+def test_large_bodies_are_compressed_small_ones_are_not():
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.text == BIG  # httpx decodes transparently
+
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+
+def test_vary_is_set_whether_or_not_the_body_was_compressed():
+    small_response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    identity_response = client.get("/big", headers={"Accept-Encoding": "identity"})
+
+    for response in (small_response, identity_response):
+        assert "Content-Encoding" not in response.headers
+        assert response.headers["Vary"] == "Accept-Encoding"
+
+
+def test_streamed_chunks_are_flushed_independently():
+    compressor = StreamCompressor("gzip")
+    first = compressor.compress_chunk(b"data: 0\n\n")
+    # A flushed chunk is decodable on its own, before the stream ends
+    assert zlib.decompressobj(31).decompress(first) == b"data: 0\n\n"
+
+    response = client.get("/events", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.text == "data: 0\n\ndata: 1\n\ndata: 2\n\n"
@@ -0,0 +1,39 @@
+# tests/middleware/test_request_id.py
+
+import logging
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from app.middleware.logging_middleware import RequestIDMiddleware
+from app.utils.logger import RequestIDFilter, get_request_id
+
+seen = []
+
+
+async def endpoint(request):
+    seen.append(get_request_id())
+    return PlainTextResponse("ok")
+
+
+app = Starlette(routes=[Route("/", endpoint)])
+app.add_middleware(RequestIDMiddleware)
+client = TestClient(app)
+
+
+def test_request_id_is_echoed_and_visible_to_the_handler():
+    response = client.get("/", headers={"X-Request-ID": "abc-123"})
+    assert response.headers["X-Request-ID"] == "abc-123"
+    assert seen[-1] == "abc-123"
+
+
+def test_unsafe_request_ids_are_replaced():
+    response = client.get("/", headers={"X-Request-ID": "bad id\nforged log line"})
+    assert response.headers["X-Request-ID"] != "bad id\nforged log line"
+    assert seen[-1] == response.headers["X-Request-ID"]
+
+
+def test_filter_stamps_records_outside_requests_with_none():
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, "msg", None, None)
+    RequestIDFilter().filter(record)
+    assert record.request_id is None
@@ -0,0 +1,43 @@
+# tests/perf/test_audit_sink_perf.py
+
+# Run with RUN_PERF_TESTS=1; timings are reported as junit properties, never asserted.
+
+import os
+import time
+import pytest
+from app.db.audit_sink import AuditSink
+from app.db.models import AuditLogEntry
+from tests.db.test_audit_sink import entries
+
+pytestmark = pytest.mark.skipif(not os.getenv("RUN_PERF_TESTS"), reason="set RUN_PERF_TESTS=1 to run benchmarks")
+
+
+def test_benchmark_batched_flush_vs_row_by_row_inserts(tmp_path, record_property):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.database import Base
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    batch = entries(1000)
+
+    db = Session()
+    start = time.perf_counter()
+    for entry in batch:  # one INSERT and commit per entry
+        db.add(AuditLogEntry(project_id="p1", timestamp=entry.timestamp, agent=entry.agent, action=entry.action,
+                             current_phase=entry.current_phase, details=entry.details))
+        db.commit()
+    row_by_row = time.perf_counter() - start
+    db.close()
+
+    sink = AuditSink(Session, max_entries=500, interval_seconds=60)
+    start = time.perf_counter()
+    for entry in batch:
+        sink.add("p1", [entry])
+    sink.flush()
+    batched = time.perf_counter() - start
+
+    record_property("row_by_row_ms", round(row_by_row * 1000, 1))
+    record_property("write_behind_ms", round(batched * 1000, 1))
+    engine.dispose()
@@ -0,0 +1,23 @@
+# tests/perf/test_serialization_perf.py
+
+# Benchmarks are not part of the unit suite: run them with RUN_PERF_TESTS=1. Timings are
+# reported as junit properties (pytest --junitxml), never asserted.
+
+import json
+import os
+import timeit
+import pytest
+from tests.utils.test_serialization import make_large_state
+
+pytestmark = pytest.mark.skipif(not os.getenv("RUN_PERF_TESTS"), reason="set RUN_PERF_TESTS=1 to run benchmarks")
+
+
+def test_benchmark_model_dump_json_vs_dict_then_stdlib_json(record_property):
+    state = make_large_state()
+    assert len(state.to_json()) > 1_000_000
+
+    baseline = min(timeit.repeat(lambda: json.dumps(state.to_dict()).encode(), number=3, repeat=3))
+    fast = min(timeit.repeat(state.to_json, number=3, repeat=3))
+
+    record_property("dict_then_json_ms", round(baseline / 3 * 1000, 1))
+    record_property("model_dump_json_ms", round(fast / 3 * 1000, 1))
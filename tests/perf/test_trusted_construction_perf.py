@@ -0,0 +1,23 @@
+# tests/perf/test_trusted_construction_perf.py
+
+# Run with RUN_PERF_TESTS=1; timings are reported as junit properties, never asserted.
+
+import os
+import timeit
+import pytest
+from tests.schemas.test_trusted_construction import audit_rows, build_state
+
+pytestmark = pytest.mark.skipif(not os.getenv("RUN_PERF_TESTS"), reason="set RUN_PERF_TESTS=1 to run benchmarks")
+
+
+def test_benchmark_trusted_build_at_100k_entries(record_property):
+    rows = audit_rows(100_000)
+
+    validated = min(timeit.repeat(lambda: build_state(rows, trusted=False), number=1, repeat=3))
+    trusted = min(timeit.repeat(lambda: build_state(rows, trusted=True), number=1, repeat=3))
+    state = build_state(rows, trusted=True)
+    dump = min(timeit.repeat(state.to_json, number=1, repeat=3))
+
+    record_property("validated_build_ms", round(validated * 1000, 1))
+    record_property("trusted_build_ms", round(trusted * 1000, 1))
+    record_property("dump_ms", round(dump * 1000, 1))
@@ -0,0 +1,114 @@
+# tests/schemas/test_trusted_construction.py
+
+import pickle
+import pytest
+from datetime import datetime, timezone
+from pydantic import BaseModel, PrivateAttr
+from app.agents.base import VirtualLabState
+from app.schemas import project
+from app.schemas.project import AuditEntry, AuditEntryRecord, ConversationMessage, MessageRecord, TaskItem, TrustedModel
+from app.schemas.project import VirtualLabState as VirtualLabStateResponse
+
+
+def audit_rows(count):
+    """What get_project_with_state reads back from the audit_log_entries table."""
+    now = datetime.now(timezone.utc)
+    return [
+        dict(timestamp=now, agent="pi_agent", action="planning_complete", current_phase="planning_complete",
+             details={"step": i, "next_agent": "user_approval"})
+        for i in range(count)
+    ]
+
+
+def build_state(rows, trusted):
+    if trusted:
+        audit_log = [AuditEntry.trusted(**row) for row in rows]
+        return VirtualLabState.trusted(messages=[], task_list=[], scratchpad={}, next_agent="user_approval",
+                                       audit_log=audit_log, current_phase="planning_complete")
+    # The validated path as it was: timestamps went through isoformat() and back
+    audit_log = [AuditEntry(**{**row, "timestamp": row["timestamp"].isoformat()}) for row in rows]
+    return VirtualLabState(messages=[], task_list=[], scratchpad={}, next_agent="user_approval",
+                           audit_log=audit_log, current_phase="planning_complete")
+
+
+def test_trusted_instances_behave_like_validated_ones():
+    task = TaskItem.trusted(id="t2", description="Analyze", status="pending", result=None, depends_on=["t1"])
+    assert task == TaskItem(id="t2", description="Analyze", status="pending", depends_on=["t1"])
+    assert task.model_dump_json() == TaskItem(**task.model_dump()).model_dump_json()
+
+    message = ConversationMessage.trusted(role="user", content="hi")
+    message.content = "edited"  # still a regular, mutable model
+    assert message.model_fields_set == {"role", "content"}
+    assert message.model_copy().content == "edited"
+
+    rows = audit_rows(3)
+    assert build_state(rows, trusted=True).to_json() == build_state(rows, trusted=False).to_json()
+
+
+def test_pydantic_internals_trusted_relies_on_are_unchanged():
+    # If this fails after a pydantic upgrade, trusted() has silently fallen back to the
+    # (much slower) model_construct(): re-check the slot layout before updating the pin.
+    assert project.TRUSTED_FAST_PATH, f"BaseModel.__slots__ changed: {BaseModel.__slots__}"
+
+    entry = audit_rows(1)[0]
+    trusted = AuditEntry.trusted(**entry)
+    constructed = AuditEntry.model_construct(**entry)
+    for slot in BaseModel.__slots__:
+        assert getattr(trusted, slot) == getattr(constructed, slot), slot
+    assert pickle.loads(pickle.dumps(trusted)) == trusted
+
+
+def test_trusted_falls_back_to_model_construct(monkeypatch):
+    monkeypatch.setattr(project, "TRUSTED_FAST_PATH", False)
+    task = TaskItem.trusted(id="t1", description="Analyze", status="pending")
+    assert task == TaskItem(id="t1", description="Analyze", status="pending")
+
+
+def all_subclasses(cls):
+    for sub in cls.__subclasses__():
+        if sub.__module__.startswith("app."):
+            yield sub
+        yield from all_subclasses(sub)
+
+
+NOW = datetime.now(timezone.utc)
+# Every field of every TrustedModel, set to a valid value
+TRUSTED_SAMPLES = {
+    TaskItem: dict(id="t1", description="Search", status="completed", result={"hits": 3}, depends_on=["t0"]),
+    ConversationMessage: dict(role="user", content="Goal"),
+    AuditEntry: dict(timestamp=NOW, agent="pi_agent", action="plan", current_phase="intake", details={"step": 1}),
+    MessageRecord: dict(role="assistant", content="Plan", message_id="m1", created_at=NOW),
+    AuditEntryRecord: dict(timestamp=NOW, agent="worker", action="run", current_phase="executing", details=None,
+                           entry_id="e1"),
+    VirtualLabState: dict(messages=[], task_list=[], scratchpad={"k": 1}, next_agent="worker", audit_log=[],
+                          current_phase="executing"),
+    VirtualLabStateResponse: dict(project_id="p1", original_research_goal="Goal", refined_research_goal=None,
+                                  messages=[], task_list=[], scratchpad={}, next_agent="done", audit_log=[],
+                                  current_phase="done"),
+}
+
+
+def test_every_trusted_model_builds_the_same_instance_both_ways():
+    assert set(all_subclasses(TrustedModel)) == set(TRUSTED_SAMPLES), "add a sample for the new TrustedModel"
+    for model, values in TRUSTED_SAMPLES.items():
+        trusted = model.trusted(**values)
+        validated = model(**values)
+        assert trusted == validated, model
+        for slot in BaseModel.__slots__:
+            assert getattr(trusted, slot) == getattr(validated, slot), (model, slot)
+
+
+def test_trusted_requires_every_field():
+    with pytest.raises(TypeError, match="missing \\['depends_on', 'result'\\]"):
+        TaskItem.trusted(id="t1", description="Analyze", status="pending")
+    with pytest.raises(TypeError, match="unexpected \\['extra'\\]"):
+        ConversationMessage.trusted(role="user", content="hi", extra=1)
+
+
+def test_models_with_private_state_are_always_constructed():
+    class Annotated(TrustedModel):
+        note: str
+        _seen: int = PrivateAttr(default=0)
+
+    assert not Annotated._trusted_fast_path
+    assert Annotated.trusted(note="x")._seen == 0
@@ -0,0 +1,59 @@
+# tests/services/test_admission.py
+
+import pytest
+from app.services.admission import AdmissionController, TokenBucketLimiter
+
+
+def make_controller(depth=0, burst=2):
+    async def queue_depth():
+        return depth
+    return AdmissionController(
+        limiter=TokenBucketLimiter(redis_conn=None, rate_per_minute=60, burst=burst),
+        queue_depth=queue_depth,
+        max_queue_depth=100,
+        max_wait_seconds=600,
+        avg_job_seconds=30,
+        num_workers=2,
+    )
+
+
+@pytest.mark.asyncio
+async def test_owner_is_rate_limited_after_burst():
+    controller = make_controller()
+    assert (await controller.admit("u1")).allowed
+    assert (await controller.admit("u1")).allowed
+
+    decision = await controller.admit("u1")
+    assert (decision.allowed, decision.status_code) == (False, 429)
+    assert decision.retry_after_seconds >= 1
+
+    # Buckets are per owner
+    assert (await controller.admit("u2")).allowed
+
+
+@pytest.mark.asyncio
+async def test_saturated_queue_returns_503_without_spending_tokens():
+    controller = make_controller(depth=50)  # 50 jobs * 30s / 2 workers = 750s > 600s
+    decision = await controller.admit("u1")
+    assert (decision.allowed, decision.status_code) == (False, 503)
+    assert decision.retry_after_seconds >= 150
+
+    controller._depth = 0
+    assert (await controller.admit("u1")).allowed
+    assert (await controller.admit("u1")).allowed
+
+
+@pytest.mark.asyncio
+async def test_bulk_submissions_have_their_own_budget_and_oversized_ones_get_413():
+    controller = make_controller(depth=10)
+    controller.bulk_limiter = TokenBucketLimiter(redis_conn=None, rate_per_minute=60, burst=80, key="bulk:{owner_id}")
+
+    # 80 jobs exceed both the per-request burst (2) and the 600s wait budget on their own
+    assert (await controller.admit_bulk("u1", 80)).allowed
+    assert (await controller.admit("u1")).allowed  # the interactive bucket is untouched
+
+    decision = await controller.admit_bulk("u1", 10)
+    assert (decision.allowed, decision.status_code) == (False, 429)
+
+    decision = await controller.admit_bulk("u1", 81)
+    assert (decision.allowed, decision.status_code, decision.retry_after_seconds) == (False, 413, 0)
@@ -0,0 +1,150 @@
+# tests/services/test_audit_retention.py
+
+import io
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+from app.db.audit_archive import AuditArchiveStore
+from app.db.audit_archive_repository import AuditArchiveRepository
+from app.db.models import AuditArchiveSegment, AuditLogEntry, Project
+from app.db.project_repository import ProjectRepository
+from app.services.audit_retention import AuditRetentionService
+from app.services.project_service import ProjectService
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AuditArchiveStore(location=str(tmp_path / "archive"))
+
+
+@pytest.fixture
+def projects(db_session):
+    """p1: ten entries an hour apart from START; p2: finished; p3: active and recent."""
+    db_session.add_all([
+        Project(project_id="p1", owner_id="u1"),
+        Project(project_id="p2", owner_id="u1", next_agent="done"),
+        Project(project_id="p3", owner_id="u1", next_agent="user_approval"),
+    ])
+    for i in range(10):
+        db_session.add(AuditLogEntry(
+            entry_id=f"e{i}", project_id="p1", timestamp=START + timedelta(hours=i),
+            agent="pi_agent" if i % 2 else "user", action="step", current_phase="intake", details={"i": i},
+        ))
+    for project_id in ("p2", "p3"):
+        db_session.add(AuditLogEntry(
+            entry_id=f"{project_id}-e0", project_id=project_id, timestamp=START + timedelta(days=60),
+            agent="pi_agent", action="step", current_phase="intake", details={},
+        ))
+    db_session.commit()
+
+
+def hot_count(db_session, project_id):
+    return db_session.query(AuditLogEntry).filter(AuditLogEntry.project_id == project_id).count()
+
+
+def retention(db_session, store):
+    return AuditRetentionService(AuditArchiveRepository(db_session, store), archive_after_days=30,
+                                 segment_entries=4, delete_batch_size=3)
+
+
+def test_archives_old_and_finished_entries_in_bounded_segments(db_session, store, projects):
+    stats = retention(db_session, store).run(now=START + timedelta(days=61))
+
+    assert (stats["projects"], stats["segments"], stats["entries"]) == (2, 4, 11)   # p1: 4 + 4 + 2, p2: 1
+    assert [hot_count(db_session, p) for p in ("p1", "p2", "p3")] == [0, 0, 1]
+    segments = db_session.query(AuditArchiveSegment).filter_by(project_id="p1").order_by(AuditArchiveSegment.first_timestamp).all()
+    assert [(s.entry_count, s.first_entry_id, s.last_entry_id) for s in segments] == [(4, "e0", "e3"), (4, "e4", "e7"), (2, "e8", "e9")]
+    assert all(s.storage_path.endswith(".ndjson.zst") for s in segments)
+
+    assert retention(db_session, store).run(now=START + timedelta(days=61))["entries"] == 0  # nothing left to do
+
+
+@pytest.mark.asyncio
+async def test_archived_entries_are_read_transparently(db_session, store, projects):
+    # Archive the first half only: pages and filters must span both tiers
+    retention(db_session, store).run(now=START + timedelta(days=30, hours=5))
+    assert hot_count(db_session, "p1") == 5
+
+    repository = ProjectRepository(db_session, audit_archive=store)
+    service = ProjectService(repository, MagicMock(), MagicMock(), MagicMock())
+    filters = {"agent": "pi_agent", "since": START + timedelta(hours=2)}
+    first = await service.list_audit_entries("p1", 2, **filters)
+    second = await service.list_audit_entries("p1", 2, first.next_cursor, **filters)
+    assert [e.entry_id for e in first.items + second.items] == ["e3", "e5", "e7", "e9"]
+
+    exported = [row["entry_id"] for row in repository.iter_audit_entries("p1")]
+    assert exported == [f"e{i}" for i in range(10)]
+
+    _, state = repository.get_project_with_state("p1")
+    assert [entry.details["i"] for entry in state.audit_log] == list(range(10))
+    state.add_audit_entry(agent="pi_agent", action="resumed", details={})
+    repository.save_agent_results("p1", state)
+    assert hot_count(db_session, "p1") == 6   # archived entries are not written back
+
+
+def test_gzip_segments_round_trip(tmp_path):
+    store = AuditArchiveStore(location=str(tmp_path), codec="gzip")
+    rows = [{"entry_id": "e1", "timestamp": START, "agent": "a", "action": "x", "current_phase": "p", "details": {"k": [1]}}]
+    path, size = store.write_segment("p1", "s1", rows)
+    assert path.endswith(".ndjson.gz") and size > 0
+    assert list(store.read_segment(path, "gzip")) == rows
+
+
+class FakeS3:
+    """The few S3 client calls the archive store makes, over a dict."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def upload_fileobj(self, fileobj, bucket, key):
+        self.objects[(bucket, key)] = fileobj.read()
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def list_objects_v2(self, Bucket, Prefix, Delimiter=None, ContinuationToken=None):
+        keys = sorted(key for bucket, key in self.objects if bucket == Bucket and key.startswith(Prefix))
+        if Delimiter is None:
+            return {"Contents": [{"Key": key} for key in keys], "IsTruncated": False}
+        prefixes = sorted({Prefix + key[len(Prefix):].split(Delimiter)[0] + Delimiter for key in keys})
+        return {"CommonPrefixes": [{"Prefix": prefix} for prefix in prefixes], "IsTruncated": False}
+
+    def delete_objects(self, Bucket, Delete):
+        for obj in Delete["Objects"]:
+            self.objects.pop((Bucket, obj["Key"]), None)
+
+
+def test_segments_live_in_object_storage_and_go_with_their_project(db_session, projects):
+    s3 = FakeS3()
+    store = AuditArchiveStore(location="s3://bucket/audit", s3_client=s3)
+    retention(db_session, store).run(now=START + timedelta(days=61))
+
+    assert {key.split("/")[1] for _, key in s3.objects} == {"p1", "p2"}
+    assert all(s.storage_path.startswith("s3://bucket/audit/") for s in db_session.query(AuditArchiveSegment))
+    exported = [row["entry_id"] for row in ProjectRepository(db_session, audit_archive=store).iter_audit_entries("p1")]
+    assert exported == [f"e{i}" for i in range(10)]
+
+    db_session.delete(db_session.get(Project, "p1"))
+    db_session.commit()
+    assert retention(db_session, store).run(now=START + timedelta(days=61))["purged_projects"] == 1
+
+    assert {key.split("/")[1] for _, key in s3.objects} == {"p2"}
+    assert db_session.query(AuditArchiveSegment).filter_by(project_id="p1").count() == 0
+
+
+def test_export_during_an_archive_pass_has_no_duplicates(db_session, store, projects):
+    archive = AuditArchiveRepository(db_session, store)
+    rows = archive.archivable_entries("p1", None, 4)
+    archive.archive_entries("p1", rows)
+    # A hot read that started before the pass committed still sees the archived rows
+    db_session.add_all([AuditLogEntry(project_id="p1", **row) for row in rows])
+    db_session.commit()
+
+    records = ProjectRepository(db_session, audit_archive=store).iter_project_records("p1")
+    exported = [row["entry_id"] for record_type, row in records if record_type == "audit"]
+    assert exported == [f"e{i}" for i in range(10)]
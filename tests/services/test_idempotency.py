@@ -0,0 +1,102 @@
+# tests/services/test_idempotency.py
+
+import asyncio
+import io
+import pytest
+from unittest.mock import AsyncMock
+from fastapi import UploadFile
+from redis.exceptions import ConnectionError as RedisConnectionError
+from app.services.idempotency import (
+    IdempotencyStore, IdempotencyKeyReused, StoredResponse, request_fingerprint, upload_digest
+)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_wait_for_the_first_result():
+    store = IdempotencyStore()
+    fingerprint = request_fingerprint("goal", [])
+    work_done = 0
+
+    async def create():
+        nonlocal work_done
+        replay = await store.begin("u1", "key-1", fingerprint)
+        if replay is not None:
+            return replay
+        work_done += 1
+        await asyncio.sleep(0.01)
+        response = StoredResponse(status_code=202, body=b'{"project_id": "p1"}')
+        await store.complete("u1", "key-1", fingerprint, response)
+        return response
+
+    results = await asyncio.gather(*(create() for _ in range(5)))
+
+    assert work_done == 1
+    assert {r.body for r in results} == {b'{"project_id": "p1"}'}
+
+
+@pytest.mark.asyncio
+async def test_failed_attempt_releases_the_key_and_payload_mismatch_is_rejected():
+    store = IdempotencyStore()
+    fingerprint = request_fingerprint("goal", [])
+
+    assert await store.begin("u1", "key-1", fingerprint) is None
+    await store.release("u1", "key-1")
+    assert await store.begin("u1", "key-1", fingerprint) is None
+
+    with pytest.raises(IdempotencyKeyReused):
+        await store.begin("u1", "key-1", request_fingerprint("another goal", []))
+
+
+@pytest.mark.asyncio
+async def test_unreachable_redis_degrades_to_process_local_records():
+    redis = AsyncMock()
+    redis.set.side_effect = RedisConnectionError("Connection refused")
+    store = IdempotencyStore(redis)
+    fingerprint = request_fingerprint("goal", [])
+
+    assert await store.begin("u1", "key-1", fingerprint) is None
+    await store.complete("u1", "key-1", fingerprint, StoredResponse(status_code=202, body=b"{}"))
+
+    replay = await store.begin("u1", "key-1", fingerprint)
+    assert replay.status_code == 202
+    redis.set.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_lock_is_extended_while_the_owner_is_working():
+    redis = AsyncMock()
+    redis.set.return_value = True
+    store = IdempotencyStore(redis, lock_ttl_seconds=0.03)
+    fingerprint = request_fingerprint("goal", [])
+
+    assert await store.begin("u1", "key-1", fingerprint) is None
+    await asyncio.sleep(0.05)
+    await store.complete("u1", "key-1", fingerprint, StoredResponse(status_code=202, body=b"{}"))
+    extensions = redis.expire.await_count
+    await asyncio.sleep(0.05)
+
+    assert extensions >= 1
+    assert redis.expire.await_count == extensions  # the heartbeat stopped on completion
+
+
+@pytest.mark.asyncio
+async def test_a_leaked_lock_stops_being_extended():
+    redis = AsyncMock()
+    redis.set.return_value = True
+    store = IdempotencyStore(redis, lock_ttl_seconds=0.03, max_lock_seconds=0.05)
+
+    assert await store.begin("u1", "key-1", request_fingerprint("goal", [])) is None  # never completed
+    await asyncio.sleep(0.1)
+    extensions = redis.expire.await_count
+    await asyncio.sleep(0.05)
+
+    assert redis.expire.await_count == extensions  # the lock can now expire
+
+
+@pytest.mark.asyncio
+async def test_upload_digest_covers_the_content_and_rewinds():
+    first = UploadFile(io.BytesIO(b"sequence A"), filename="data.txt", size=10)
+    second = UploadFile(io.BytesIO(b"sequence B"), filename="data.txt", size=10)
+
+    assert await upload_digest(first) != await upload_digest(second)
+    assert await first.read() == b"sequence A"
@@ -0,0 +1,110 @@
+# tests/services/test_plan_reuse.py
+
+import importlib
+import pytest
+from app.agents.base import VirtualLabState
+from app.agents.pi_agent import PIAgent
+from app.db.goal_index_repository import GoalIndexRepository
+from app.db.models import Project, Task
+from app.llm import FakeLLMBackend, LLMClient
+from app.services import plan_reuse
+from app.services.plan_reuse import PlanReuseService
+from app.utils.minhash import MAX_TEXT_CHARS, minhash, shingles
+
+GOAL = "Analyze the KP.3 spike protein mutations for antibody escape in recent SARS-CoV-2 variants"
+
+
+def planned_project(db_session, project_id, owner_id="owner-1", goal=GOAL):
+    """An earlier project the PI agent already planned."""
+    db_session.add(Project(
+        project_id=project_id, owner_id=owner_id, original_research_goal=goal,
+        refined_research_goal=f"Refined: {goal}",
+    ))
+    db_session.add_all([
+        Task(task_id=f"{project_id}-a", project_id=project_id, description="Search literature"),
+        Task(task_id=f"{project_id}-b", project_id=project_id, description="Compare mutations",
+             depends_on=[f"{project_id}-a"]),
+    ])
+    db_session.commit()
+
+
+@pytest.fixture
+def service(db_session):
+    return PlanReuseService(GoalIndexRepository(db_session), threshold=0.7, mode="reuse", scope="owner")
+
+
+def test_near_duplicate_goal_gets_the_earlier_plan(db_session, service):
+    planned_project(db_session, "p1")
+    assert service.index_and_match("p1", "owner-1", GOAL) is None
+
+    reworded = "Analyse the KP.3 spike-protein mutations for antibody escape in recent SARS-CoV-2 variants!"
+    warm_start = service.index_and_match("p2", "owner-1", reworded)
+
+    assert warm_start["source_project_id"] == "p1"
+    assert warm_start["similarity"] >= 0.7
+    assert warm_start["refined_research_goal"] == f"Refined: {GOAL}"
+    assert [t["depends_on"] for t in warm_start["tasks"]] == [[], ["p1-a"]]
+
+
+def test_dissimilar_goal_other_owner_or_other_documents_do_not_match(db_session, service):
+    planned_project(db_session, "p1")
+    service.index_and_match("p1", "owner-1", GOAL, ["sha-a"])
+
+    assert service.index_and_match("p2", "owner-1", "Measure soil microbiome diversity under drought", ["sha-a"]) is None
+    assert service.index_and_match("p3", "owner-2", GOAL, ["sha-a"]) is None     # owner scope
+    assert service.index_and_match("p4", "owner-1", GOAL, ["sha-b"]) is None     # other documents
+
+    shared = PlanReuseService(GoalIndexRepository(db_session), threshold=0.7, mode="reuse", scope="global")
+    assert shared.index_and_match("p5", "owner-2", GOAL, ["sha-a"])["source_project_id"] == "p1"
+
+
+@pytest.mark.asyncio
+async def test_pi_agent_reuses_the_plan_without_a_model_call():
+    backend = FakeLLMBackend()
+    warm_start = {
+        "mode": "reuse", "source_project_id": "p1", "similarity": 0.92,
+        "refined_research_goal": "Refined question",
+        "tasks": [
+            {"id": "x-1", "description": "Search literature", "depends_on": []},
+            {"id": "x-2", "description": "Compare mutations", "depends_on": ["x-1"]},
+        ],
+    }
+    state = VirtualLabState(messages=[], task_list=[], scratchpad={}, next_agent="pi_agent", audit_log=[])
+
+    state = await PIAgent(llm=LLMClient(backend)).execute(
+        state, original_research_goal=GOAL, user_metadata={}, warm_start=warm_start
+    )
+
+    assert backend.calls == 0
+    assert state.scratchpad["refined_research_goal"] == "Refined question"
+    assert [(t.id, t.depends_on, t.status) for t in state.task_list] == [("t1", [], "pending"), ("t2", ["t1"], "pending")]
+    assert "plan_reused" in [entry.action for entry in state.audit_log]
+
+
+def test_default_mode_only_suggests(monkeypatch):
+    monkeypatch.delenv("PLAN_REUSE_MODE", raising=False)
+    assert importlib.reload(plan_reuse).PLAN_REUSE_MODE == "warm_start"
+
+
+def test_shingling_is_capped_for_long_goals():
+    head = GOAL * 20
+    assert len(shingles(head * 100)) <= MAX_TEXT_CHARS
+    # Anything past the cap does not change the signature
+    assert minhash(shingles(head + " trailing detail")) == minhash(shingles(head + " other detail"))
+
+
+@pytest.mark.asyncio
+async def test_reuse_message_does_not_claim_global_matches_are_the_users_own():
+    warm_start = {
+        "mode": "reuse", "scope": "global", "source_project_id": "p1", "similarity": 0.92,
+        "refined_research_goal": "Refined question",
+        "tasks": [{"id": "x-1", "description": "Search literature", "depends_on": []}],
+    }
+    state = VirtualLabState(messages=[], scratchpad={}, next_agent="pi_agent", audit_log=[], task_list=[])
+
+    state = await PIAgent(llm=LLMClient(FakeLLMBackend())).execute(
+        state, original_research_goal=GOAL, user_metadata={}, warm_start=warm_start
+    )
+
+    assert "an earlier project" in state.messages[-1].content
+    assert "your earlier" not in state.messages[-1].content
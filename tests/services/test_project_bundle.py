@@ -0,0 +1,78 @@
+# tests/services/test_project_bundle.py
+
+import io
+import tarfile
+import pytest
+from datetime import datetime, timezone
+from app.db.models import AuditLogEntry, Message, Project, ProjectFile
+from app.db.project_repository import ProjectRepository
+from app.services.project_bundle import BundleError, ProjectBundleService
+from app.services.project_service import FileStorageService
+
+
+@pytest.fixture
+def bundles(db_session, tmp_path):
+    blob = tmp_path / "grant.pdf"
+    blob.write_bytes(b"%PDF" * 1000)
+    db_session.add(Project(project_id="p1", owner_id="u1", original_research_goal="Goal", state_version=4))
+    db_session.add(ProjectFile(
+        file_id="f1", project_id="p1", filename="grant.pdf", file_size=4000,
+        storage_path=str(blob), file_type="application/pdf",
+    ))
+    db_session.add(Message(project_id="p1", role="user", content="Goal"))
+    db_session.add(AuditLogEntry(
+        project_id="p1", timestamp=datetime(2025, 1, 1, tzinfo=timezone.utc), agent="user",
+        action="Project Initiated", current_phase="intake", details={"goal": "Goal"},
+    ))
+    db_session.commit()
+    return ProjectBundleService(ProjectRepository(db_session), FileStorageService(base_path=str(tmp_path / "store")))
+
+
+def test_export_is_a_valid_tar_with_blobs_before_the_manifest(bundles):
+    archive = b"".join(bundles.export_bundle("p1"))
+
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        assert tar.getnames() == ["files/f1", "manifest.ndjson"]
+        lines = tar.extractfile("manifest.ndjson").read().splitlines()
+    assert len(lines) == 5  # header, project, file, message, audit
+
+
+def test_round_trip_creates_a_new_project_with_new_ids(bundles, db_session):
+    archive = io.BytesIO(b"".join(bundles.export_bundle("p1")))
+
+    project_id, source_id = bundles.import_bundle("u2", archive)
+
+    assert source_id == "p1" and project_id != "p1"
+    imported = db_session.get(Project, project_id)
+    assert (imported.owner_id, imported.state_version) == ("u2", 4)
+    file = db_session.query(ProjectFile).filter_by(project_id=project_id).one()
+    assert file.file_id != "f1"
+    assert open(file.storage_path, "rb").read() == b"%PDF" * 1000
+    assert db_session.query(AuditLogEntry).filter_by(project_id=project_id).one().details == {"goal": "Goal"}
+    assert db_session.query(Message).count() == 2
+
+
+def test_garbage_is_rejected(bundles):
+    with pytest.raises(BundleError):
+        bundles.import_bundle("u2", io.BytesIO(b"not a tar archive" * 100))
+
+
+def test_file_rows_without_a_blob_are_rejected(bundles, db_session):
+    # A hand-made bundle whose file row points at a path outside the import
+    manifest = b"\n".join([
+        b'{"type":"bundle","data":{"format_version":1,"project_id":"evil"}}',
+        b'{"type":"project","data":{"project_id":"evil","owner_id":"x","original_research_goal":"Goal"}}',
+        b'{"type":"file","data":{"file_id":"f9","project_id":"evil","filename":"passwd","file_size":1,'
+        b'"storage_path":"/etc/passwd","file_type":"text/plain"}}',
+    ]) + b"\n"
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode="w") as tar:
+        info = tarfile.TarInfo("manifest.ndjson")
+        info.size = len(manifest)
+        tar.addfile(info, io.BytesIO(manifest))
+    archive.seek(0)
+
+    with pytest.raises(BundleError, match="no blob"):
+        bundles.import_bundle("u2", archive)
+    assert db_session.query(ProjectFile).filter_by(storage_path="/etc/passwd").count() == 0
+    assert db_session.query(Project).count() == 1
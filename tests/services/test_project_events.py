@@ -0,0 +1,110 @@
+# tests/services/test_project_events.py
+
+import asyncio
+import json
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+from app.agents.base import VirtualLabState
+from app.schemas.project import ConversationMessage, TaskItem
+from app.services.project_events import (
+    ProjectEventBroker, RESET_EVENT, snapshot_state, diff_state_events, format_sse, StreamedEvent
+)
+
+
+def make_state():
+    return VirtualLabState(
+        messages=[ConversationMessage(role="user", content="Goal")],
+        task_list=[TaskItem(id="t1", description="Search", status="pending")],
+        scratchpad={},
+        next_agent="pi_agent",
+        audit_log=[],
+        current_phase="intake",
+    )
+
+
+def test_diff_state_events_reports_each_change_in_order():
+    state = make_state()
+    before = snapshot_state(state)
+
+    state.current_phase = "planning_complete"
+    state.next_agent = "user_approval"
+    state.messages.append(ConversationMessage(role="assistant", content="Plan ready"))
+    state.task_list[0].status = "completed"
+    state.add_audit_entry(agent="pi_agent", action="planning_complete", details={})
+
+    events = diff_state_events("p1", before, state)
+
+    assert [e.event for e in events] == ["phase_changed", "message", "task_updated", "audit"]
+    assert events[0].data["current_phase"] == "planning_complete"
+    assert events[1].data["content"] == "Plan ready"
+
+
+def test_format_sse_frame():
+    frame = format_sse(StreamedEvent(id="1-0", event="message", data={"a": 1}))
+    assert frame == b'id: 1-0\nevent: message\ndata: {"a": 1}\n\n'
+
+
+@pytest.mark.asyncio
+async def test_broker_replays_then_streams_without_duplicates():
+    redis = MagicMock()
+    redis.xrange = _async_return([
+        (b"4-0", {b"event": b"message", b"data": b'{"n": 4}'}),   # the client's last event, still in the log
+        (b"5-0", {b"event": b"message", b"data": b'{"n": 5}'}),
+    ])
+    broker = ProjectEventBroker(redis_conn=redis)
+    broker._ensure_listener = lambda: None  # no Redis subscription in tests
+
+    stream = broker.events("p1", last_event_id="4-0")
+    assert (await stream.__anext__()).id == "5-0"
+
+    # 5-0 arriving live (published during the replay) must not be delivered twice
+    broker.dispatch(json.dumps({"id": "5-0", "project_id": "p1", "event": "message", "data": {}}))
+    broker.dispatch(json.dumps({"id": "6-0", "project_id": "p1", "event": "audit", "data": {}}))
+    broker.dispatch(json.dumps({"id": "7-0", "project_id": "other", "event": "audit", "data": {}}))
+
+    event = await asyncio.wait_for(stream.__anext__(), timeout=1)
+    assert (event.id, event.event) == ("6-0", "audit")
+    await stream.aclose()
+    assert broker.num_connections == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("log", [
+    [(b"9-0", {b"event": b"message", b"data": b"{}"})],   # 4-0 was trimmed away
+    [],                                                    # the stream expired
+])
+async def test_broker_resets_when_the_resume_point_is_gone(log):
+    redis = MagicMock()
+    redis.xrange = _async_return(log)
+    broker = ProjectEventBroker(redis_conn=redis)
+    broker._ensure_listener = lambda: None
+
+    stream = broker.events("p1", last_event_id="4-0")
+    assert await stream.__anext__() is RESET_EVENT
+
+    # Then live events, whatever their id
+    broker.dispatch(json.dumps({"id": "3-0", "project_id": "p1", "event": "audit", "data": {}}))
+    assert (await asyncio.wait_for(stream.__anext__(), timeout=1)).id == "3-0"
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_broker_ignores_an_invalid_last_event_id():
+    redis = MagicMock()
+    broker = ProjectEventBroker(redis_conn=redis)
+    broker._ensure_listener = lambda: None
+
+    stream = broker.events("p1", last_event_id="abc")
+    first = asyncio.ensure_future(stream.__anext__())
+    await asyncio.sleep(0)  # subscribed, waiting for live events
+    broker.dispatch(json.dumps({"id": "6-0", "project_id": "p1", "event": "audit", "data": {}}))
+    assert (await asyncio.wait_for(first, timeout=1)).id == "6-0"
+    redis.xrange.assert_not_called()
+    await stream.aclose()
+
+
+def _async_return(value):
+    async def _inner(*args, **kwargs):
+        return value
+    return _inner
@@ -0,0 +1,90 @@
+# tests/services/test_uploads.py
+
+import hashlib
+import pytest
+from app.db.models import Project, UploadSession
+from app.db.project_repository import ProjectRepository
+from app.db.upload_repository import UploadRepository
+from app.services.upload_service import (
+    UploadService, UploadOffsetMismatch, UploadTooLarge, UploadIncomplete, UploadNotFound,
+    UploadChecksumMismatch
+)
+
+DATA = b"0123456789" * 1000
+
+
+async def chunks(*parts):
+    for part in parts:
+        yield part
+
+
+@pytest.fixture
+def uploads(db_session, tmp_path):
+    return UploadService(UploadRepository(db_session), base_path=str(tmp_path))
+
+
+@pytest.mark.asyncio
+async def test_chunks_resume_at_the_committed_offset_and_finalize(uploads):
+    session = await uploads.create("u1", "paper.pdf", "application/pdf", len(DATA))
+
+    assert await uploads.append("u1", session.upload_id, 0, chunks(DATA[:3000], DATA[3000:4000])) == 4000
+    # A retry of an old chunk is told where to resume
+    with pytest.raises(UploadOffsetMismatch) as exc:
+        await uploads.append("u1", session.upload_id, 0, chunks(DATA[:10]))
+    assert exc.value.expected == 4000
+    with pytest.raises(UploadIncomplete):
+        await uploads.finalize("u1", session.upload_id)
+
+    assert await uploads.append("u1", session.upload_id, 4000, chunks(DATA[4000:])) == len(DATA)
+    done = await uploads.finalize("u1", session.upload_id, hashlib.sha256(DATA).hexdigest())
+
+    assert done.status == "completed"
+    assert open(done.storage_path, "rb").read() == DATA
+
+
+@pytest.mark.asyncio
+async def test_dropped_connection_keeps_flushed_bytes(uploads, monkeypatch):
+    monkeypatch.setattr("app.services.upload_service.WRITE_BUFFER_SIZE", 1000)
+    session = await uploads.create("u1", "paper.pdf", "application/pdf", len(DATA))
+
+    async def dropped():
+        yield DATA[:2500]
+        raise ConnectionResetError()
+
+    with pytest.raises(ConnectionResetError):
+        await uploads.append("u1", session.upload_id, 0, dropped())
+
+    resumed = await uploads.get("u1", session.upload_id)
+    assert resumed.received_bytes == 2500
+    await uploads.append("u1", session.upload_id, 2500, chunks(DATA[2500:]))
+    # The running hash was kept across the drop
+    assert (await uploads.finalize("u1", session.upload_id)).content_sha256 == hashlib.sha256(DATA).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_size_checksum_and_ownership_are_enforced(uploads):
+    session = await uploads.create("u1", "a.txt", "text/plain", 5)
+    with pytest.raises(UploadTooLarge):
+        await uploads.append("u1", session.upload_id, 0, chunks(b"too long"))
+    with pytest.raises(UploadNotFound):
+        await uploads.get("someone-else", session.upload_id)
+
+    await uploads.append("u1", session.upload_id, 0, chunks(b"hello"))
+    with pytest.raises(UploadChecksumMismatch):
+        await uploads.finalize("u1", session.upload_id, "0" * 64)
+
+
+@pytest.mark.asyncio
+async def test_finalized_upload_attaches_to_exactly_one_project(uploads, db_session):
+    session = await uploads.create("u1", "a.txt", "text/plain", 5)
+    await uploads.append("u1", session.upload_id, 0, chunks(b"hello"))
+    await uploads.finalize("u1", session.upload_id)
+
+    repo = ProjectRepository(db_session)
+    files = await uploads.resolve_for_project("u1", "p1", [session.upload_id])
+    repo.create_project_and_files(Project(project_id="p1", owner_id="u1"), files, None, [session.upload_id])
+
+    assert files[0].content_sha256 == hashlib.sha256(b"hello").hexdigest()
+    assert db_session.get(UploadSession, session.upload_id).status == "attached"
+    with pytest.raises(UploadNotFound):
+        await uploads.resolve_for_project("u1", "p2", [session.upload_id])
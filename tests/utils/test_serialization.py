@@ -0,0 +1,40 @@
+# tests/utils/test_serialization.py
+
+import json
+from datetime import datetime, timezone
+from app.agents.base import VirtualLabState
+from app.schemas.project import ConversationMessage, TaskItem, AuditEntry
+from app.utils.serialization import dumps, loads
+
+
+def make_large_state(num_entries: int = 2500) -> VirtualLabState:
+    """Roughly 1 MB of JSON: long conversation, task list and audit trail."""
+    now = datetime.now(timezone.utc)
+    return VirtualLabState(
+        messages=[ConversationMessage(role="assistant", content="spike protein mutation " * 10) for _ in range(num_entries)],
+        task_list=[TaskItem(id=f"t{i}", description="Search PubMed for KP.3 literature.", status="pending") for i in range(num_entries // 10)],
+        scratchpad={"refined_research_goal": "Determine protein function"},
+        next_agent="user_approval",
+        audit_log=[
+            AuditEntry(timestamp=now, agent="pi_agent", action="planning_complete", current_phase="planning_complete",
+                       details={"step": i, "tasks_created": 2, "next_agent": "user_approval"})
+            for i in range(num_entries)
+        ],
+    )
+
+
+def test_fast_path_round_trips():
+    state = make_large_state(10)
+    assert loads(state.to_json()) == state.to_dict()
+    assert loads(dumps({"state": state})) == {"state": state.to_dict()}
+
+
+def test_fast_path_matches_dict_then_stdlib_json_byte_for_byte():
+    state = make_large_state(50)
+    expected = json.dumps(state.to_dict(), separators=(",", ":"), ensure_ascii=False).encode()
+
+    encoded = state.to_json()
+
+    assert isinstance(encoded, bytes)
+    assert encoded == expected
+    assert dumps(state) == expected